@@ -0,0 +1,150 @@
+"""
+Batch Scanning — runs ``run_scan`` over a stream of domains with bounded
+concurrency and yields one NDJSON event per domain as soon as it finishes.
+
+Inputs are pulled lazily, so memory stays proportional to the number of
+scans in flight rather than the size of the batch.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict
+from typing import AsyncIterator
+
+from pydantic_core import to_json
+
+from app import config
+from app.normalizer import LineNormalizer, normalize_domain
+from app.scanner import run_scan
+
+
+def _event(payload: dict) -> bytes:
+    return to_json(payload) + b"\n"
+
+
+async def iter_domain_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into stripped, non-empty, non-comment lines."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            text = line.decode("utf-8", "replace").strip()
+            if text and not text.startswith("#"):
+                yield text
+    text = buffer.decode("utf-8", "replace").strip()
+    if text and not text.startswith("#"):
+        yield text
+
+
+async def run_batch(
+    domains: AsyncIterator[str],
+    concurrency: int,
+) -> AsyncIterator[bytes]:
+    """Scan ``domains`` with at most ``concurrency`` scans in flight, yielding NDJSON."""
+    started = time.monotonic()
+    submitted = completed = failed = 0
+    seen: set[str] = set()
+    pending: dict[asyncio.Task, tuple[int, str, float]] = {}
+
+    def progress() -> dict:
+        return {"submitted": submitted, "completed": completed, "failed": failed}
+
+    async def drain(return_when) -> AsyncIterator[bytes]:
+        nonlocal completed, failed
+        done, _ = await asyncio.wait(pending.keys(), return_when=return_when)
+        for task in done:
+            index, domain, t0 = pending.pop(task)
+            elapsed_ms = round((time.monotonic() - t0) * 1000, 1)
+            exc = task.exception()
+            if exc is not None:
+                failed += 1
+                yield _event({
+                    "type": "error", "index": index, "domain": domain,
+                    "detail": str(exc) or exc.__class__.__name__,
+                    "elapsed_ms": elapsed_ms, "progress": progress(),
+                })
+            else:
+                completed += 1
+                yield _event({
+                    "type": "result", "index": index, "domain": domain,
+                    "elapsed_ms": elapsed_ms, "progress": progress(),
+                    "result": task.result(),
+                })
+
+    try:
+        index = -1
+        async for raw in domains:
+            index += 1
+            if index >= config.BATCH_MAX_DOMAINS:
+                yield _event({
+                    "type": "error", "index": index, "input": raw,
+                    "detail": f"Batch limit of {config.BATCH_MAX_DOMAINS} domains reached; "
+                              "remaining input ignored",
+                    "progress": progress(),
+                })
+                break
+
+            try:
+                domain = normalize_domain(raw)
+            except ValueError as exc:
+                failed += 1
+                yield _event({
+                    "type": "error", "index": index, "input": raw,
+                    "detail": str(exc), "progress": progress(),
+                })
+                continue
+            if domain in seen:
+                continue
+            seen.add(domain)
+
+            while len(pending) >= concurrency:
+                async for line in drain(asyncio.FIRST_COMPLETED):
+                    yield line
+
+            submitted += 1
+            task = asyncio.create_task(run_scan(domain))
+            pending[task] = (index, domain, time.monotonic())
+
+        while pending:
+            async for line in drain(asyncio.FIRST_COMPLETED):
+                yield line
+
+        yield _event({
+            "type": "summary", **progress(),
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+        })
+    finally:
+        # Client went away or the stream errored: stop any scans still running
+        for task in pending:
+            task.cancel()
+
+
+async def run_normalize(domains: AsyncIterator[str], registrable: bool = False) -> AsyncIterator[bytes]:
+    """
+    Normalize and deduplicate ``domains`` without scanning, yielding NDJSON.
+
+    The streaming counterpart of ``normalizer.normalize_lines``: one
+    ``result`` per unique domain with its registrable domain, one ``error``
+    per invalid line, then a ``summary`` with the counts.
+    """
+    started = time.monotonic()
+    normalizer = LineNormalizer(registrable)
+    async for raw in domains:
+        line = normalizer.feed(raw)
+        if line is None:
+            continue
+        if line.error is not None:
+            yield _event({"type": "error", "index": line.index, "input": line.input, "detail": line.error})
+        else:
+            yield _event({
+                "type": "result", "index": line.index, "input": line.input, "domain": line.domain,
+                "registrable": line.registrable, "public_suffix": line.public_suffix,
+            })
+
+    yield _event({
+        "type": "summary", **asdict(normalizer.stats),
+        "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+    })
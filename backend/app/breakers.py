@@ -0,0 +1,210 @@
+"""
+Circuit Breakers — fail fast while an upstream is down.
+
+Every upstream endpoint (crt.sh, each RDAP host, ipinfo.io, each WHOIS
+server, each DNS nameserver) has a breaker. ``BREAKER_FAILURES``
+consecutive failures open it: calls are refused with ``CircuitOpen``
+immediately instead of each waiting out a timeout. After
+``BREAKER_COOLDOWN`` the breaker goes half-open and lets
+``BREAKER_HALF_OPEN_PROBES`` trial calls through; a successful trial
+closes it, a failed one reopens it with the cooldown doubled (up to
+``BREAKER_MAX_COOLDOWN``).
+
+Only outages count as failures. Answers that are bad news for one domain
+(NXDOMAIN, 404, "no match") are successes as far as the upstream's health
+is concerned, and local throttling says nothing either way. A call cut off
+by a ``deadline`` counts as a failure, since a hung upstream is the outage
+breakers exist for; any other cancellation (the client went away, a hedged
+query lost the race) settles nothing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from app import config
+
+
+class CircuitOpen(Exception):
+    """The upstream's breaker is open; the call was not attempted."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} is failing (circuit open); retrying in {max(retry_in, 0.0):.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+# The innermost ``deadline`` and the task it cancels
+_deadline: ContextVar[Optional[tuple[asyncio.Task, asyncio.Timeout]]] = ContextVar("breaker_deadline", default=None)
+
+
+@asynccontextmanager
+async def deadline(seconds: Optional[float]) -> AsyncIterator[None]:
+    """
+    ``asyncio.timeout`` whose expiry breakers count as an upstream failure.
+
+    Breaker-guarded calls inside the block that are cancelled because the
+    deadline passed settle as failed rather than abandoned, so an upstream
+    that never answers opens its breaker even when the caller's deadline
+    fires before the client's own timeout.
+    """
+    async with asyncio.timeout(seconds) as timeout:
+        token = _deadline.set((asyncio.current_task(), timeout))
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
+
+def _deadline_expired() -> bool:
+    """Whether the current task is being cancelled by its ``deadline``."""
+    current = _deadline.get()
+    return current is not None and current[0] is asyncio.current_task() and current[1].expired()
+
+
+class Attempt:
+    """One admitted call; settled once by ``succeeded``, ``failed`` or ``abandon``."""
+
+    def __init__(self, breaker: "CircuitBreaker", probe: bool):
+        self.breaker = breaker
+        self.probe = probe
+        self.settled = False
+
+    def succeeded(self) -> None:
+        self._settle(True)
+
+    def failed(self) -> None:
+        self._settle(False)
+
+    def abandon(self) -> None:
+        """The call ended without telling us anything about the upstream."""
+        self._settle(None)
+
+    def _settle(self, ok: Optional[bool]) -> None:
+        if not self.settled:
+            self.settled = True
+            self.breaker._settle(self, ok)
+
+
+class CircuitBreaker:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = "closed"  # closed | open | half_open
+        self.failures = 0  # consecutive
+        self.cooldown = config.BREAKER_COOLDOWN
+        self.open_until = 0.0
+        self.probes = 0  # trial calls in flight while half-open
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def available(self) -> bool:
+        """Whether a call would be admitted right now."""
+        if self.state == "open":
+            return time.monotonic() >= self.open_until
+        if self.state == "half_open":
+            return self.probes < config.BREAKER_HALF_OPEN_PROBES
+        return True
+
+    def admit(self) -> Attempt:
+        """Admit one call or raise CircuitOpen."""
+        if self.state == "open":
+            now = time.monotonic()
+            if now < self.open_until:
+                self.rejected += 1
+                raise CircuitOpen(self.name, self.open_until - now)
+            self.state = "half_open"
+            self.probes = 0
+        if self.state == "half_open":
+            if self.probes >= config.BREAKER_HALF_OPEN_PROBES:
+                self.rejected += 1
+                raise CircuitOpen(self.name, 0.0)
+            self.probes += 1
+            return Attempt(self, probe=True)
+        return Attempt(self, probe=False)
+
+    @contextmanager
+    def guard(self, outage: Callable[[BaseException], Optional[bool]] = lambda exc: True) -> Iterator[Attempt]:
+        """
+        Admit a call for the duration of the block.
+
+        Leaving the block normally counts as success unless the body
+        settled the attempt itself. An exception is judged by ``outage``:
+        True for a failure, False for a success, None for neither.
+        Cancellation by an expired ``deadline`` is a failure; any other
+        cancellation settles nothing.
+        """
+        attempt = self.admit()
+        try:
+            yield attempt
+        except asyncio.CancelledError:
+            if _deadline_expired():
+                attempt.failed()
+            else:
+                attempt.abandon()
+            raise
+        except Exception as exc:
+            verdict = outage(exc)
+            attempt._settle(None if verdict is None else not verdict)
+            raise
+        else:
+            attempt.succeeded()
+
+    def _settle(self, attempt: Attempt, ok: Optional[bool]) -> None:
+        if attempt.probe:
+            self.probes = max(self.probes - 1, 0)
+            if self.state != "half_open" or ok is None:
+                return
+            if ok:
+                self._close()
+            else:
+                self._open(min(self.cooldown * 2, config.BREAKER_MAX_COOLDOWN))
+            return
+        if self.state != "closed" or ok is None:
+            return  # straggler from before the breaker opened
+        if ok:
+            self.failures = 0
+        else:
+            self.failures += 1
+            if self.failures >= config.BREAKER_FAILURES:
+                self._open(config.BREAKER_COOLDOWN)
+
+    def _open(self, cooldown: float) -> None:
+        self.state = "open"
+        self.cooldown = cooldown
+        self.open_until = time.monotonic() + cooldown
+        self.trips += 1
+
+    def _close(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self.cooldown = config.BREAKER_COOLDOWN
+
+    def stats(self) -> dict:
+        retry_in = self.open_until - time.monotonic() if self.state == "open" else 0.0
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_in_seconds": round(max(retry_in, 0.0), 1),
+        }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the breaker for upstream ``name`` (e.g. ``crt.sh``, ``whois:whois.nic.io``)."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+def breaker_stats() -> dict[str, dict]:
+    return {name: breaker.stats() for name, breaker in sorted(_breakers.items())}
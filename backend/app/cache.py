@@ -0,0 +1,268 @@
+"""
+Result Cache — two-tier cache for module results.
+
+L1 is an in-process LRU; L2 is a SQLite file shared by every uvicorn worker
+on the host. Each source has its own TTL plus a stale window during which an
+expired entry is still served while a background task refreshes it.
+
+Failed loads are never stored. Empty results (every field at its default)
+are kept in L1 only, for ``CACHE_NEGATIVE_TTL`` and without a stale window,
+so an answer that may stand for an upstream hiccup is soon asked again; a
+background refresh that comes back empty keeps the stale entry instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import BaseModel, TypeAdapter
+
+from app import config
+from app.metrics import CACHE_LOOKUPS
+from app.models import (
+    AsnInfo,
+    CacheStatus,
+    CertificateInfo,
+    CtLookup,
+    DnsRecords,
+    WhoisInfo,
+)
+
+
+# Serialisation adapter for the result type of each cached source
+ADAPTERS: dict[str, TypeAdapter] = {
+    "dns": TypeAdapter(DnsRecords),
+    "whois": TypeAdapter(WhoisInfo),
+    "tls": TypeAdapter(CertificateInfo),
+    "ct": TypeAdapter(CtLookup),
+    "asn": TypeAdapter(AsnInfo),
+}
+
+
+def _is_empty(value: Any) -> bool:
+    """Whether a result carries no data: None, or a model with every field at its default."""
+    if isinstance(value, BaseModel):
+        return not value.model_dump(exclude_defaults=True)
+    return value is None
+
+
+# ── L1: in-process LRU ────────────────────────────────────────────────────────
+
+class _LruStore:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[tuple[float, Any]]:
+        item = self._data.get(key)
+        if item is not None:
+            self._data.move_to_end(key)
+        return item
+
+    def set(self, key: str, stored_at: float, value: Any) -> None:
+        self._data[key] = (stored_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+# ── L2: shared SQLite file ────────────────────────────────────────────────────
+
+class _SqliteStore:
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[tuple[float, str]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT stored_at, value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(self, key: str, stored_at: float, value: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, stored_at, value) VALUES (?, ?, ?)",
+                (key, stored_at, value),
+            )
+            conn.commit()
+
+    def purge_older_than(self, cutoff: float) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM cache WHERE stored_at < ?", (cutoff,))
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# ── Tiered cache ──────────────────────────────────────────────────────────────
+
+class TieredCache:
+    """L1 LRU in front of an L2 SQLite store with stale-while-revalidate."""
+
+    def __init__(self, l1_size: int, l2_path: Path):
+        self.l1 = _LruStore(l1_size)
+        self.l2 = _SqliteStore(l2_path)
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._writes = 0
+
+    async def get_or_load(
+        self,
+        source: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> tuple[Any, Optional[CacheStatus]]:
+        """
+        Return ``(value, status)`` for ``source``/``key``.
+
+        ``status`` is None when the value was freshly loaded, otherwise it
+        describes the cache hit (layer, age, staleness).
+        """
+        full_key = f"{source}:{key}"
+        ttl = config.CACHE_TTLS[source]
+        stale_ttl = config.CACHE_STALE_TTLS[source]
+        now = time.time()
+
+        layer = "l1"
+        entry = self.l1.get(full_key)
+        if entry is None:
+            layer = "l2"
+            entry = await self._l2_get(source, full_key)
+            if entry is not None:
+                self.l1.set(full_key, *entry)
+
+        if entry is not None:
+            stored_at, value = entry
+            age = now - stored_at
+            empty = _is_empty(value)
+            if age < (min(ttl, config.CACHE_NEGATIVE_TTL) if empty else ttl):
+                return value, CacheStatus(layer=layer, age_seconds=round(age, 1))
+            if not empty and age < ttl + stale_ttl:
+                self._schedule_refresh(source, full_key, loader)
+                return value, CacheStatus(layer=layer, age_seconds=round(age, 1), stale=True)
+
+        value = await loader()
+        await self._store(source, full_key, value)
+        return value, None
+
+    async def _l2_get(self, source: str, full_key: str) -> Optional[tuple[float, Any]]:
+        try:
+            row = await asyncio.to_thread(self.l2.get, full_key)
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        stored_at, raw = row
+        try:
+            return stored_at, ADAPTERS[source].validate_json(raw)
+        except ValueError:
+            return None
+
+    async def _store(self, source: str, full_key: str, value: Any) -> None:
+        stored_at = time.time()
+        self.l1.set(full_key, stored_at, value)
+        if _is_empty(value):
+            return  # never shared with other workers or kept across restarts
+        raw = ADAPTERS[source].dump_json(value).decode()
+        try:
+            await asyncio.to_thread(self.l2.set, full_key, stored_at, raw)
+            self._writes += 1
+            if self._writes % 500 == 0:
+                horizon = max(
+                    config.CACHE_TTLS[s] + config.CACHE_STALE_TTLS[s] for s in ADAPTERS
+                )
+                await asyncio.to_thread(self.l2.purge_older_than, stored_at - horizon)
+        except sqlite3.Error:
+            pass  # L2 is best-effort; L1 still holds the value
+
+    def _schedule_refresh(
+        self,
+        source: str,
+        full_key: str,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> None:
+        if full_key in self._refreshing:
+            return
+
+        async def _refresh():
+            try:
+                value = await loader()
+                if not _is_empty(value):
+                    await self._store(source, full_key, value)
+            except Exception:
+                pass  # keep serving the stale entry
+            finally:
+                self._refreshing.pop(full_key, None)
+
+        self._refreshing[full_key] = asyncio.create_task(_refresh())
+
+    def close(self) -> None:
+        for task in self._refreshing.values():
+            task.cancel()
+        self._refreshing.clear()
+        self.l1.clear()
+        self.l2.close()
+
+
+_cache: Optional[TieredCache] = None
+
+
+def get_cache() -> TieredCache:
+    """Return the process-wide result cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = TieredCache(config.CACHE_L1_SIZE, config.CACHE_L2_PATH)
+    return _cache
+
+
+async def cached(
+    source: str,
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    statuses: dict[str, CacheStatus],
+    section: str,
+) -> Any:
+    """
+    Load ``source``/``key`` through the cache, recording a hit under ``section``.
+
+    When caching is disabled the loader is awaited directly.
+    """
+    if not config.CACHE_ENABLED:
+        return await loader()
+    value, status = await get_cache().get_or_load(source, key, loader)
+    if status is None:
+        CACHE_LOOKUPS.labels(source, "miss").inc()
+    else:
+        CACHE_LOOKUPS.labels(source, "stale" if status.stale else status.layer).inc()
+        statuses[section] = status
+    return value
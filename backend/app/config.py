@@ -0,0 +1,283 @@
+"""
+OpenScope — runtime configuration.
+
+Every setting has a sensible default and can be overridden with an
+``OPENSCOPE_*`` environment variable, e.g. ``OPENSCOPE_CACHE_TTL_DNS=60``.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.environ.get(f"OPENSCOPE_{name}", default)
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(f"OPENSCOPE_{name}")
+    return int(raw) if raw not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(f"OPENSCOPE_{name}")
+    return float(raw) if raw not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.environ.get(f"OPENSCOPE_{name}")
+    if raw in (None, ""):
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+# ── Storage ───────────────────────────────────────────────────────────────────
+
+DATA_DIR = Path(_env_str("DATA_DIR", "data"))
+
+
+# ── Result Cache ──────────────────────────────────────────────────────────────
+
+CACHE_ENABLED = _env_bool("CACHE_ENABLED", True)
+CACHE_L1_SIZE = _env_int("CACHE_L1_SIZE", 2048)  # entries held in-process
+CACHE_L2_PATH = Path(_env_str("CACHE_L2_PATH", str(DATA_DIR / "cache.sqlite3")))
+
+# Fresh lifetime per source (seconds). DNS changes often; registration and
+# CT history change rarely.
+CACHE_TTLS: dict[str, float] = {
+    "dns": _env_float("CACHE_TTL_DNS", 5 * 60),
+    "whois": _env_float("CACHE_TTL_WHOIS", 24 * 3600),
+    "tls": _env_float("CACHE_TTL_TLS", 60 * 60),
+    "ct": _env_float("CACHE_TTL_CT", 6 * 3600),
+    "asn": _env_float("CACHE_TTL_ASN", 24 * 3600),
+}
+
+# How long past its TTL an entry may still be served while it is refreshed
+# in the background (stale-while-revalidate window).
+CACHE_STALE_TTLS: dict[str, float] = {
+    "dns": _env_float("CACHE_STALE_DNS", 10 * 60),
+    "whois": _env_float("CACHE_STALE_WHOIS", 7 * 24 * 3600),
+    "tls": _env_float("CACHE_STALE_TLS", 6 * 3600),
+    "ct": _env_float("CACHE_STALE_CT", 2 * 24 * 3600),
+    "asn": _env_float("CACHE_STALE_ASN", 7 * 24 * 3600),
+}
+
+# Lifetime of empty results (no records, no registration data), held in L1 only
+CACHE_NEGATIVE_TTL = _env_float("CACHE_NEGATIVE_TTL", 60)
+
+
+# ── Upstream HTTP Pools ───────────────────────────────────────────────────────
+
+HTTP2_ENABLED = _env_bool("HTTP2", False)  # needs the optional "h2" package
+HTTP_MAX_CONNECTIONS = _env_int("HTTP_MAX_CONNECTIONS", 20)  # per upstream
+HTTP_MAX_KEEPALIVE = _env_int("HTTP_MAX_KEEPALIVE", 10)  # per upstream
+HTTP_KEEPALIVE_EXPIRY = _env_float("HTTP_KEEPALIVE_EXPIRY", 30.0)
+HTTP_CONNECT_TIMEOUT = _env_float("HTTP_CONNECT_TIMEOUT", 5.0)
+
+# Overall read/write timeout per upstream host (seconds)
+HTTP_TIMEOUTS: dict[str, float] = {
+    "crt.sh": _env_float("TIMEOUT_CRT_SH", 12.0),
+    "rdap": _env_float("TIMEOUT_RDAP", 10.0),
+    "ipinfo": _env_float("TIMEOUT_IPINFO", 5.0),
+}
+
+
+# Upstream endpoints; overridable so scans can be pointed at local stand-ins
+# (see benchmarks/standins.py) or at a mirror
+CRT_SH_URL = _env_str("CRT_SH_URL", "https://crt.sh")
+RDAP_IP_URL = _env_str("RDAP_IP_URL", "https://rdap.org/ip")
+RDAP_DOMAIN_URL = _env_str("RDAP_DOMAIN_URL", "https://rdap.org/domain/{domain}")
+IPINFO_URL = _env_str("IPINFO_URL", "https://ipinfo.io")
+
+
+# ── Concurrency ───────────────────────────────────────────────────────────────
+
+# Maximum concurrent module calls per upstream, across all scans in a process
+UPSTREAM_CONCURRENCY: dict[str, int] = {
+    "dns": _env_int("CONCURRENCY_DNS", 64),
+    "whois": _env_int("CONCURRENCY_WHOIS", 8),
+    "tls": _env_int("CONCURRENCY_TLS", 32),
+    "crt.sh": _env_int("CONCURRENCY_CRT_SH", 4),
+    "rdap": _env_int("CONCURRENCY_RDAP", 8),
+    "ipinfo": _env_int("CONCURRENCY_IPINFO", 8),
+}
+
+BATCH_CONCURRENCY = _env_int("BATCH_CONCURRENCY", 16)  # default domains in flight
+BATCH_MAX_CONCURRENCY = _env_int("BATCH_MAX_CONCURRENCY", 64)  # caller-requested cap
+BATCH_MAX_DOMAINS = _env_int("BATCH_MAX_DOMAINS", 100_000)
+
+
+# ── Deadlines ─────────────────────────────────────────────────────────────────
+
+SCAN_DEADLINE = _env_float("SCAN_DEADLINE", 20)  # whole-scan budget; unfinished sections are reported pending
+# Each module's timeout is its observed latency percentile times the
+# headroom factor, kept between the min and max
+MODULE_DEADLINE_MIN = _env_float("MODULE_DEADLINE_MIN", 2)
+MODULE_DEADLINE_MAX = _env_float("MODULE_DEADLINE_MAX", 12)
+MODULE_DEADLINE_PERCENTILE = _env_float("MODULE_DEADLINE_PERCENTILE", 99)
+MODULE_DEADLINE_FACTOR = _env_float("MODULE_DEADLINE_FACTOR", 2)
+MODULE_LATENCY_WINDOW = _env_int("MODULE_LATENCY_WINDOW", 500)  # recent successful calls kept
+MODULE_LATENCY_MIN_SAMPLES = _env_int("MODULE_LATENCY_MIN_SAMPLES", 20)  # until then MODULE_DEADLINE_MAX
+
+
+# ── Circuit Breakers ──────────────────────────────────────────────────────────
+
+BREAKER_FAILURES = _env_int("BREAKER_FAILURES", 5)  # consecutive failures that open a breaker
+BREAKER_COOLDOWN = _env_float("BREAKER_COOLDOWN", 15)  # seconds open before a trial call
+BREAKER_MAX_COOLDOWN = _env_float("BREAKER_MAX_COOLDOWN", 300)  # doubles on each failed trial up to this
+BREAKER_HALF_OPEN_PROBES = _env_int("BREAKER_HALF_OPEN_PROBES", 1)  # trial calls in flight at once
+
+
+# ── DNS Resolver ──────────────────────────────────────────────────────────────
+
+DNS_NAMESERVERS = [
+    ns.strip() for ns in _env_str("DNS_NAMESERVERS", "8.8.8.8,1.1.1.1").split(",") if ns.strip()
+]
+DNS_PORT = _env_int("DNS_PORT", 53)
+DNS_TIMEOUT = _env_float("DNS_TIMEOUT", 5.0)  # per nameserver attempt
+DNS_HEDGE_DELAY = _env_float("DNS_HEDGE_DELAY", 0.25)  # before racing the next nameserver
+DNS_CACHE_SIZE = _env_int("DNS_CACHE_SIZE", 20_000)
+DNS_MAX_TTL = _env_float("DNS_MAX_TTL", 3600)
+DNS_NEGATIVE_TTL = _env_float("DNS_NEGATIVE_TTL", 60)  # used when no SOA minimum is given
+
+
+# ── CT Index ──────────────────────────────────────────────────────────────────
+
+CT_INDEX_ENABLED = _env_bool("CT_INDEX_ENABLED", True)
+CT_INDEX_PATH = Path(_env_str("CT_INDEX_PATH", str(DATA_DIR / "ct_index.sqlite3")))
+CT_INDEX_REFRESH = _env_float("CT_INDEX_REFRESH", 6 * 3600)  # min seconds between crt.sh syncs
+
+
+# ── Scan History ──────────────────────────────────────────────────────────────
+
+HISTORY_ENABLED = _env_bool("HISTORY_ENABLED", True)
+HISTORY_PATH = Path(_env_str("HISTORY_PATH", str(DATA_DIR / "history.sqlite3")))
+HISTORY_SNAPSHOT_EVERY = _env_int("HISTORY_SNAPSHOT_EVERY", 10)  # versions per full snapshot
+
+
+# ── Pivot Index ───────────────────────────────────────────────────────────────
+
+PIVOT_INDEX_ENABLED = _env_bool("PIVOT_INDEX_ENABLED", True)
+PIVOT_INDEX_PATH = Path(_env_str("PIVOT_INDEX_PATH", str(DATA_DIR / "pivots.sqlite3")))
+
+
+# ── TLS Inspection ────────────────────────────────────────────────────────────
+
+TLS_PORT = _env_int("TLS_PORT", 443)
+TLS_TIMEOUT = _env_float("TLS_TIMEOUT", 8.0)  # per connection attempt
+TLS_ATTEMPT_DELAY = _env_float("TLS_ATTEMPT_DELAY", 0.25)  # happy-eyeballs stagger
+TLS_PARSED_CACHE_SIZE = _env_int("TLS_PARSED_CACHE_SIZE", 4096)  # certificates by DER fingerprint
+TLS_CA_FILE = _env_str("TLS_CA_FILE", "")  # extra trusted CAs (PEM), e.g. a private CA
+
+
+# ── WHOIS Client ──────────────────────────────────────────────────────────────
+
+WHOIS_PORT = _env_int("WHOIS_PORT", 43)
+WHOIS_TIMEOUT = _env_float("WHOIS_TIMEOUT", 10.0)  # per connection, connect + read
+WHOIS_MAX_RESPONSE = _env_int("WHOIS_MAX_RESPONSE", 1024 * 1024)  # bytes read per query
+WHOIS_IANA_SERVER = _env_str("WHOIS_IANA_SERVER", "whois.iana.org")
+WHOIS_MAX_REFERRALS = _env_int("WHOIS_MAX_REFERRALS", 1)  # registry -> registrar hops
+
+# Explicit TLD -> server entries, e.g. "com=whois.verisign-grs.com,de=whois.denic.de".
+# Any other TLD is discovered from IANA on first use.
+WHOIS_SERVERS: dict[str, str] = dict(
+    item.split("=", 1)
+    for item in _env_str("WHOIS_SERVERS", "").split(",")
+    if "=" in item
+)
+
+# Politeness towards each WHOIS server, shared by every scan in the process
+WHOIS_SERVER_CONCURRENCY = _env_int("WHOIS_SERVER_CONCURRENCY", 2)
+WHOIS_SERVER_RATE = _env_float("WHOIS_SERVER_RATE", 1.0)  # queries per second
+WHOIS_SERVER_BURST = _env_int("WHOIS_SERVER_BURST", 5)
+WHOIS_MAX_WAIT = _env_float("WHOIS_MAX_WAIT", 5.0)  # longest wait for a token before giving up
+WHOIS_THROTTLE_COOLDOWN = _env_float("WHOIS_THROTTLE_COOLDOWN", 60.0)  # after a server refuses us
+
+
+# ── Offline IP → ASN ──────────────────────────────────────────────────────────
+
+# ip2asn / pfx2as TSV (optionally .gz). When unset, ASN data comes from RDAP.
+IP2ASN_PATH = Path(_env_str("IP2ASN_PATH", "")) if _env_str("IP2ASN_PATH", "") else None
+IP2ASN_CHECK_INTERVAL = _env_float("IP2ASN_CHECK_INTERVAL", 60.0)  # seconds between mtime checks
+
+# RDAP IP results reused for every address in the returned netblock
+NETBLOCK_CACHE_SIZE = _env_int("NETBLOCK_CACHE_SIZE", 10_000)
+NETBLOCK_CACHE_TTL = _env_float("NETBLOCK_CACHE_TTL", 24 * 3600)
+
+
+# ── Domain Normalization ──────────────────────────────────────────────────────
+
+# Public Suffix List used to find registrable domains; the bundled copy can
+# be swapped for a fresh download from https://publicsuffix.org/list/
+PSL_PATH = Path(_env_str("PSL_PATH", str(Path(__file__).with_name("data") / "public_suffix_list.dat")))
+
+
+# ── Subdomains ────────────────────────────────────────────────────────────────
+
+SUBDOMAIN_INLINE_LIMIT = _env_int("SUBDOMAIN_INLINE_LIMIT", 100)  # entries embedded in ScanResponse
+SUBDOMAIN_TRIES = _env_int("SUBDOMAIN_TRIES", 64)  # domains whose trie stays in memory
+
+# Live resolution of discovered names (opt-in: also runs when a scan asks
+# for the "resolve" module or the subdomain_resolution section)
+SUBDOMAIN_RESOLVE = _env_bool("SUBDOMAIN_RESOLVE", False)
+SUBDOMAIN_RESOLVE_CONCURRENCY = _env_int("SUBDOMAIN_RESOLVE_CONCURRENCY", 100)  # names in flight
+SUBDOMAIN_RESOLVE_MAX_NAMES = _env_int("SUBDOMAIN_RESOLVE_MAX_NAMES", 5000)  # per scan
+SUBDOMAIN_RESOLVE_TIME = _env_float("SUBDOMAIN_RESOLVE_TIME", 10.0)  # names left after this stay unchecked
+SUBDOMAIN_WILDCARD_PROBES = _env_int("SUBDOMAIN_WILDCARD_PROBES", 2)  # random labels per parent zone
+
+
+# ── Responses ─────────────────────────────────────────────────────────────────
+
+RESPONSE_COMPRESS_MIN_SIZE = _env_int("RESPONSE_COMPRESS_MIN_SIZE", 8 * 1024)  # bytes; 0 disables
+RESPONSE_GZIP_LEVEL = _env_int("RESPONSE_GZIP_LEVEL", 5)
+RESPONSE_BROTLI_QUALITY = _env_int("RESPONSE_BROTLI_QUALITY", 4)  # needs the optional "brotli" package
+
+
+# ── Watchlist ─────────────────────────────────────────────────────────────────
+
+WATCH_ENABLED = _env_bool("WATCH_ENABLED", False)  # run the re-scan scheduler in this process
+WATCH_PATH = Path(_env_str("WATCH_PATH", str(DATA_DIR / "watchlist.sqlite3")))
+WATCH_INTERVAL = _env_float("WATCH_INTERVAL", 24 * 3600)  # re-scan period far from any expiry
+WATCH_MIN_INTERVAL = _env_float("WATCH_MIN_INTERVAL", 3600)  # shortest period, right before expiry
+WATCH_EXPIRY_WINDOW = _env_float("WATCH_EXPIRY_WINDOW", 30 * 24 * 3600)  # tighten the period inside this
+WATCH_JITTER = _env_float("WATCH_JITTER", 0.1)  # ± share of the period, spreads re-scans out
+WATCH_CONCURRENCY = _env_int("WATCH_CONCURRENCY", 4)  # watchlist scans in flight per process
+WATCH_SYNC_INTERVAL = _env_float("WATCH_SYNC_INTERVAL", 60.0)  # reload the schedule from the store
+WATCH_MAX_DOMAINS = _env_int("WATCH_MAX_DOMAINS", 100_000)
+
+# Upstream calls the watchlist may have in flight, on top of (and within)
+# UPSTREAM_CONCURRENCY, so interactive scans always find free slots
+WATCH_UPSTREAM_CONCURRENCY: dict[str, int] = {
+    "dns": _env_int("WATCH_CONCURRENCY_DNS", 16),
+    "whois": _env_int("WATCH_CONCURRENCY_WHOIS", 2),
+    "tls": _env_int("WATCH_CONCURRENCY_TLS", 8),
+    "crt.sh": _env_int("WATCH_CONCURRENCY_CRT_SH", 1),
+    "rdap": _env_int("WATCH_CONCURRENCY_RDAP", 2),
+    "ipinfo": _env_int("WATCH_CONCURRENCY_IPINFO", 2),
+}
+
+
+# ── Rate Limiting ─────────────────────────────────────────────────────────────
+
+RATE_LIMIT_ENABLED = _env_bool("RATE_LIMIT_ENABLED", True)  # per-client limits on scan endpoints
+# memory:// is per process; use sqlite:///path (one host) or redis://host to
+# share counters between uvicorn workers
+RATE_LIMIT_STORAGE_URI = _env_str("RATE_LIMIT_STORAGE_URI", "memory://")
+
+
+# ── Job Queue ─────────────────────────────────────────────────────────────────
+
+JOBS_ENABLED = _env_bool("JOBS_ENABLED", False)  # /scan enqueues; `python -m app.worker` runs scans
+JOBS_URL = _env_str("JOBS_URL", f"sqlite:///{DATA_DIR / 'jobs.sqlite3'}")
+JOBS_WORKER_CONCURRENCY = _env_int("JOBS_WORKER_CONCURRENCY", 16)  # scans per worker process
+JOBS_LEASE = _env_float("JOBS_LEASE", 120)  # running jobs are retried if their worker goes quiet this long
+JOBS_MAX_ATTEMPTS = _env_int("JOBS_MAX_ATTEMPTS", 3)
+JOBS_POLL_INTERVAL = _env_float("JOBS_POLL_INTERVAL", 0.25)
+JOBS_WAIT = _env_float("JOBS_WAIT", 30)  # a waiting /scan returns the job id after this long
+JOBS_RESULT_TTL = _env_float("JOBS_RESULT_TTL", 24 * 3600)  # finished jobs are purged after this
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+METRICS_LOOP_LAG_INTERVAL = _env_float("METRICS_LOOP_LAG_INTERVAL", 0.5)  # seconds between lag probes
@@ -0,0 +1,194 @@
+"""
+CT Index — local SQLite store of crt.sh entries per domain.
+
+Certificates are stored once per (domain, serial) together with every
+in-scope SAN name and the highest crt.sh entry id seen, so repeat lookups
+only write what is new and history queries (sorting, pagination) run in the
+database instead of in Python.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from app import config
+from app.models import CtName, HistoricalCertificate
+
+
+SORT_COLUMNS = {"not_before", "not_after", "issuer", "common_name", "serial_number"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ct_certs (
+    domain TEXT NOT NULL,
+    serial_number TEXT NOT NULL,
+    cert_id INTEGER,
+    issuer TEXT,
+    common_name TEXT,
+    not_before TEXT,
+    not_after TEXT,
+    san_entries TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (domain, serial_number)
+);
+CREATE INDEX IF NOT EXISTS ct_certs_not_before ON ct_certs (domain, not_before DESC);
+CREATE TABLE IF NOT EXISTS ct_names (
+    domain TEXT NOT NULL,
+    name TEXT NOT NULL,
+    first_seen TEXT,
+    last_seen TEXT,
+    PRIMARY KEY (domain, name)
+);
+CREATE TABLE IF NOT EXISTS ct_sync (
+    domain TEXT PRIMARY KEY,
+    max_cert_id INTEGER NOT NULL DEFAULT 0,
+    synced_at REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class SyncState:
+    max_cert_id: int
+    synced_at: float
+
+
+class CtIndex:
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    # ── Sync bookkeeping ─────────────────────────────────────────────────────
+
+    def sync_state(self, domain: str) -> Optional[SyncState]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT max_cert_id, synced_at FROM ct_sync WHERE domain = ?", (domain,)
+            ).fetchone()
+        return SyncState(*row) if row else None
+
+    def mark_synced(self, domain: str, max_cert_id: int) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO ct_sync (domain, max_cert_id, synced_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(domain) DO UPDATE SET "
+                " max_cert_id = max(max_cert_id, excluded.max_cert_id),"
+                " synced_at = excluded.synced_at",
+                (domain, max_cert_id, time.time()),
+            )
+            conn.commit()
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+
+    def add_entries(
+        self,
+        domain: str,
+        certs: list[tuple],
+        names: list[tuple[str, Optional[str]]],
+    ) -> None:
+        """
+        Store a batch of parsed crt.sh entries.
+
+        ``certs`` rows are (serial, cert_id, issuer, common_name, not_before,
+        not_after, san_entries); ``names`` rows are (name, not_before).
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT INTO ct_certs (domain, serial_number, cert_id, issuer, common_name,"
+                " not_before, not_after, san_entries) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(domain, serial_number) DO UPDATE SET"
+                " cert_id = max(coalesce(cert_id, 0), coalesce(excluded.cert_id, 0))",
+                [(domain, *row) for row in certs],
+            )
+            conn.executemany(
+                "INSERT INTO ct_names (domain, name, first_seen, last_seen) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(domain, name) DO UPDATE SET"
+                # Multi-argument min/max return NULL if any argument is NULL, so an
+                # undated entry must not overwrite a known date
+                " first_seen = min(coalesce(first_seen, excluded.first_seen),"
+                " coalesce(excluded.first_seen, first_seen)),"
+                " last_seen = max(coalesce(last_seen, excluded.last_seen),"
+                " coalesce(excluded.last_seen, last_seen))",
+                [(domain, name, seen, seen) for name, seen in names],
+            )
+            conn.commit()
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def count_certificates(self, domain: str) -> int:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT count(*) FROM ct_certs WHERE domain = ?", (domain,)
+            ).fetchone()
+        return row[0]
+
+    def certificates(
+        self,
+        domain: str,
+        offset: int = 0,
+        limit: int = 50,
+        sort: str = "not_before",
+        descending: bool = True,
+    ) -> list[HistoricalCertificate]:
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort certificates by '{sort}'")
+        order = "DESC" if descending else "ASC"
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT issuer, common_name, serial_number, not_before, not_after, san_entries"
+                f" FROM ct_certs WHERE domain = ? ORDER BY {sort} {order}, serial_number {order}"
+                " LIMIT ? OFFSET ?",
+                (domain, limit, offset),
+            ).fetchall()
+        return [
+            HistoricalCertificate(
+                issuer=issuer,
+                common_name=common_name,
+                serial_number=serial,
+                not_before=not_before,
+                not_after=not_after,
+                san_entries=san.split("\n") if san else [],
+            )
+            for issuer, common_name, serial, not_before, not_after, san in rows
+        ]
+
+    def names(self, domain: str) -> list[CtName]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT name, first_seen, last_seen FROM ct_names WHERE domain = ? ORDER BY name",
+                (domain,),
+            ).fetchall()
+        return [CtName(name=name, first_seen=first, last_seen=last) for name, first, last in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_index: Optional[CtIndex] = None
+
+
+def get_ct_index() -> CtIndex:
+    """Return the process-wide CT index, creating it on first use."""
+    global _index
+    if _index is None:
+        _index = CtIndex(config.CT_INDEX_PATH)
+    return _index
@@ -0,0 +1,63 @@
+"""
+Adaptive Module Deadlines — timeouts derived from observed latency.
+
+Each upstream module keeps a window of its recent successful call
+durations. Its deadline is the ``MODULE_DEADLINE_PERCENTILE`` of that
+window times ``MODULE_DEADLINE_FACTOR``, kept between
+``MODULE_DEADLINE_MIN`` and ``MODULE_DEADLINE_MAX``: a module that
+normally answers in 300 ms gives up after a couple of seconds rather than
+the worst-case cap, while slow-but-healthy sources keep the time they
+need. Until a module has ``MODULE_LATENCY_MIN_SAMPLES`` samples it gets
+the cap. A call that times out counts as taking its whole deadline, so a
+source that has slowed down pushes its deadline back up instead of timing
+out forever.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+
+from app import config
+
+
+RECOMPUTE_EVERY = 8  # samples between deadline updates (each one sorts the window)
+
+
+class ModuleDeadlines:
+    def __init__(self):
+        self._samples: dict[str, deque[float]] = {}
+        self._fresh: dict[str, int] = {}  # samples since the deadline was last computed
+        self._deadlines: dict[str, float] = {}
+
+    def observe(self, module: str, seconds: float) -> None:
+        """Record a call's duration (its deadline, if it timed out)."""
+        window = self._samples.get(module)
+        if window is None:
+            window = self._samples[module] = deque(maxlen=config.MODULE_LATENCY_WINDOW)
+        window.append(seconds)
+        self._fresh[module] = self._fresh.get(module, 0) + 1
+        if len(window) >= config.MODULE_LATENCY_MIN_SAMPLES and self._fresh[module] >= RECOMPUTE_EVERY:
+            self._fresh[module] = 0
+            self._deadlines[module] = self._compute(window)
+
+    def deadline(self, module: str) -> float:
+        return self._deadlines.get(module, config.MODULE_DEADLINE_MAX)
+
+    @staticmethod
+    def _compute(window: deque[float]) -> float:
+        ordered = sorted(window)
+        rank = min(len(ordered) - 1, int(len(ordered) * config.MODULE_DEADLINE_PERCENTILE / 100))
+        target = ordered[rank] * config.MODULE_DEADLINE_FACTOR
+        return min(config.MODULE_DEADLINE_MAX, max(config.MODULE_DEADLINE_MIN, target))
+
+    def stats(self) -> dict:
+        return {
+            module: {
+                "samples": len(window),
+                "deadline_seconds": round(self.deadline(module), 2),
+            }
+            for module, window in self._samples.items()
+        }
+
+
+module_deadlines = ModuleDeadlines()
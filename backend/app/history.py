@@ -0,0 +1,306 @@
+"""
+Scan History — append-only store of scan results per domain.
+
+Only distinct results are stored. A scan is compared section by section
+(by digest) with the latest stored version of its domain: if nothing
+changed, that version's ``last_seen`` and scan count are bumped; otherwise
+a new version is appended holding just the changed sections. Every
+``HISTORY_SNAPSHOT_EVERY`` versions the full state is written instead, so
+rebuilding any version reads one snapshot plus at most that many deltas.
+Storage grows with how often a domain changes, not with how often it is
+scanned.
+
+Sections of modules that failed (or whose inputs failed) are left out of a
+scan's record and carry their previous value forward, so an upstream
+outage does not show up as every subdomain disappearing.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+from app import config
+from app.models import CertificateInfo, CertificateRotation, FieldChange, HistoryVersion, ScanDiff, ValueChange
+from app.subdomain_trie import SubdomainTrie
+
+
+# ScanResponse sections kept in history; subdomains are stored as the full
+# name list rather than the inline page
+SECTIONS = ("overview", "certificates", "dns_records", "whois", "asn_info", "subdomains")
+
+# Sections whose changed fields are listed one by one in a diff
+FIELD_SECTIONS = ("overview", "certificates", "whois", "asn_info")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_versions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    domain TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    scans INTEGER NOT NULL DEFAULT 1,
+    snapshot INTEGER NOT NULL,
+    changed TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_versions_domain ON history_versions (domain, id);
+CREATE TABLE IF NOT EXISTS history_heads (
+    domain TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    since_snapshot INTEGER NOT NULL,
+    digests TEXT NOT NULL
+);
+"""
+
+
+def canonical(value: Any) -> Any:
+    """Order-insensitive form of a section: lists of plain values are sorted."""
+    if isinstance(value, dict):
+        return {key: canonical(item) for key, item in value.items()}
+    if isinstance(value, list):
+        items = [canonical(item) for item in value]
+        if all(isinstance(item, (str, int, float)) for item in items):
+            return sorted(items, key=str)
+        return items
+    return value
+
+
+def section_value(value: Any) -> Any:
+    """JSON-ready, canonical form of a module result."""
+    if isinstance(value, SubdomainTrie):
+        return sorted(value.names())
+    if isinstance(value, BaseModel):
+        value = value.model_dump(mode="json")
+    elif isinstance(value, list):
+        value = [item.model_dump(mode="json") if isinstance(item, BaseModel) else item for item in value]
+    return canonical(value)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def _version(row: tuple) -> HistoryVersion:
+    version, first_seen, last_seen, scans, snapshot, changed = row
+    return HistoryVersion(
+        version=version,
+        first_seen=_iso(first_seen),
+        last_seen=_iso(last_seen),
+        scans=scans,
+        snapshot=bool(snapshot),
+        changed=changed.split(",") if changed else [],
+    )
+
+
+_VERSION_COLUMNS = "id, first_seen, last_seen, scans, snapshot, changed"
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+
+class HistoryStore:
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def record(self, domain: str, scanned_at: float, sections: dict[str, Any]) -> Optional[int]:
+        """
+        Record one scan's ``sections`` (module results by section name).
+
+        Returns the version the scan belongs to, or None if it carried no
+        sections to record.
+        """
+        values = {section: section_value(value) for section, value in sections.items() if section in SECTIONS}
+        if not values:
+            return None
+        digests = {section: hashlib.sha256(_dumps(value).encode()).hexdigest() for section, value in values.items()}
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")  # other workers record the same domain
+                head = conn.execute(
+                    "SELECT version, since_snapshot, digests FROM history_heads WHERE domain = ?", (domain,)
+                ).fetchone()
+                previous = json.loads(head[2]) if head else {}
+                changed = [section for section in SECTIONS if section in digests and previous.get(section) != digests[section]]
+
+                if head and not changed:
+                    conn.execute(
+                        "UPDATE history_versions SET last_seen = max(last_seen, ?), scans = scans + 1 WHERE id = ?",
+                        (scanned_at, head[0]),
+                    )
+                    return head[0]
+
+                snapshot = head is None or head[1] + 1 >= config.HISTORY_SNAPSHOT_EVERY
+                if snapshot:
+                    data = self._state(conn, domain, head[0]) if head else {}
+                    data.update({section: values[section] for section in changed})
+                else:
+                    data = {section: values[section] for section in changed}
+                version = conn.execute(
+                    "INSERT INTO history_versions (domain, first_seen, last_seen, snapshot, changed, data)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (domain, scanned_at, scanned_at, snapshot, ",".join(changed), zlib.compress(_dumps(data).encode())),
+                ).lastrowid
+                conn.execute(
+                    "INSERT OR REPLACE INTO history_heads (domain, version, since_snapshot, digests) VALUES (?, ?, ?, ?)",
+                    (domain, version, 0 if snapshot else head[1] + 1, json.dumps({**previous, **digests})),
+                )
+        return version
+
+    def _state(self, conn: sqlite3.Connection, domain: str, version: int) -> dict[str, Any]:
+        """Sections as of ``version``: its latest snapshot with the deltas after it applied."""
+        start = conn.execute(
+            "SELECT max(id) FROM history_versions WHERE domain = ? AND id <= ? AND snapshot = 1",
+            (domain, version),
+        ).fetchone()[0]
+        state: dict[str, Any] = {}
+        rows = conn.execute(
+            "SELECT data FROM history_versions WHERE domain = ? AND id BETWEEN ? AND ? ORDER BY id",
+            (domain, start, version),
+        )
+        for (data,) in rows:
+            state.update(json.loads(zlib.decompress(data)))
+        return state
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def count(self, domain: str) -> int:
+        with self._lock:
+            return self._connect().execute(
+                "SELECT count(*) FROM history_versions WHERE domain = ?", (domain,)
+            ).fetchone()[0]
+
+    def versions(self, domain: str, offset: int, limit: int) -> list[HistoryVersion]:
+        """Versions of ``domain``, newest first."""
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {_VERSION_COLUMNS} FROM history_versions WHERE domain = ?"
+                " ORDER BY id DESC LIMIT ? OFFSET ?",
+                (domain, limit, offset),
+            ).fetchall()
+        return [_version(row) for row in rows]
+
+    def version_at(self, domain: str, at: Optional[float] = None) -> Optional[HistoryVersion]:
+        """The version current at time ``at`` (the latest one when omitted)."""
+        query = f"SELECT {_VERSION_COLUMNS} FROM history_versions WHERE domain = ?"
+        params: tuple = (domain,)
+        if at is not None:
+            query += " AND first_seen <= ?"
+            params += (at,)
+        with self._lock:
+            row = self._connect().execute(query + " ORDER BY id DESC LIMIT 1", params).fetchone()
+        return _version(row) if row else None
+
+    def previous(self, domain: str, version: int) -> Optional[HistoryVersion]:
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT {_VERSION_COLUMNS} FROM history_versions WHERE domain = ? AND id < ?"
+                " ORDER BY id DESC LIMIT 1",
+                (domain, version),
+            ).fetchone()
+        return _version(row) if row else None
+
+    def state(self, domain: str, version: int) -> dict[str, Any]:
+        with self._lock:
+            return self._state(self._connect(), domain, version)
+
+    def diff(self, domain: str, before: HistoryVersion, after: HistoryVersion) -> ScanDiff:
+        with self._lock:
+            conn = self._connect()
+            old = self._state(conn, domain, before.version)
+            new = self._state(conn, domain, after.version)
+        return diff_states(domain, before, after, old, new)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# ── Diff ──────────────────────────────────────────────────────────────────────
+
+def _value_change(old: list, new: list) -> ValueChange:
+    old_set, new_set = set(map(str, old)), set(map(str, new))
+    return ValueChange(added=sorted(new_set - old_set), removed=sorted(old_set - new_set))
+
+
+def diff_states(
+    domain: str,
+    before: HistoryVersion,
+    after: HistoryVersion,
+    old: dict[str, Any],
+    new: dict[str, Any],
+) -> ScanDiff:
+    """What changed between two stored states of ``domain``."""
+    old_dns, new_dns = old.get("dns_records") or {}, new.get("dns_records") or {}
+    dns_records = {}
+    for rtype in sorted(set(old_dns) | set(new_dns)):
+        change = _value_change(old_dns.get(rtype) or [], new_dns.get(rtype) or [])
+        if change.added or change.removed:
+            dns_records[rtype] = change
+
+    old_cert, new_cert = old.get("certificates"), new.get("certificates")
+    certificate = None
+    if (old_cert or {}).get("serial_number") != (new_cert or {}).get("serial_number"):
+        certificate = CertificateRotation(
+            before=CertificateInfo.model_validate(old_cert) if old_cert else None,
+            after=CertificateInfo.model_validate(new_cert) if new_cert else None,
+        )
+
+    fields = []
+    for section in FIELD_SECTIONS:
+        if section == "certificates" and certificate is not None:
+            continue  # a new certificate differs in every field
+        old_section, new_section = old.get(section) or {}, new.get(section) or {}
+        for field in sorted(set(old_section) | set(new_section)):
+            if old_section.get(field) != new_section.get(field):
+                fields.append(FieldChange(
+                    section=section, field=field,
+                    before=old_section.get(field), after=new_section.get(field),
+                ))
+
+    return ScanDiff(
+        domain=domain,
+        before=before,
+        after=after,
+        subdomains=_value_change(old.get("subdomains") or [], new.get("subdomains") or []),
+        dns_records=dns_records,
+        certificate=certificate,
+        fields=fields,
+    )
+
+
+_store: Optional[HistoryStore] = None
+
+
+def get_history_store() -> HistoryStore:
+    """Return the process-wide history store, creating it on first use."""
+    global _store
+    if _store is None:
+        _store = HistoryStore(config.HISTORY_PATH)
+    return _store
@@ -0,0 +1,101 @@
+"""
+Upstream HTTP Pools — one long-lived ``httpx.AsyncClient`` per upstream host.
+
+Clients are opened in the FastAPI lifespan and handed to the modules, so
+scans reuse keep-alive connections instead of paying a fresh TCP + TLS
+handshake per request. Every request passes the circuit breaker of the
+host it goes to (RDAP redirects each get their own), so a failing host is
+refused at once instead of costing every scan a timeout.
+"""
+
+from __future__ import annotations
+
+import httpx
+
+from app import config
+from app.breakers import get_breaker
+
+
+UPSTREAMS = ("crt.sh", "rdap", "ipinfo")
+
+# Upstreams that answer with redirects to the authoritative registry
+_FOLLOW_REDIRECTS = {"rdap"}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _outage(response: httpx.Response) -> bool:
+    return response.status_code >= 500 or response.status_code == 429
+
+
+class _BreakerTransport(httpx.AsyncBaseTransport):
+    """Route requests through their host's breaker: 5xx, 429 and transport errors count as failures."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = request.url
+        breaker = get_breaker(f"{url.host}:{url.port}" if url.port else url.host)
+        with breaker.guard() as attempt:
+            response = await self._transport.handle_async_request(request)
+            if _outage(response):
+                attempt.failed()
+            return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    timeout = config.HTTP_TIMEOUTS[name]
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        http2=config.HTTP2_ENABLED and _http2_available(),
+    )
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(timeout, connect=min(config.HTTP_CONNECT_TIMEOUT, timeout)),
+        transport=_BreakerTransport(transport),
+        follow_redirects=name in _FOLLOW_REDIRECTS,
+    )
+
+
+class HttpClients:
+    """Registry of pooled clients keyed by upstream name."""
+
+    def __init__(self):
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def start(self) -> None:
+        for name in UPSTREAMS:
+            if name not in self._clients:
+                self._clients[name] = _build_client(name)
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Return the client for ``name``, creating it lazily outside the app lifespan."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = _build_client(name)
+        return client
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+http_clients = HttpClients()
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    return http_clients.get(name)
@@ -0,0 +1,253 @@
+"""
+Offline IP → ASN Table — prefix dataset loaded into sorted arrays.
+
+Reads an ip2asn-style TSV (``range_start  range_end  AS_number  country
+AS_description``, as published by iptoasn.com) or a CAIDA pfx2as file
+(``prefix  length  AS_number``), optionally gzipped. Ranges are flattened
+into disjoint intervals (the most specific prefix wins) and stored as
+parallel sorted arrays per address family, so a lookup is one bisect.
+
+The file is re-read in a worker thread when its mtime changes, checked at
+most every ``IP2ASN_CHECK_INTERVAL`` seconds; lookups keep using the old
+table until the new one is ready.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import ipaddress
+import time
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+from app import config
+
+
+@dataclass(frozen=True)
+class AsnRecord:
+    asn: int
+    network: str  # CIDR, or "first - last" when the range is not a single prefix
+    country: Optional[str] = None
+    description: Optional[str] = None
+
+
+# ── Loading ───────────────────────────────────────────────────────────────────
+
+# (start, end, asn, meta index) with meta = (country, description)
+_Range = tuple[int, int, int, int]
+
+
+def _open(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return path.open("r", encoding="utf-8", errors="replace")
+
+
+def _parse_rows(path: Path, metas: dict[tuple, int]) -> Iterator[tuple[int, _Range]]:
+    """Yield ``(ip_version, range)`` for every usable row in the dataset."""
+    with _open(path) as fh:
+        for line in fh:
+            if not line.strip() or line.startswith("#"):
+                continue
+            cols = line.rstrip("\n").split("\t")
+            try:
+                if len(cols) >= 3 and cols[1].isdigit():
+                    # pfx2as: prefix, length, asn ("701_702" / "701,702" for MOAS)
+                    net = ipaddress.ip_network(f"{cols[0]}/{cols[1]}", strict=False)
+                    first, last = net[0], net[-1]
+                    asn = int(cols[2].replace(",", "_").split("_")[0])
+                    meta = (None, None)
+                elif len(cols) >= 3:
+                    # ip2asn: first, last, asn, country, description
+                    first = ipaddress.ip_address(cols[0])
+                    last = ipaddress.ip_address(cols[1])
+                    asn = int(cols[2])
+                    country = cols[3].strip() if len(cols) > 3 else ""
+                    description = cols[4].strip() if len(cols) > 4 else ""
+                    meta = (
+                        country if country not in ("", "None") else None,
+                        description if description not in ("", "Not routed") else None,
+                    )
+                else:
+                    continue
+            except ValueError:
+                continue
+            if asn == 0 or first.version != last.version:
+                continue  # unrouted space
+            index = metas.setdefault(meta, len(metas))
+            yield first.version, (int(first), int(last), asn, index)
+
+
+def _flatten(ranges: list[_Range]) -> list[tuple[int, int, _Range]]:
+    """
+    Split possibly nested ranges into disjoint ``(first, last, origin)``
+    pieces, where the innermost (most specific) origin range wins.
+    """
+    ranges.sort(key=lambda r: (r[0], -r[1]))
+    out: list[tuple[int, int, _Range]] = []
+    stack: list[_Range] = []
+    cursor = 0
+
+    def emit(first: int, last: int, r: _Range) -> None:
+        if first <= last:
+            out.append((first, last, r))
+
+    for r in ranges:
+        while stack and stack[-1][1] < r[0]:
+            top = stack.pop()
+            emit(cursor, top[1], top)
+            cursor = max(cursor, top[1] + 1)
+        if stack:
+            emit(cursor, r[0] - 1, stack[-1])
+        stack.append(r)
+        cursor = r[0]
+    while stack:
+        top = stack.pop()
+        emit(cursor, top[1], top)
+        cursor = max(cursor, top[1] + 1)
+    return out
+
+
+class _Family:
+    """Disjoint ranges of one address family as parallel sorted arrays."""
+
+    def __init__(self, ranges: list[_Range], typecode: Optional[str]):
+        pieces = _flatten(ranges)
+
+        def column(values):
+            # IPv6 addresses do not fit a fixed-width array, so they stay Python ints
+            return array(typecode, values) if typecode else list(values)
+
+        self.starts = column(p[0] for p in pieces)
+        self.ends = column(p[1] for p in pieces)
+        # The announced range each piece came from, reported as the netblock
+        self.net_starts = column(p[2][0] for p in pieces)
+        self.net_ends = column(p[2][1] for p in pieces)
+        self.asns = array("I", (p[2][2] for p in pieces))
+        self.metas = array("I", (p[2][3] for p in pieces))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def find(self, value: int) -> Optional[int]:
+        i = bisect_right(self.starts, value) - 1
+        if i >= 0 and value <= self.ends[i]:
+            return i
+        return None
+
+
+class _Snapshot:
+    def __init__(self, path: Path):
+        metas: dict[tuple, int] = {}
+        v4: list[_Range] = []
+        v6: list[_Range] = []
+        for version, r in _parse_rows(path, metas):
+            (v4 if version == 4 else v6).append(r)
+        self.v4 = _Family(v4, "I")
+        self.v6 = _Family(v6, None)
+        self.metas = list(metas)
+
+
+def _network(first: int, last: int, version: int) -> str:
+    cls = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+    nets = list(ipaddress.summarize_address_range(cls(first), cls(last)))
+    if len(nets) == 1:
+        return str(nets[0])
+    return f"{cls(first)} - {cls(last)}"
+
+
+# ── Table ─────────────────────────────────────────────────────────────────────
+
+class AsnTable:
+    """The loaded dataset plus the bookkeeping for hot reload."""
+
+    def __init__(self, path: Path, check_interval: float = 60.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot: Optional[_Snapshot] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._loading: Optional[asyncio.Task] = None
+        self.loaded_at: Optional[float] = None
+        self.lookups = 0
+        self.hits = 0
+
+    async def refresh(self) -> None:
+        """Load the dataset if it is new or changed on disk; cheap when it is not."""
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return  # keep the last good table if the file is briefly missing
+        if mtime == self._mtime:
+            return
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load(mtime))
+            self._loading.add_done_callback(self._loaded)
+        if self._snapshot is None:
+            # Nothing to serve yet: wait for the first load
+            await asyncio.shield(self._loading)
+
+    def _loaded(self, task: asyncio.Task) -> None:
+        self._loading = None
+        if not task.cancelled():
+            task.exception()  # a failed reload keeps the previous table; retried on the next check
+
+    async def _load(self, mtime: float) -> None:
+        snapshot = await asyncio.to_thread(_Snapshot, self.path)
+        self._snapshot, self._mtime, self.loaded_at = snapshot, mtime, time.time()
+
+    def lookup(self, ip: str) -> Optional[AsnRecord]:
+        """Return the most specific range containing ``ip``, or None."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        try:
+            addr = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        self.lookups += 1
+        family = snapshot.v4 if addr.version == 4 else snapshot.v6
+        i = family.find(int(addr))
+        if i is None:
+            return None
+        self.hits += 1
+        country, description = snapshot.metas[family.metas[i]]
+        return AsnRecord(
+            asn=family.asns[i],
+            network=_network(family.net_starts[i], family.net_ends[i], addr.version),
+            country=country,
+            description=description,
+        )
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "path": str(self.path),
+            "loaded": snapshot is not None,
+            "loaded_at": self.loaded_at,
+            "ranges_v4": len(snapshot.v4) if snapshot else 0,
+            "ranges_v6": len(snapshot.v6) if snapshot else 0,
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
+
+
+_table: Optional[AsnTable] = None
+
+
+def get_asn_table() -> Optional[AsnTable]:
+    """Return the process-wide table, or None when no dataset is configured."""
+    global _table
+    if config.IP2ASN_PATH is None:
+        return None
+    if _table is None:
+        _table = AsnTable(config.IP2ASN_PATH, config.IP2ASN_CHECK_INTERVAL)
+    return _table
@@ -0,0 +1,327 @@
+"""
+Job Queue — scans queued by the API and run by worker processes.
+
+With ``OPENSCOPE_JOBS_ENABLED`` the API only enqueues scans; any number of
+``python -m app.worker`` processes (on this host or others sharing the
+backend) claim them, run ``run_scan`` and store the serialized response
+with the job. Clients wait on ``/scan``, poll ``/jobs/{id}`` or subscribe
+to ``/jobs/{id}/events``.
+
+A claimed job carries a lease that its worker keeps extending while the
+scan runs. A job whose worker stopped renewing it is claimed again, up to
+``JOBS_MAX_ATTEMPTS`` times, so a crashed worker delays its scans rather
+than losing them.
+
+Backends implement ``JobQueue`` and are picked by the scheme of
+``OPENSCOPE_JOBS_URL``. The bundled ``sqlite:///path`` backend serves
+every API and worker process on one host.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from pydantic_core import to_json
+
+from app import config
+from app.models import JobStatus
+from app.rate_limit_storage import sqlite_path
+
+
+STATUSES = ("queued", "running", "done", "failed")
+
+
+@dataclass
+class Job:
+    id: str
+    domain: str
+    modules: Optional[list[str]]
+    fields: Optional[list[str]]
+    status: str = "queued"  # queued | running | done | failed
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    worker: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+class JobQueue(ABC):
+    """Storage for queued scans and their results, shared by the API and workers."""
+
+    @abstractmethod
+    def enqueue(self, domain: str, modules: Optional[list[str]], fields: Optional[list[str]]) -> Job: ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]: ...
+
+    @abstractmethod
+    def result(self, job_id: str) -> Optional[bytes]:
+        """The finished job's ScanResponse JSON."""
+
+    @abstractmethod
+    def claim(self, worker: str, limit: int) -> list[Job]:
+        """Lease up to ``limit`` queued (or abandoned) jobs to ``worker``, oldest first."""
+
+    @abstractmethod
+    def renew(self, worker: str, job_ids: list[str]) -> None:
+        """Extend the leases ``worker`` holds on ``job_ids``."""
+
+    @abstractmethod
+    def complete(self, worker: str, job_id: str, result: bytes) -> None: ...
+
+    @abstractmethod
+    def fail(self, worker: str, job_id: str, error: str) -> None:
+        """Record a failed attempt; the job is queued again until it runs out of attempts."""
+
+    @abstractmethod
+    def purge(self, before: float) -> int:
+        """Delete jobs that finished before ``before``."""
+
+    @abstractmethod
+    def stats(self) -> dict: ...
+
+    def close(self) -> None:
+        pass
+
+
+# ── SQLite backend ────────────────────────────────────────────────────────────
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    domain TEXT NOT NULL,
+    modules TEXT,
+    fields TEXT,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    error TEXT,
+    result BLOB
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+"""
+
+_JOB_COLUMNS = "id, domain, modules, fields, status, created_at, started_at, finished_at, attempts, worker, error"
+
+
+def _job(row: tuple) -> Job:
+    job_id, domain, modules, fields, *rest = row
+    return Job(job_id, domain, json.loads(modules), json.loads(fields), *rest)
+
+
+class SqliteJobQueue(JobQueue):
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def enqueue(self, domain: str, modules: Optional[list[str]], fields: Optional[list[str]]) -> Job:
+        job = Job(uuid.uuid4().hex, domain, modules, fields, created_at=time.time())
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO jobs (id, domain, modules, fields, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (job.id, domain, json.dumps(modules), json.dumps(fields), job.status, job.created_at),
+                )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._connect().execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    def result(self, job_id: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT result FROM jobs WHERE id = ? AND status = 'done'", (job_id,)
+            ).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    def claim(self, worker: str, limit: int) -> list[Job]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, error = coalesce(error, 'Worker stopped responding')"
+                    " WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, config.JOBS_MAX_ATTEMPTS),
+                )
+                ids = [row[0] for row in conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' OR (status = 'running' AND lease_until < ?)"
+                    " ORDER BY created_at LIMIT ?",
+                    (now, limit),
+                )]
+                if not ids:
+                    return []
+                marks = ",".join("?" * len(ids))
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, lease_until = ?,"
+                    f" attempts = attempts + 1 WHERE id IN ({marks})",
+                    (worker, now, now + config.JOBS_LEASE, *ids),
+                )
+                rows = conn.execute(
+                    f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id IN ({marks}) ORDER BY created_at", ids
+                ).fetchall()
+        return [_job(row) for row in rows]
+
+    def renew(self, worker: str, job_ids: list[str]) -> None:
+        if not job_ids:
+            return
+        marks = ",".join("?" * len(job_ids))
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    f"UPDATE jobs SET lease_until = ? WHERE worker = ? AND status = 'running' AND id IN ({marks})",
+                    (time.time() + config.JOBS_LEASE, worker, *job_ids),
+                )
+
+    def complete(self, worker: str, job_id: str, result: bytes) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET status = 'done', finished_at = ?, error = NULL, result = ?"
+                    " WHERE id = ? AND worker = ? AND status = 'running'",
+                    (time.time(), zlib.compress(result), job_id, worker),
+                )
+
+    def fail(self, worker: str, job_id: str, error: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET error = ?,"
+                    " status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,"
+                    " finished_at = CASE WHEN attempts >= ? THEN ? END"
+                    " WHERE id = ? AND worker = ? AND status = 'running'",
+                    (error, config.JOBS_MAX_ATTEMPTS, config.JOBS_MAX_ATTEMPTS, time.time(), job_id, worker),
+                )
+
+    def purge(self, before: float) -> int:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute("DELETE FROM jobs WHERE finished_at < ?", (before,)).rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._connect().execute("SELECT status, count(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in STATUSES}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Backends by JOBS_URL scheme
+BACKENDS = {
+    "sqlite": lambda url: SqliteJobQueue(sqlite_path(url)),
+}
+
+
+def open_job_queue(url: str) -> JobQueue:
+    scheme = url.partition(":")[0]
+    if scheme not in BACKENDS:
+        raise ValueError(f"Unsupported job queue backend {scheme!r} (known: {', '.join(BACKENDS)})")
+    return BACKENDS[scheme](url)
+
+
+# ── Waiting ───────────────────────────────────────────────────────────────────
+
+async def wait_for_job(queue: JobQueue, job_id: str, timeout: float) -> Optional[Job]:
+    """Poll until the job finishes or ``timeout`` passes; returns its latest state."""
+    deadline = time.monotonic() + timeout
+    while True:
+        job = await asyncio.to_thread(queue.get, job_id)
+        if job is None or job.finished or time.monotonic() >= deadline:
+            return job
+        await asyncio.sleep(config.JOBS_POLL_INTERVAL)
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+
+
+def job_status(job: Job) -> JobStatus:
+    return JobStatus(
+        job_id=job.id,
+        status=job.status,
+        domain=job.domain,
+        created_at=_iso(job.created_at),
+        started_at=_iso(job.started_at),
+        finished_at=_iso(job.finished_at),
+        attempts=job.attempts,
+        error=job.error,
+    )
+
+
+async def job_event_stream(queue: JobQueue, job_id: str) -> AsyncIterator[bytes]:
+    """
+    Yield SSE frames for a job: ``status`` whenever its state changes,
+    then ``result`` with the ScanResponse or ``failed``.
+    """
+    last = None
+    while True:
+        job = await asyncio.to_thread(queue.get, job_id)
+        if job is None:
+            yield b"event: failed\ndata: " + to_json({"detail": "Job not found"}) + b"\n\n"
+            return
+        info = job_status(job)
+        if info != last:
+            yield b"event: status\ndata: " + to_json(info) + b"\n\n"
+            last = info
+        if job.status == "done":
+            yield b"event: result\ndata: " + (await asyncio.to_thread(queue.result, job_id) or b"null") + b"\n\n"
+            return
+        if job.status == "failed":
+            yield b"event: failed\ndata: " + to_json({"detail": job.error}) + b"\n\n"
+            return
+        await asyncio.sleep(config.JOBS_POLL_INTERVAL)
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue for ``JOBS_URL``, opening it on first use."""
+    global _queue
+    if _queue is None:
+        _queue = open_job_queue(config.JOBS_URL)
+    return _queue
@@ -0,0 +1,71 @@
+"""
+Upstream Concurrency Limits — caps simultaneous calls to each upstream.
+
+Shared by every scan in the process, so a large batch cannot open more
+than ``UPSTREAM_CONCURRENCY[name]`` parallel requests to, say, crt.sh.
+
+Background work (the watchlist) runs inside an ``upstream_pool`` and also
+takes a slot from that pool's smaller per-upstream limits, so it can never
+occupy an upstream's whole budget and starve interactive scans.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from app import config
+
+
+_semaphores: dict[str, asyncio.Semaphore] = {}
+
+# Per-upstream limits of each named pool
+POOL_LIMITS: dict[str, dict[str, int]] = {
+    "watchlist": config.WATCH_UPSTREAM_CONCURRENCY,
+}
+
+_pool: ContextVar[Optional[str]] = ContextVar("upstream_pool", default=None)
+_pool_semaphores: dict[tuple[str, str], asyncio.Semaphore] = {}
+
+
+def _semaphore(upstream: str) -> asyncio.Semaphore:
+    sem = _semaphores.get(upstream)
+    if sem is None:
+        sem = _semaphores[upstream] = asyncio.Semaphore(
+            config.UPSTREAM_CONCURRENCY.get(upstream, 16)
+        )
+    return sem
+
+
+def _pool_semaphore(pool: str, upstream: str) -> asyncio.Semaphore:
+    sem = _pool_semaphores.get((pool, upstream))
+    if sem is None:
+        sem = _pool_semaphores[(pool, upstream)] = asyncio.Semaphore(
+            POOL_LIMITS[pool].get(upstream, 1)
+        )
+    return sem
+
+
+@contextmanager
+def upstream_pool(pool: str) -> Iterator[None]:
+    """Count upstream calls made in this block (and tasks it starts) against ``pool``."""
+    token = _pool.set(pool)
+    try:
+        yield
+    finally:
+        _pool.reset(token)
+
+
+@asynccontextmanager
+async def upstream_slot(upstream: str):
+    """Hold one concurrency slot for ``upstream`` for the duration of the block."""
+    pool = _pool.get()
+    if pool is None:
+        async with _semaphore(upstream):
+            yield
+        return
+    async with _pool_semaphore(pool, upstream):
+        async with _semaphore(upstream):
+            yield
@@ -7,20 +7,82 @@ publicly available metadata through legal passive sources only.
 
 from __future__ import annotations
 
-from fastapi import FastAPI, Request
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from tempfile import SpooledTemporaryFile
+
+from fastapi import FastAPI, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
-from app.models import ScanRequest, ScanResponse
-from app.scanner import run_scan
+from app import config
+from app.batch import iter_domain_lines, run_batch, run_normalize
+from app.breakers import breaker_stats
+from app.cache import get_cache
+from app.ct_index import get_ct_index
+from app.deadlines import module_deadlines
+from app.history import get_history_store
+from app.http_clients import http_clients
+from app.jobs import get_job_queue, job_event_stream, job_status, wait_for_job
+from app.ip2asn import get_asn_table
+from app.metrics import start_loop_monitor
+from app.models import (
+    CertificatePage, DomainPivots, HistoryPage, JobStatus, PivotPage, ScanDiff, ScanRequest, ScanResponse,
+    SubdomainPage, WatchChange, WatchExpiration, WatchlistPage, WatchRequest,
+)
+from app.modules.subdomain_resolve import STATUSES as RESOLUTION_STATUSES
+from app.netblock_cache import get_netblock_cache
+from app.normalizer import registrable_domain
+from app.pivot_index import KIND_MODULES as PIVOT_KINDS, get_pivot_index
+from app.rate_limit_storage import SQLiteStorage  # noqa: F401  registers sqlite:// for the limiter
+from app.resolver import get_resolver
+from app.responses import json_response
+from app.scanner import module_flights, plan_scan, run_scan, scan_flights
+from app.streaming import resolution_stream, scan_event_stream
+from app.subdomain_trie import SubdomainTrie, get_subdomain_store
+from app.watchlist import get_watch_scheduler, get_watch_store
+from app.whois_client import get_whois_client
 
 
 # ── Rate Limiter ──────────────────────────────────────────────────────────────
 
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=get_remote_address,
+    enabled=config.RATE_LIMIT_ENABLED,
+    storage_uri=config.RATE_LIMIT_STORAGE_URI,
+)
+
+# ── Lifespan ──────────────────────────────────────────────────────────────────
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared upstream connection pools, start the loop-lag probe and watchlist; release them on shutdown."""
+    http_clients.start()
+    app.state.http_clients = http_clients
+    loop_monitor = start_loop_monitor()
+    if config.WATCH_ENABLED:
+        get_watch_scheduler().start()
+    try:
+        yield
+    finally:
+        loop_monitor.cancel()
+        await get_watch_scheduler().stop()
+        get_watch_store().close()
+        await http_clients.aclose()
+        get_cache().close()
+        get_ct_index().close()
+        get_history_store().close()
+        get_pivot_index().close()
+        if config.JOBS_ENABLED:
+            get_job_queue().close()
+
 
 # ── FastAPI App ───────────────────────────────────────────────────────────────
 
@@ -31,6 +93,7 @@ app = FastAPI(
         "domain metadata through legal OSINT sources. No active scanning."
     ),
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.state.limiter = limiter
@@ -58,6 +121,33 @@ async def health_check():
     return {"status": "ok", "service": "openscope"}
 
 
+@app.get("/stats")
+async def runtime_stats():
+    """Internal counters: DNS resolver, WHOIS servers, ASN sources, request coalescing, pivot index, circuit breakers, module deadlines, watchlist and jobs."""
+    asn_table = get_asn_table()
+    return {
+        "dns": get_resolver().stats(),
+        "whois": get_whois_client().stats(),
+        "asn_table": asn_table.stats() if asn_table else None,
+        "asn_netblocks": get_netblock_cache().stats(),
+        "coalescing": {
+            "scans": scan_flights.stats(),
+            "modules": module_flights.stats(),
+        },
+        "pivots": await asyncio.to_thread(get_pivot_index().stats) if config.PIVOT_INDEX_ENABLED else None,
+        "breakers": breaker_stats(),
+        "deadlines": module_deadlines.stats(),
+        "watchlist": get_watch_scheduler().stats(),
+        "jobs": await asyncio.to_thread(get_job_queue().stats) if config.JOBS_ENABLED else None,
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus exposition: module latencies and failures, in-flight scans, caches, event loop."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.post("/scan")
 @limiter.limit("5/minute")
 async def scan_domain(request: Request):
@@ -72,12 +162,491 @@ async def scan_domain(request: Request):
     - ASN / IP allocation metadata
     - Passive subdomain enumeration (from CT SAN entries)
 
+    ``modules`` restricts the scan to some modules (plus whatever they
+    depend on) and ``fields`` to some response fields, e.g.
+    ``{"domain": "example.com", "fields": ["certificates.not_after"]}``
+    only performs DNS and the TLS handshake.
+
+    With the job queue enabled the scan runs on a worker process. The
+    request waits up to ``OPENSCOPE_JOBS_WAIT`` seconds for it, or returns
+    at once with ``"wait": false``. Either way a scan still running is
+    answered with 202 and its job status; poll ``/jobs/{job_id}`` or
+    subscribe to ``/jobs/{job_id}/events``.
+
+    Rate limited to 5 requests per minute per IP.
+    """
+    body = ScanRequest.model_validate_json(await request.body())
+    modules, include = plan_scan(body.modules, body.fields)
+    if config.JOBS_ENABLED:
+        return await _enqueue_scan(request, body)
+    if not body.wait:
+        raise ValueError("wait=false requires the job queue (OPENSCOPE_JOBS_ENABLED)")
+    result = await run_scan(body.domain, modules=modules)
+    return json_response(request, result, include)
+
+
+async def _enqueue_scan(request: Request, body: ScanRequest):
+    queue = get_job_queue()
+    job = await asyncio.to_thread(queue.enqueue, body.domain, body.modules, body.fields)
+    job_id = job.id
+    if body.wait:
+        job = await wait_for_job(queue, job_id, config.JOBS_WAIT)
+    result = await asyncio.to_thread(queue.result, job_id) if job is not None and job.status == "done" else None
+    if job is None or (job.status == "done" and result is None):
+        # Purged or deleted while we waited
+        return JSONResponse(status_code=404, content={"detail": f"Unknown job {job_id}", "job_id": job_id})
+    if result is not None:
+        return json_response(request, result)
+    if job.status == "failed":
+        return JSONResponse(status_code=502, content={"detail": f"Scan failed: {job.error}", "job_id": job.id})
+    return json_response(request, job_status(job), status_code=202)
+
+
+@app.get("/scan/stream")
+@limiter.limit("5/minute")
+async def scan_domain_stream(request: Request, domain: str):
+    """
+    Run a scan and stream each result section as a Server-Sent Event.
+
+    Sections are emitted the moment their module finishes instead of
+    waiting for the slowest source; a final ``complete`` event carries the
+    timestamp and per-module errors.
+
+    Rate limited to 5 requests per minute per IP.
+    """
+    body = ScanRequest(domain=domain)
+    return StreamingResponse(
+        scan_event_stream(body.domain),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/scan/{domain}/certificates", response_model=CertificatePage)
+async def scan_certificates(
+    request: Request,
+    domain: str,
+    offset: int = 0,
+    limit: int = 50,
+    sort: str = "not_before",
+    order: str = "desc",
+):
+    """
+    Page through the locally indexed CT history of a previously scanned domain.
+
+    Served from the CT index without contacting crt.sh. ``sort`` is one of
+    not_before, not_after, issuer, common_name or serial_number. History is
+    kept per registrable domain, so ``www.example.com`` pages example.com's.
+    """
+    domain = ScanRequest(domain=domain).domain
+    domain = registrable_domain(domain) or domain
+    if offset < 0 or not 1 <= limit <= 500:
+        raise ValueError("offset must be >= 0 and limit between 1 and 500")
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be 'asc' or 'desc'")
+
+    index = get_ct_index()
+    if await asyncio.to_thread(index.sync_state, domain) is None:
+        return JSONResponse(status_code=404, content={"detail": f"No CT history indexed for {domain}"})
+    total = await asyncio.to_thread(index.count_certificates, domain)
+    items = await asyncio.to_thread(
+        index.certificates, domain, offset, limit, sort, order == "desc"
+    )
+    page = CertificatePage(domain=domain, total=total, offset=offset, limit=limit, items=items)
+    return json_response(request, page)
+
+
+async def _subdomain_trie(domain: str) -> SubdomainTrie | None:
+    """The domain's trie: from memory if recently scanned, else rebuilt from the CT index."""
+    domain = registrable_domain(domain) or domain
+    trie = get_subdomain_store().get(domain)
+    if trie is None:
+        index = get_ct_index()
+        if await asyncio.to_thread(index.sync_state, domain) is None:
+            return None
+        trie = SubdomainTrie(domain)
+        trie.add_ct_names(await asyncio.to_thread(index.names, domain))
+        get_subdomain_store().put(trie)
+    return trie
+
+
+@app.get("/scan/{domain}/subdomains", response_model=SubdomainPage)
+async def scan_subdomains(
+    request: Request,
+    domain: str,
+    offset: int = 0,
+    limit: int = 50,
+    under: str | None = None,
+    contains: str | None = None,
+    source: str | None = None,
+    status: str | None = None,
+):
+    """
+    Page through the subdomains discovered for a previously scanned domain.
+
+    Names are listed parents first (``dev.example.com`` before
+    ``api.dev.example.com``). ``under`` restricts the page to one branch,
+    ``contains`` filters by substring, ``source`` by discovery source
+    (crt.sh, tls_handshake) and ``status`` by resolution status (live,
+    dead, wildcard, error or unchecked). ``levels`` and ``branches`` give
+    per-depth and per-branch counts for the selected branch.
+
+    Served from memory for recently scanned domains, otherwise rebuilt from
+    the CT index without contacting crt.sh.
+    """
+    domain = ScanRequest(domain=domain).domain
+    if offset < 0 or not 1 <= limit <= 500:
+        raise ValueError("offset must be >= 0 and limit between 1 and 500")
+    if status is not None and status not in (*RESOLUTION_STATUSES, "unchecked"):
+        raise ValueError(f"status must be one of {', '.join(RESOLUTION_STATUSES)} or unchecked")
+
+    trie = await _subdomain_trie(domain)
+    if trie is None:
+        return JSONResponse(status_code=404, content={"detail": f"No subdomains known for {domain}"})
+
+    total, items = trie.page(offset, limit, under=under, contains=contains, source=source, status=status)
+    page = SubdomainPage.model_construct(
+        domain=domain,
+        total=total,
+        offset=offset,
+        limit=limit,
+        items=items,
+        levels=trie.levels(under),
+        branches=trie.branches(under),
+    )
+    return json_response(request, page)
+
+
+@app.post("/scan/{domain}/subdomains/resolve")
+@limiter.limit("5/minute")
+async def resolve_scan_subdomains(request: Request, domain: str):
+    """
+    Resolve the subdomains discovered for a previously scanned domain and
+    stream one NDJSON line per name as it resolves.
+
+    Each ``result`` line gives the name's status (live, dead, wildcard or
+    error), its A/AAAA addresses and CNAME target; a final ``summary`` line
+    gives the counts and the zones found to answer with wildcards. Results
+    are kept, so the subdomains page can then be filtered by ``status``.
+
     Rate limited to 5 requests per minute per IP.
     """
-    raw_body = await request.json()
-    body = ScanRequest(**raw_body)
-    result = await run_scan(body.domain)
-    return result
+    domain = ScanRequest(domain=domain).domain
+    trie = await _subdomain_trie(domain)
+    if trie is None:
+        return JSONResponse(status_code=404, content={"detail": f"No subdomains known for {domain}"})
+    return StreamingResponse(resolution_stream(trie), media_type="application/x-ndjson")
+
+
+async def _find_job(job_id: str):
+    """The job's latest state, or a 404 response if the queue is off or the id unknown."""
+    if not config.JOBS_ENABLED:
+        return JSONResponse(status_code=404, content={"detail": "The job queue is not enabled"})
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"detail": f"Unknown job {job_id}"})
+    return job
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def job_state(request: Request, job_id: str):
+    """Status of a queued scan: queued, running, done or failed."""
+    job = await _find_job(job_id)
+    if isinstance(job, JSONResponse):
+        return job
+    return json_response(request, job_status(job))
+
+
+@app.get("/jobs/{job_id}/result", response_model=ScanResponse)
+async def job_result(request: Request, job_id: str):
+    """The ScanResponse of a finished job (409 while it is still queued or running)."""
+    job = await _find_job(job_id)
+    if isinstance(job, JSONResponse):
+        return job
+    if job.status == "failed":
+        return JSONResponse(status_code=502, content={"detail": f"Scan failed: {job.error}", "job_id": job.id})
+    if job.status != "done":
+        return JSONResponse(status_code=409, content={"detail": f"Job is {job.status}", "job_id": job.id})
+    return json_response(request, await asyncio.to_thread(get_job_queue().result, job_id))
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Follow a job over Server-Sent Events: a ``status`` event whenever its
+    state changes, then ``result`` with the ScanResponse or ``failed``.
+    """
+    job = await _find_job(job_id)
+    if isinstance(job, JSONResponse):
+        return job
+    return StreamingResponse(
+        job_event_stream(get_job_queue(), job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _batch_domains(request: Request):
+    """
+    Return an async iterator of raw domain strings from a batch request body.
+
+    Accepts a JSON body (``{"domains": [...]}`` or a bare list), a multipart
+    upload with a ``file`` field, or a newline-delimited text body that is
+    read in chunks. Malformed bodies raise before streaming starts.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("application/json"):
+        raw_body = await request.json()
+        items = raw_body.get("domains") if isinstance(raw_body, dict) else raw_body
+        if not isinstance(items, list):
+            raise ValueError("Expected a list of domains")
+
+        async def _items():
+            for item in items:
+                yield str(item)
+
+        return _items()
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise ValueError("Expected an uploaded file in the 'file' field")
+    else:
+        # The body must be drained before the streaming response starts (the
+        # response listens on the same channel for disconnects), so spool it
+        # to a temporary file instead of holding it in memory.
+        spool = SpooledTemporaryFile(max_size=1024 * 1024)
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        upload = UploadFile(file=spool)
+
+    async def _chunks():
+        try:
+            while chunk := await upload.read(64 * 1024):
+                yield chunk
+        finally:
+            await upload.close()
+
+    return iter_domain_lines(_chunks())
+
+
+@app.post("/scan/batch")
+@limiter.limit("2/minute")
+async def scan_batch(request: Request, concurrency: int | None = None):
+    """
+    Scan many domains and stream one NDJSON line per domain as each finishes.
+
+    Each line is a ``result`` event (with the full ScanResponse) or an
+    ``error`` event for invalid input or a failed scan, and carries running
+    progress counters. A final ``summary`` line closes the stream.
+    Duplicate domains are scanned once.
+
+    ``concurrency`` bounds the number of domains scanned at once; per-upstream
+    limits still apply across all scans.
+    """
+    limit = min(concurrency or config.BATCH_CONCURRENCY, config.BATCH_MAX_CONCURRENCY)
+    if limit < 1:
+        raise ValueError("concurrency must be at least 1")
+    return StreamingResponse(
+        run_batch(await _batch_domains(request), limit),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.post("/normalize")
+@limiter.limit("10/minute")
+async def normalize_domains(request: Request, registrable: bool = False):
+    """
+    Normalize and deduplicate a list of domains without scanning them.
+
+    Takes the same bodies as ``/scan/batch`` and streams one NDJSON
+    ``result`` line per unique domain (with its registrable domain and
+    public suffix), an ``error`` line per invalid input and a final
+    ``summary`` with the counts. With ``registrable`` each name is reduced
+    to its registrable domain before deduplication.
+    """
+    return StreamingResponse(
+        run_normalize(await _batch_domains(request), registrable),
+        media_type="application/x-ndjson",
+    )
+
+
+def _epoch(value: datetime | None) -> float | None:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@app.get("/watchlist", response_model=WatchlistPage)
+async def watchlist(request: Request, offset: int = 0, limit: int = 100):
+    """List watched domains with their last check, next check and known expiry dates."""
+    if offset < 0 or not 1 <= limit <= 1000:
+        raise ValueError("offset must be >= 0 and limit between 1 and 1000")
+    store = get_watch_store()
+    page = WatchlistPage(
+        total=await asyncio.to_thread(store.count),
+        offset=offset,
+        limit=limit,
+        scheduler_running=get_watch_scheduler().running,
+        items=await asyncio.to_thread(store.entries, offset, limit),
+    )
+    return json_response(request, page)
+
+
+@app.post("/watchlist")
+async def watch_domains(body: WatchRequest):
+    """
+    Add domains to the watchlist.
+
+    New domains are due immediately and then re-scanned every
+    ``OPENSCOPE_WATCH_INTERVAL``, more often as a certificate or
+    registration approaches expiry. Already watched domains are left as is.
+    """
+    store = get_watch_store()
+    total = await asyncio.to_thread(store.count)
+    if total + len(body.domains) > config.WATCH_MAX_DOMAINS:
+        raise ValueError(f"The watchlist is limited to {config.WATCH_MAX_DOMAINS} domains")
+    now = time.time()
+    added = await asyncio.to_thread(store.add, body.domains, now)
+    scheduler = get_watch_scheduler()
+    for domain in added:
+        scheduler.schedule(domain, now)
+    return {"added": added, "total": total + len(added)}
+
+
+@app.delete("/watchlist/{domain}")
+async def unwatch_domain(domain: str):
+    """Stop watching a domain and drop its recorded changes."""
+    domain = ScanRequest(domain=domain).domain
+    if not await asyncio.to_thread(get_watch_store().remove, domain):
+        return JSONResponse(status_code=404, content={"detail": f"{domain} is not watched"})
+    get_watch_scheduler().unschedule(domain)
+    return {"removed": domain}
+
+
+@app.get("/watchlist/expirations", response_model=list[WatchExpiration])
+async def watch_expirations(within_days: float = 30, limit: int = 100):
+    """Watched domains whose certificate or registration expires within ``within_days``, soonest first."""
+    if within_days < 0 or not 1 <= limit <= 1000:
+        raise ValueError("within_days must be >= 0 and limit between 1 and 1000")
+    until = time.time() + within_days * 86400
+    return await asyncio.to_thread(get_watch_store().expirations, until, limit)
+
+
+@app.get("/watchlist/changes", response_model=list[WatchChange])
+async def watch_changes(
+    domain: str | None = None,
+    since: datetime | None = None,
+    limit: int = 100,
+    include_initial: bool = False,
+):
+    """
+    Section changes found by watchlist re-scans, newest first.
+
+    Each entry carries the section's new value. ``include_initial`` also
+    returns the first value recorded for every section.
+    """
+    if not 1 <= limit <= 1000:
+        raise ValueError("limit must be between 1 and 1000")
+    if domain is not None:
+        domain = ScanRequest(domain=domain).domain
+    return await asyncio.to_thread(get_watch_store().changes, domain, _epoch(since), limit, include_initial)
+
+
+@app.get("/domains/{domain}/history", response_model=HistoryPage)
+async def domain_history(request: Request, domain: str, offset: int = 0, limit: int = 50):
+    """
+    List the distinct scan results stored for a domain, newest first.
+
+    A version covers every scan from ``first_seen`` to ``last_seen`` that
+    found the same data; ``changed`` names the sections that differ from
+    the version before it.
+    """
+    domain = ScanRequest(domain=domain).domain
+    if offset < 0 or not 1 <= limit <= 500:
+        raise ValueError("offset must be >= 0 and limit between 1 and 500")
+    store = get_history_store()
+    total = await asyncio.to_thread(store.count, domain)
+    if not total:
+        return JSONResponse(status_code=404, content={"detail": f"No scan history for {domain}"})
+    items = await asyncio.to_thread(store.versions, domain, offset, limit)
+    page = HistoryPage(domain=domain, total=total, offset=offset, limit=limit, items=items)
+    return json_response(request, page)
+
+
+@app.get("/domains/{domain}/history/diff", response_model=ScanDiff)
+async def domain_history_diff(
+    request: Request,
+    domain: str,
+    start: datetime | None = Query(None, alias="from"),
+    end: datetime | None = Query(None, alias="to"),
+):
+    """
+    Compare the stored results of a domain at two points in time.
+
+    Each timestamp selects the version current at that moment. ``to``
+    defaults to the latest version and ``from`` to the version before it.
+    Reports new and removed subdomains, changed DNS records, a rotated
+    certificate and any other changed field. Served from the history store
+    without re-scanning.
+    """
+    domain = ScanRequest(domain=domain).domain
+    store = get_history_store()
+    after = await asyncio.to_thread(store.version_at, domain, _epoch(end))
+    if after is None:
+        return JSONResponse(status_code=404, content={"detail": f"No scan history for {domain} at 'to'"})
+    if start is None:
+        before = await asyncio.to_thread(store.previous, domain, after.version) or after
+    else:
+        before = await asyncio.to_thread(store.version_at, domain, _epoch(start))
+        if before is None:
+            return JSONResponse(status_code=404, content={"detail": f"No scan history for {domain} at 'from'"})
+    diff = await asyncio.to_thread(store.diff, domain, before, after)
+    return json_response(request, diff)
+
+
+@app.get("/pivots", response_model=PivotPage)
+async def pivot_lookup(request: Request, kind: str, value: str, offset: int = 0, limit: int = 50):
+    """
+    List the scanned domains sharing an infrastructure value, most recently seen first.
+
+    ``kind`` is ip, netblock, asn, ns, cert_serial, san or registrar. For
+    ``ip`` a CIDR (``203.0.113.0/24``) or range matches every address in
+    it; for ``netblock`` an address or CIDR matches the netblocks
+    containing it (or contained in it). Served from the pivot index that
+    every scan updates.
+    """
+    if not config.PIVOT_INDEX_ENABLED:
+        return JSONResponse(status_code=404, content={"detail": "The pivot index is not enabled"})
+    if kind not in PIVOT_KINDS:
+        raise ValueError(f"kind must be one of {', '.join(PIVOT_KINDS)}")
+    if offset < 0 or not 1 <= limit <= 500:
+        raise ValueError("offset must be >= 0 and limit between 1 and 500")
+    index = get_pivot_index()
+    total = await asyncio.to_thread(index.count, kind, value)
+    items = await asyncio.to_thread(index.lookup, kind, value, offset, limit) if total else []
+    page = PivotPage(kind=kind, value=value, total=total, offset=offset, limit=limit, items=items)
+    return json_response(request, page)
+
+
+@app.get("/domains/{domain}/pivots", response_model=DomainPivots)
+async def domain_pivots(request: Request, domain: str):
+    """
+    List a scanned domain's IPs, netblock, ASN, nameservers, certificate
+    serials, SANs and registrar, each with the number of domains sharing it.
+    """
+    if not config.PIVOT_INDEX_ENABLED:
+        return JSONResponse(status_code=404, content={"detail": "The pivot index is not enabled"})
+    domain = ScanRequest(domain=domain).domain
+    pivots = await asyncio.to_thread(get_pivot_index().domain_pivots, domain)
+    if pivots is None:
+        return JSONResponse(status_code=404, content={"detail": f"No pivots indexed for {domain}"})
+    return json_response(request, pivots)
 
 
 # ── Error Handlers ────────────────────────────────────────────────────────────
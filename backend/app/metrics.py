@@ -0,0 +1,166 @@
+"""
+Prometheus Metrics — scan, module, cache and runtime instrumentation.
+
+Module latencies, errors and cache lookups are recorded as they happen.
+Counters that already live elsewhere (DNS resolver, request coalescing,
+netblock cache, WHOIS servers, circuit breakers) and the state of the event loop's thread
+pool are read at scrape time by a custom collector, so they cost nothing
+between scrapes. Event-loop lag is sampled by a background task started
+in the app lifespan.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from app import config
+
+
+# ── Scans and modules ─────────────────────────────────────────────────────────
+
+SCANS_IN_FLIGHT = Gauge(
+    "openscope_scans_in_flight", "Scans currently executing (after coalescing)"
+)
+SCANS_TOTAL = Counter("openscope_scans_total", "Scans executed (after coalescing)")
+
+MODULE_DURATION = Histogram(
+    "openscope_module_duration_seconds",
+    "Wall time of each scan module, including cache lookups and queueing",
+    ["module", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15),
+)
+MODULE_QUEUE_WAIT = Histogram(
+    "openscope_module_queue_wait_seconds",
+    "Time a module call waited for a free slot on its upstream",
+    ["upstream"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60),
+)
+MODULE_ERRORS = Counter(
+    "openscope_module_errors_total",
+    "Module calls that failed, by module, upstream and kind (timeout / error)",
+    ["module", "upstream", "kind"],
+)
+
+# ── Result cache ──────────────────────────────────────────────────────────────
+
+CACHE_LOOKUPS = Counter(
+    "openscope_cache_lookups_total",
+    "Result cache lookups by source and outcome (l1, l2, stale, miss)",
+    ["source", "result"],
+)
+
+# ── Event loop ────────────────────────────────────────────────────────────────
+
+LOOP_LAG = Gauge(
+    "openscope_event_loop_lag_seconds", "How late the last event-loop lag probe woke up"
+)
+LOOP_LAG_MAX = Gauge(
+    "openscope_event_loop_lag_max_seconds", "Worst event-loop lag since the process started"
+)
+_loop_lag_max = 0.0
+
+
+async def monitor_event_loop(interval: float) -> None:
+    """Sleep ``interval`` seconds in a loop and record how late each wake-up is."""
+    global _loop_lag_max
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.monotonic() - started - interval)
+        LOOP_LAG.set(lag)
+        if lag > _loop_lag_max:
+            _loop_lag_max = lag
+            LOOP_LAG_MAX.set(lag)
+
+
+# ── Scrape-time collector ─────────────────────────────────────────────────────
+
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class _RuntimeCollector(Collector):
+    """Exports counters kept by other components and the executor's backlog."""
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def describe(self) -> list:
+        # Keeps registration from calling collect() while the app is still importing
+        return []
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        # Imported here: these modules import this one for instrumentation
+        from app.breakers import breaker_stats
+        from app.netblock_cache import get_netblock_cache
+        from app.resolver import get_resolver
+        from app.scanner import module_flights, scan_flights
+
+        executor = getattr(self.loop, "_default_executor", None) if self.loop else None
+        depth = GaugeMetricFamily(
+            "openscope_executor_queue_depth", "Work items waiting for a default-executor thread"
+        )
+        threads = GaugeMetricFamily(
+            "openscope_executor_threads", "Threads started by the default executor"
+        )
+        if not isinstance(executor, ThreadPoolExecutor):
+            executor = None
+        # Private ThreadPoolExecutor attributes: read defensively, report 0 if they go away
+        work_queue = getattr(executor, "_work_queue", None)
+        started = getattr(executor, "_threads", None)
+        depth.add_metric([], work_queue.qsize() if hasattr(work_queue, "qsize") else 0)
+        threads.add_metric([], len(started) if started is not None else 0)
+        yield depth
+        yield threads
+
+        coalescing = GaugeMetricFamily(
+            "openscope_coalescing_hit_ratio",
+            "Share of calls that joined an in-flight execution",
+            labels=["kind"],
+        )
+        coalescing.add_metric(["scans"], scan_flights.stats()["hit_ratio"])
+        coalescing.add_metric(["modules"], module_flights.stats()["hit_ratio"])
+        yield coalescing
+
+        dns = get_resolver().stats()["cache"]
+        lookups = dns["hits"] + dns["negative_hits"] + dns["misses"] + dns["coalesced"]
+        dns_ratio = GaugeMetricFamily(
+            "openscope_dns_cache_hit_ratio", "Share of DNS lookups answered from the resolver cache"
+        )
+        dns_ratio.add_metric([], (dns["hits"] + dns["negative_hits"]) / lookups if lookups else 0.0)
+        yield dns_ratio
+
+        netblock_ratio = GaugeMetricFamily(
+            "openscope_netblock_cache_hit_ratio", "Share of RDAP IP lookups answered by a cached netblock"
+        )
+        netblock_ratio.add_metric([], get_netblock_cache().stats()["hit_ratio"])
+        yield netblock_ratio
+
+        circuits = GaugeMetricFamily(
+            "openscope_circuit_state",
+            "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)",
+            labels=["upstream"],
+        )
+        for name, stats in breaker_stats().items():
+            circuits.add_metric([name], CIRCUIT_STATES[stats["state"]])
+        yield circuits
+
+
+runtime_collector = _RuntimeCollector()
+REGISTRY.register(runtime_collector)
+
+
+def attach_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Tell the collector which event loop's executor to report on."""
+    runtime_collector.loop = loop
+
+
+def start_loop_monitor() -> asyncio.Task:
+    attach_loop(asyncio.get_running_loop())
+    return asyncio.create_task(monitor_event_loop(config.METRICS_LOOP_LAG_INTERVAL))
@@ -5,30 +5,46 @@ OpenScope — Pydantic models for scan request/response.
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field, field_validator
-import re
+
+from app import normalizer
 
 
 # ── Request ───────────────────────────────────────────────────────────────────
 
 class ScanRequest(BaseModel):
     domain: str = Field(..., examples=["example.com"], description="Domain to scan")
+    modules: Optional[list[str]] = Field(
+        None,
+        examples=[["dns", "tls"]],
+        description="Modules (or response sections) to run; all when omitted",
+    )
+    fields: Optional[list[str]] = Field(
+        None,
+        examples=[["certificates.not_after"]],
+        description="ScanResponse fields to return, as 'section' or 'section.field'",
+    )
+    wait: bool = Field(
+        True,
+        description="Wait for the result; with the job queue enabled, false returns the job id at once",
+    )
 
     @field_validator("domain")
     @classmethod
     def normalize_domain(cls, v: str) -> str:
-        # Strip protocol
-        v = re.sub(r"^https?://", "", v.strip())
-        # Strip path / trailing slash
-        v = v.split("/")[0]
-        # Strip port
-        v = v.split(":")[0]
-        # Basic domain validation
-        if not re.match(r"^(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}$", v):
-            raise ValueError(f"Invalid domain format: {v}")
-        return v.lower()
+        # URLs, ports, trailing dots and Unicode names all map to one ASCII form
+        return normalizer.normalize_domain(v)
+
+
+class WatchRequest(BaseModel):
+    domains: list[str] = Field(..., examples=[["example.com", "example.org"]], description="Domains to watch")
+
+    @field_validator("domains")
+    @classmethod
+    def normalize_domains(cls, v: list[str]) -> list[str]:
+        return list(dict.fromkeys(ScanRequest.normalize_domain(domain) for domain in v))
 
 
 # ── Sub-models ────────────────────────────────────────────────────────────────
@@ -68,6 +84,27 @@ class HistoricalCertificate(BaseModel):
     san_entries: list[str] = Field(default_factory=list)
 
 
+class CtName(BaseModel):
+    """An in-scope SAN name with the not_before range of the certificates carrying it."""
+    name: str
+    first_seen: Optional[str] = None
+    last_seen: Optional[str] = None
+
+
+class CtLookup(BaseModel):
+    """crt.sh result: newest certificates plus every in-scope SAN name seen."""
+    certificates: list[HistoricalCertificate] = Field(default_factory=list)
+    names: list[CtName] = Field(default_factory=list)
+
+
+class CertificatePage(BaseModel):
+    domain: str
+    total: int = 0
+    offset: int = 0
+    limit: int = 50
+    items: list[HistoricalCertificate] = Field(default_factory=list)
+
+
 class DnsRecords(BaseModel):
     A: list[str] = Field(default_factory=list)
     AAAA: list[str] = Field(default_factory=list)
@@ -100,7 +137,82 @@ class AsnInfo(BaseModel):
 
 class SubdomainEntry(BaseModel):
     subdomain: str
-    source: str = "crt.sh"
+    source: str = "crt.sh"  # first source the name was found in
+    sources: list[str] = Field(default_factory=list)
+    first_seen: Optional[str] = None
+    last_seen: Optional[str] = None
+    status: Optional[str] = None  # live | dead | wildcard | error; None until resolved
+    addresses: list[str] = Field(default_factory=list)  # A and AAAA
+    cname: Optional[str] = None
+
+
+class ResolvedName(BaseModel):
+    subdomain: str
+    status: str  # live | dead | wildcard | error
+    addresses: list[str] = Field(default_factory=list)
+    cname: Optional[str] = None
+    error: Optional[str] = None
+
+
+class WildcardZone(BaseModel):
+    zone: str  # e.g. "dev.example.com" answers for *.dev.example.com
+    addresses: list[str] = Field(default_factory=list)
+
+
+class SubdomainResolution(BaseModel):
+    checked: int = 0
+    live: int = 0
+    dead: int = 0
+    wildcard: int = 0  # answered only with a wildcard's addresses
+    errors: int = 0
+    unchecked: int = 0  # over SUBDOMAIN_RESOLVE_MAX_NAMES or out of time
+    wildcards: list[WildcardZone] = Field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+
+class SubdomainBranch(BaseModel):
+    name: str  # e.g. "dev.example.com"
+    count: int = 0  # subdomains at or below it
+
+
+class SubdomainSummary(BaseModel):
+    total: int = 0
+    inline: int = 0  # entries included in ScanResponse.subdomains
+    truncated: bool = False  # page through /scan/{domain}/subdomains for the rest
+    levels: dict[int, int] = Field(default_factory=dict)  # depth below the domain → count
+    branches: list[SubdomainBranch] = Field(default_factory=list)  # largest first
+
+
+class SubdomainPage(BaseModel):
+    domain: str
+    total: int = 0  # matching the filters
+    offset: int = 0
+    limit: int = 50
+    items: list[SubdomainEntry] = Field(default_factory=list)
+    levels: dict[int, int] = Field(default_factory=dict)
+    branches: list[SubdomainBranch] = Field(default_factory=list)
+
+
+class CacheStatus(BaseModel):
+    layer: str = "l1"  # "l1" (in-process) or "l2" (shared on-disk)
+    age_seconds: float = 0.0
+    stale: bool = False  # served while a background refresh runs
+
+
+class ModuleTiming(BaseModel):
+    module: str
+    start_ms: float = 0.0  # offset from scan start
+    end_ms: float = 0.0
+    duration_ms: float = 0.0
+    queued_ms: float = 0.0  # waiting for a free upstream slot, part of duration_ms
+    blocked_by: Optional[str] = None  # dependency that finished last before start
+    status: str = "ok"  # ok | cached | error | timeout | pending
+
+
+class ScanTimeline(BaseModel):
+    total_ms: float = 0.0
+    critical_path: list[str] = Field(default_factory=list)
+    modules: list[ModuleTiming] = Field(default_factory=list)
 
 
 # ── Response ──────────────────────────────────────────────────────────────────
@@ -115,4 +227,137 @@ class ScanResponse(BaseModel):
     whois: WhoisInfo = Field(default_factory=WhoisInfo)
     asn_info: AsnInfo = Field(default_factory=AsnInfo)
     subdomains: list[SubdomainEntry] = Field(default_factory=list)
+    subdomain_summary: SubdomainSummary = Field(default_factory=SubdomainSummary)
+    subdomain_resolution: SubdomainResolution = Field(default_factory=SubdomainResolution)
     errors: dict[str, str] = Field(default_factory=dict)
+    pending: list[str] = Field(default_factory=list)  # sections cut off by the scan deadline
+    cache: dict[str, CacheStatus] = Field(default_factory=dict)
+    timeline: ScanTimeline = Field(default_factory=ScanTimeline)
+
+
+# ── Watchlist ─────────────────────────────────────────────────────────────────
+
+class WatchEntry(BaseModel):
+    domain: str
+    added_at: str
+    last_checked: Optional[str] = None
+    next_check: Optional[str] = None
+    cert_expiry: Optional[str] = None
+    expires_date: Optional[str] = None
+    last_error: Optional[str] = None  # module errors of the last check
+
+
+class WatchlistPage(BaseModel):
+    total: int
+    offset: int
+    limit: int
+    scheduler_running: bool
+    items: list[WatchEntry] = Field(default_factory=list)
+
+
+class WatchExpiration(BaseModel):
+    domain: str
+    cert_expiry: Optional[str] = None
+    cert_days_left: Optional[float] = None
+    expires_date: Optional[str] = None
+    domain_days_left: Optional[float] = None
+    next_check: Optional[str] = None
+
+
+class WatchChange(BaseModel):
+    domain: str
+    section: str  # ScanResponse section that changed
+    changed_at: str
+    initial: bool = False  # first value recorded for the section, not a change
+    data: Any = None  # the section's new value
+
+
+# ── History ───────────────────────────────────────────────────────────────────
+
+class HistoryVersion(BaseModel):
+    """A distinct scan result; later scans that found nothing new extend it."""
+    version: int
+    first_seen: str  # scan that produced this state
+    last_seen: str  # latest scan that confirmed it
+    scans: int = 1
+    snapshot: bool = False  # stored in full rather than as a delta
+    changed: list[str] = Field(default_factory=list)  # sections that differ from the previous version
+
+
+class HistoryPage(BaseModel):
+    domain: str
+    total: int = 0
+    offset: int = 0
+    limit: int = 50
+    items: list[HistoryVersion] = Field(default_factory=list)  # newest first
+
+
+class ValueChange(BaseModel):
+    added: list[str] = Field(default_factory=list)
+    removed: list[str] = Field(default_factory=list)
+
+
+class CertificateRotation(BaseModel):
+    before: Optional[CertificateInfo] = None
+    after: Optional[CertificateInfo] = None
+
+
+class FieldChange(BaseModel):
+    section: str
+    field: str
+    before: Any = None
+    after: Any = None
+
+
+class ScanDiff(BaseModel):
+    domain: str
+    before: HistoryVersion
+    after: HistoryVersion
+    subdomains: ValueChange = Field(default_factory=ValueChange)
+    dns_records: dict[str, ValueChange] = Field(default_factory=dict)  # record type → change
+    certificate: Optional[CertificateRotation] = None  # set when the serial number changed
+    fields: list[FieldChange] = Field(default_factory=list)  # other changed fields
+
+
+# ── Pivots ────────────────────────────────────────────────────────────────────
+
+class PivotMatch(BaseModel):
+    domain: str
+    value: str  # the indexed value (an address inside a queried CIDR, a netblock containing it, ...)
+    first_seen: str
+    last_seen: str
+
+
+class PivotPage(BaseModel):
+    kind: str  # ip | netblock | asn | ns | cert_serial | san | registrar
+    value: str
+    total: int = 0
+    offset: int = 0
+    limit: int = 50
+    items: list[PivotMatch] = Field(default_factory=list)
+
+
+class PivotValue(BaseModel):
+    kind: str
+    value: str
+    domains: int = 0  # indexed domains with this value, this one included
+    first_seen: str
+    last_seen: str
+
+
+class DomainPivots(BaseModel):
+    domain: str
+    pivots: list[PivotValue] = Field(default_factory=list)
+
+
+# ── Jobs ──────────────────────────────────────────────────────────────────────
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str  # queued | running | done | failed
+    domain: str
+    created_at: str
+    started_at: Optional[str] = None  # latest attempt
+    finished_at: Optional[str] = None
+    attempts: int = 0
+    error: Optional[str] = None  # last failed attempt
@@ -1,50 +1,86 @@
 """
 ASN & IP Metadata Lookup — resolves domain → IP, then queries RDAP for ASN info.
 Uses public RDAP endpoints (rdap.org).
+
+When an offline IP → ASN dataset is configured it answers first, and RDAP
+is only asked for the fields the dataset does not carry.
 """
 
 from __future__ import annotations
 
-import asyncio
-import socket
+import ipaddress
 
 import httpx
 
+from app import config
+from app.http_clients import get_client
+from app.ip2asn import get_asn_table
 from app.models import AsnInfo
-
-
-RDAP_URL = "https://rdap.org/ip"
-
-
-def _resolve_ip(domain: str) -> str | None:
-    """Resolve domain to an IPv4 address synchronously."""
-    try:
-        result = socket.getaddrinfo(domain, None, socket.AF_INET)
-        if result:
-            return result[0][4][0]
-    except (socket.gaierror, OSError):
-        pass
+from app.netblock_cache import get_netblock_cache
+from app.resolver import get_resolver
+
+
+def _rdap_range(data: dict) -> tuple[str, str] | None:
+    """First and last address of the network an RDAP IP object describes."""
+    if data.get("startAddress") and data.get("endAddress"):
+        return data["startAddress"], data["endAddress"]
+    for cidr in data.get("cidr0_cidrs", []):
+        prefix = cidr.get("v4prefix") or cidr.get("v6prefix")
+        if prefix and cidr.get("length") is not None:
+            try:
+                net = ipaddress.ip_network(f"{prefix}/{cidr['length']}", strict=False)
+            except ValueError:
+                continue
+            return str(net[0]), str(net[-1])
     return None
 
 
-async def lookup_asn(domain: str, ip_address: str | None = None) -> AsnInfo:
-    """Look up ASN/IP metadata via RDAP."""
-
-    # Resolve IP if not provided
-    if not ip_address:
-        loop = asyncio.get_event_loop()
-        ip_address = await loop.run_in_executor(None, _resolve_ip, domain)
+async def _lookup_local(ip_address: str) -> AsnInfo | None:
+    """Answer from the offline dataset, or None if unconfigured or not covered."""
+    table = get_asn_table()
+    if table is None:
+        return None
+    try:
+        await table.refresh()
+    except Exception:
+        return None  # unreadable dataset; fall back to RDAP
+    record = table.lookup(ip_address)
+    if record is None:
+        return None
+    return AsnInfo(
+        asn=f"AS{record.asn}",
+        asn_name=record.description,
+        hosting_provider=record.description,
+        netblock=record.network,
+        country=record.country,
+        allocation_owner=record.description,
+    )
 
-    if not ip_address:
-        return AsnInfo()
 
-    async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
-        try:
-            resp = await client.get(f"{RDAP_URL}/{ip_address}")
-            resp.raise_for_status()
-            data = resp.json()
-        except Exception:
-            return AsnInfo()
+async def _lookup_remote(
+    ip_address: str,
+    rdap_client: httpx.AsyncClient,
+    ipinfo_client: httpx.AsyncClient | None,
+    need_asn: bool = True,
+) -> AsnInfo:
+    """
+    Query RDAP, plus ipinfo.io when RDAP has no ASN and ``need_asn`` is set.
+
+    Results are cached against the netblock RDAP reports, so later
+    addresses in the same range are answered without a request. Transport
+    and HTTP errors from RDAP propagate.
+    """
+    cache = get_netblock_cache()
+    cached = cache.get(ip_address)
+    if cached is not None and (cached.asn or not need_asn):
+        return cached
+
+    resp = await rdap_client.get(f"{config.RDAP_IP_URL}/{ip_address}")
+    if resp.status_code == 404:
+        return AsnInfo()  # no registry holds the address (private or reserved ranges)
+    # Outages raise, so they are reported as module errors instead of an empty result
+    resp.raise_for_status()
+    data = resp.json()
 
     # Extract ASN from "arin_originas0_originautnums" or similar RDAP fields
     asn = None
@@ -103,25 +139,25 @@ async def lookup_asn(domain: str, ip_address: str | None = None) -> AsnInfo:
                     asn = desc.strip()
 
     # Fallback: Try ipinfo.io for cleaner ASN data
-    if not asn:
+    if not asn and need_asn:
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(f"https://ipinfo.io/{ip_address}/json")
-                if resp.status_code == 200:
-                    ipinfo = resp.json()
-                    org = ipinfo.get("org", "")
-                    if org:
-                        parts = org.split(" ", 1)
-                        asn = parts[0] if parts else None
-                        asn_name = parts[1] if len(parts) > 1 else None
-                        if not hosting_provider:
-                            hosting_provider = asn_name
-                    if not country:
-                        country = ipinfo.get("country", "")
+            ipinfo_client = ipinfo_client or get_client("ipinfo")
+            resp = await ipinfo_client.get(f"{config.IPINFO_URL}/{ip_address}/json")
+            if resp.status_code == 200:
+                ipinfo = resp.json()
+                org = ipinfo.get("org", "")
+                if org:
+                    parts = org.split(" ", 1)
+                    asn = parts[0] if parts else None
+                    asn_name = parts[1] if len(parts) > 1 else None
+                    if not hosting_provider:
+                        hosting_provider = asn_name
+                if not country:
+                    country = ipinfo.get("country", "")
         except Exception:
             pass
 
-    return AsnInfo(
+    info = AsnInfo(
         asn=asn,
         asn_name=asn_name,
         hosting_provider=hosting_provider or owner or name,
@@ -129,3 +165,39 @@ async def lookup_asn(domain: str, ip_address: str | None = None) -> AsnInfo:
         country=country,
         allocation_owner=owner or hosting_provider,
     )
+    block = _rdap_range(data)
+    if block is not None:
+        cache.put(*block, info)
+    return info
+
+
+async def lookup_asn(
+    domain: str,
+    ip_address: str | None = None,
+    rdap_client: httpx.AsyncClient | None = None,
+    ipinfo_client: httpx.AsyncClient | None = None,
+) -> AsnInfo:
+    """Look up ASN/IP metadata from the offline dataset, then RDAP for the rest."""
+
+    # Resolve IP if not provided
+    if not ip_address:
+        ip_address = await get_resolver().resolve_first(domain, "A")
+
+    if not ip_address:
+        return AsnInfo()
+
+    local = await _lookup_local(ip_address)
+    if local is not None and local.asn_name and local.country:
+        return local
+
+    if local is None:
+        return await _lookup_remote(ip_address, rdap_client or get_client("rdap"), ipinfo_client)
+    try:
+        remote = await _lookup_remote(ip_address, rdap_client or get_client("rdap"), ipinfo_client, need_asn=False)
+    except Exception:
+        return local  # the dataset's answer stands on its own
+    # The dataset's routing data wins; RDAP fills in what it lacks
+    return AsnInfo(**{
+        name: getattr(local, name) or getattr(remote, name)
+        for name in AsnInfo.model_fields
+    })
@@ -1,58 +1,230 @@
 """
 Certificate Transparency Lookup — queries crt.sh for historical certificates.
 Passive only, no direct CT log polling.
+
+The crt.sh response is parsed incrementally from the byte stream. With the
+local CT index enabled (the default) new entries are written to it in
+batches and history is read back from the index; otherwise only the newest
+``HISTORY_LIMIT`` certificates are kept in a heap. Either way memory stays
+flat no matter how many certificates a domain has.
+
+An index sync runs as its own task shared by concurrent lookups of the
+domain. A lookup cut short by its module deadline stops waiting, but the
+sync carries on and records its watermark, so a domain too large to sync
+within one deadline is not re-downloaded from scratch by every scan.
 """
 
 from __future__ import annotations
 
+import asyncio
+import codecs
+import heapq
+import json
+import time
+from typing import AsyncIterator, Iterator, Optional
+
 import httpx
-from typing import Optional
 
-from app.models import HistoricalCertificate
+from app import config
+from app.ct_index import CtIndex, get_ct_index
+from app.http_clients import get_client
+from app.models import CtLookup, CtName, HistoricalCertificate
+from app.singleflight import SingleFlight
 
 
-CRT_SH_URL = "https://crt.sh"
+HISTORY_LIMIT = 50  # most recent certificates returned
+INDEX_BATCH_SIZE = 2000  # crt.sh entries written to the CT index per transaction
 
+_syncs = SingleFlight()  # in-flight index syncs by domain
 
-async def lookup_ct(domain: str) -> list[HistoricalCertificate]:
-    """Query crt.sh JSON API for certificate transparency entries."""
-    params = {"q": f"%.{domain}", "output": "json"}
 
-    async with httpx.AsyncClient(timeout=12.0) as client:
-        resp = await client.get(CRT_SH_URL, params=params)
-        resp.raise_for_status()
-        data = resp.json()
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    """
+    Yield the elements of a top-level JSON array as they arrive.
+
+    Yields nothing if the body is not a JSON array; raises ValueError if the
+    array is truncated or contains malformed JSON.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")("replace")
+    buf = ""
+    pos = 0
+    started = False
+
+    async for chunk in chunks:
+        buf = buf[pos:] + text.decode(chunk)
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if not started:
+                if buf[pos] != "[":
+                    return
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                item, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # element split across chunks; wait for more data
+            yield item
+
+    if started or buf[pos:].strip():
+        raise ValueError("Truncated or malformed JSON array from crt.sh")
 
-    if not isinstance(data, list):
-        return []
 
-    # Deduplicate by serial number
-    seen_serials: set[str] = set()
-    certs: list[HistoricalCertificate] = []
+def _split_names(name_value: str) -> list[str]:
+    return [
+        s.strip()
+        for s in name_value.replace("\\n", "\n").split("\n")
+        if s.strip() and not s.strip().startswith("*")
+    ]
+
+
+def _in_scope_names(suffix: str, name_value: str) -> Iterator[str]:
+    """Lowercased, wildcard-stripped SAN names that end with ``suffix``."""
+    for name in name_value.replace("\\n", "\n").split("\n"):
+        name = name.strip().lower()
+        if name.startswith("*."):
+            name = name[2:]
+        if name.endswith(suffix):
+            yield name
+
+
+class _CtAccumulator:
+    """Bounded top-N by not_before plus the set of in-scope SAN names."""
+
+    def __init__(self, domain: str, limit: int):
+        self.domain = domain
+        self.suffix = f".{domain}"
+        self.limit = limit
+        # Min-heap of (not_before, serial, entry); the root is the oldest kept
+        self.heap: list[tuple[str, str, dict]] = []
+        self.kept_serials: set[str] = set()
+        # name -> [first_seen, last_seen] by certificate not_before
+        self.names: dict[str, list[Optional[str]]] = {}
+
+    def add(self, entry: dict) -> None:
+        seen = entry.get("not_before")
+        for name in _in_scope_names(self.suffix, entry.get("name_value", "")):
+            span = self.names.get(name)
+            if span is None:
+                self.names[name] = [seen, seen]
+            elif seen:
+                span[0] = min(span[0] or seen, seen)
+                span[1] = max(span[1] or seen, seen)
 
-    for entry in data:
         serial = entry.get("serial_number", "")
-        if serial in seen_serials:
-            continue
-        seen_serials.add(serial)
-
-        # Parse SAN entries from the name_value field
-        name_value = entry.get("name_value", "")
-        san_entries = [
-            s.strip()
-            for s in name_value.replace("\\n", "\n").split("\n")
-            if s.strip() and not s.strip().startswith("*")
+        if serial in self.kept_serials:
+            return
+        key = (entry.get("not_before") or "", serial)
+        if len(self.heap) < self.limit:
+            heapq.heappush(self.heap, (*key, entry))
+            self.kept_serials.add(serial)
+        elif key > self.heap[0][:2]:
+            # Strictly newer than the oldest kept certificate. A duplicate of
+            # an evicted serial has the same key, so it can never re-enter.
+            _, evicted, _ = heapq.heapreplace(self.heap, (*key, entry))
+            self.kept_serials.discard(evicted)
+            self.kept_serials.add(serial)
+
+    def result(self) -> CtLookup:
+        entries = sorted(self.heap, key=lambda item: item[:2], reverse=True)
+        certs = [
+            HistoricalCertificate(
+                issuer=entry.get("issuer_name"),
+                common_name=entry.get("common_name"),
+                serial_number=serial,
+                not_before=entry.get("not_before"),
+                not_after=entry.get("not_after"),
+                san_entries=_split_names(entry.get("name_value", "")),
+            )
+            for _, serial, entry in entries
+        ]
+        names = [
+            CtName(name=name, first_seen=first, last_seen=last)
+            for name, (first, last) in sorted(self.names.items())
         ]
+        return CtLookup(certificates=certs, names=names)
+
+
+async def sync_ct_index(domain: str, client: httpx.AsyncClient, index: CtIndex) -> None:
+    """
+    Bring the local index for ``domain`` up to date with crt.sh.
+
+    Skipped while the last sync is younger than ``CT_INDEX_REFRESH``. crt.sh
+    has no "newer than" filter, so the response is still streamed, but
+    entries at or below the highest crt.sh id already indexed are skipped
+    without being processed or written.
+    """
+    state = await asyncio.to_thread(index.sync_state, domain)
+    if state is not None and time.time() - state.synced_at < config.CT_INDEX_REFRESH:
+        return
+
+    known_id = state.max_cert_id if state else 0
+    max_id = known_id
+    suffix = f".{domain}"
+    certs: list[tuple] = []
+    names: list[tuple[str, Optional[str]]] = []
+
+    async with client.stream("GET", config.CRT_SH_URL, params={"q": f"%.{domain}", "output": "json"}) as resp:
+        resp.raise_for_status()
+        async for entry in iter_json_array(resp.aiter_bytes()):
+            if not isinstance(entry, dict):
+                continue
+            cert_id = entry.get("id") or 0
+            if cert_id and cert_id <= known_id:
+                continue
+            max_id = max(max_id, cert_id)
+
+            name_value = entry.get("name_value", "")
+            not_before = entry.get("not_before")
+            certs.append((
+                entry.get("serial_number", ""),
+                cert_id,
+                entry.get("issuer_name"),
+                entry.get("common_name"),
+                not_before,
+                entry.get("not_after"),
+                "\n".join(_split_names(name_value)),
+            ))
+            names.extend((name, not_before) for name in _in_scope_names(suffix, name_value))
+
+            if len(certs) >= INDEX_BATCH_SIZE:
+                await asyncio.to_thread(index.add_entries, domain, certs, names)
+                certs, names = [], []
+
+    if certs:
+        await asyncio.to_thread(index.add_entries, domain, certs, names)
+    await asyncio.to_thread(index.mark_synced, domain, max_id)
+
+
+async def _lookup_streaming(domain: str, client: httpx.AsyncClient, limit: int) -> CtLookup:
+    acc = _CtAccumulator(domain, limit)
+    async with client.stream("GET", config.CRT_SH_URL, params={"q": f"%.{domain}", "output": "json"}) as resp:
+        resp.raise_for_status()
+        async for entry in iter_json_array(resp.aiter_bytes()):
+            if isinstance(entry, dict):
+                acc.add(entry)
+    return acc.result()
+
+
+async def lookup_ct(
+    domain: str,
+    client: Optional[httpx.AsyncClient] = None,
+    limit: int = HISTORY_LIMIT,
+) -> CtLookup:
+    """Query crt.sh JSON API for certificate transparency entries."""
+    client = client or get_client("crt.sh")
+    if not config.CT_INDEX_ENABLED:
+        return await _lookup_streaming(domain, client, limit)
 
-        certs.append(HistoricalCertificate(
-            issuer=entry.get("issuer_name"),
-            common_name=entry.get("common_name"),
-            serial_number=serial,
-            not_before=entry.get("not_before"),
-            not_after=entry.get("not_after"),
-            san_entries=san_entries,
-        ))
-
-    # Sort by not_before descending (newest first), limit to 50 most recent
-    certs.sort(key=lambda c: c.not_before or "", reverse=True)
-    return certs[:50]
+    index = get_ct_index()
+    await _syncs.do(domain, lambda: sync_ct_index(domain, client, index))
+    certs = await asyncio.to_thread(index.certificates, domain, 0, limit)
+    names = await asyncio.to_thread(index.names, domain)
+    return CtLookup(certificates=certs, names=names)
@@ -0,0 +1,186 @@
+"""
+Live Subdomain Resolution — checks which discovered subdomains still resolve.
+
+Every name already found in CT logs and TLS SANs is resolved (A, AAAA,
+CNAME) through the shared resolver engine in app.resolver, so answers are
+cached for their TTL and identical queries are coalesced across scans. A
+bounded pool of workers pulls names off the list and each result is
+yielded the moment it arrives.
+
+Wildcard DNS is detected before a zone's names are judged: each parent
+zone is asked for a few random labels that cannot exist, and a name whose
+addresses all come from that wildcard answer is reported as ``wildcard``
+rather than live.
+Only discovered names are resolved. No brute-force, no permutations.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import secrets
+import time
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+from app import config
+from app.models import ResolvedName, SubdomainResolution, WildcardZone
+from app.resolver import DnsResolver, get_resolver
+from app.subdomain_trie import SubdomainTrie
+
+
+STATUSES = ("live", "dead", "wildcard", "error")
+
+
+class WildcardDetector:
+    """Wildcard answers by parent zone, probed once per zone and shared by every name under it."""
+
+    def __init__(self, resolver: DnsResolver):
+        self.resolver = resolver
+        self._zones: dict[str, asyncio.Task] = {}
+
+    async def addresses(self, zone: str) -> frozenset[str]:
+        """Addresses ``*.zone`` answers with; empty if the zone has no wildcard."""
+        task = self._zones.get(zone)
+        if task is None:
+            task = self._zones[zone] = asyncio.ensure_future(self._probe(zone))
+        # Shielded so one name's worker being cancelled does not cancel the shared probe
+        return await asyncio.shield(task)
+
+    async def _probe(self, zone: str) -> frozenset[str]:
+        # Several labels, since load-balanced wildcards rotate their answers
+        names = [f"openscope-{secrets.token_hex(6)}.{zone}" for _ in range(config.SUBDOMAIN_WILDCARD_PROBES)]
+        answers = await asyncio.gather(
+            *(self.resolver.resolve(name, rdtype) for name in names for rdtype in ("A", "AAAA")),
+            return_exceptions=True,
+        )
+        return frozenset(record for answer in answers if not isinstance(answer, Exception) for record in answer)
+
+    def wildcards(self) -> list[WildcardZone]:
+        return [
+            WildcardZone(zone=zone, addresses=sorted(task.result()))
+            for zone, task in sorted(self._zones.items())
+            if task.done() and not task.cancelled() and task.exception() is None and task.result()
+        ]
+
+    def close(self) -> None:
+        for task in self._zones.values():
+            task.cancel()
+
+
+async def resolve_name(resolver: DnsResolver, detector: WildcardDetector, name: str) -> ResolvedName:
+    """Resolve one name and classify it as live, dead, wildcard or error."""
+    a, aaaa, cname = await asyncio.gather(
+        resolver.resolve(name, "A"),
+        resolver.resolve(name, "AAAA"),
+        resolver.resolve(name, "CNAME"),
+        return_exceptions=True,
+    )
+    failures = [answer for answer in (a, aaaa, cname) if isinstance(answer, Exception)]
+    if len(failures) == 3:
+        return ResolvedName(subdomain=name, status="error", error=str(failures[0]))
+
+    addresses = [
+        record for answer in (a, aaaa) if not isinstance(answer, Exception) for record in answer
+    ]
+    target = cname[0].rstrip(".") if not isinstance(cname, Exception) and cname else None
+    if not addresses:
+        # A CNAME left pointing nowhere is dead too; the target is kept for review
+        return ResolvedName(subdomain=name, status="dead", cname=target)
+
+    wildcard = await detector.addresses(name.split(".", 1)[1])  # the parent zone
+    status = "wildcard" if wildcard and wildcard.issuperset(addresses) else "live"
+    return ResolvedName(subdomain=name, status=status, addresses=addresses, cname=target)
+
+
+async def resolve_names(
+    domain: str,
+    names: Iterable[str],
+    concurrency: Optional[int] = None,
+    detector: Optional[WildcardDetector] = None,
+) -> AsyncIterator[ResolvedName]:
+    """
+    Resolve ``names`` (subdomains of ``domain``) with at most ``concurrency``
+    in flight, yielding each result as soon as it is ready.
+
+    Names are pulled lazily, so memory stays proportional to the names in
+    flight. The domain's own wildcard is probed before any name is resolved.
+    """
+    resolver = get_resolver()
+    owned = detector is None
+    detector = detector or WildcardDetector(resolver)
+    pending = iter(names)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def _worker() -> None:
+        # Workers share the iterator; next() never yields to the loop, so each name is taken once
+        for name in pending:
+            try:
+                resolved = await resolve_name(resolver, detector, name)
+            except Exception as exc:
+                # One bad name is reported as such; it must not end the whole run
+                resolved = ResolvedName(subdomain=name, status="error", error=str(exc) or type(exc).__name__)
+            results.put_nowait(resolved)
+
+    workers: list[asyncio.Task] = []
+    try:
+        await detector.addresses(domain)
+        for _ in range(max(1, concurrency or config.SUBDOMAIN_RESOLVE_CONCURRENCY)):
+            worker = asyncio.create_task(_worker())
+            worker.add_done_callback(results.put_nowait)
+            workers.append(worker)
+
+        running = len(workers)
+        while running:
+            item = await results.get()
+            if isinstance(item, asyncio.Task):
+                running -= 1
+                if not item.cancelled() and item.exception() is not None:
+                    raise item.exception()
+                continue
+            yield item
+    finally:
+        for worker in workers:
+            worker.cancel()
+        if owned:
+            detector.close()
+
+
+async def resolve_subdomains(
+    trie: SubdomainTrie,
+    on_result: Optional[Callable[[ResolvedName], None]] = None,
+) -> SubdomainResolution:
+    """
+    Resolve the trie's names and record each result on the trie.
+
+    At most ``SUBDOMAIN_RESOLVE_MAX_NAMES`` names are resolved, within
+    ``SUBDOMAIN_RESOLVE_TIME`` seconds; the rest are counted as unchecked.
+    ``on_result(resolved)`` is called as each name resolves.
+    """
+    started = time.monotonic()
+    names = trie.names()
+    counts = dict.fromkeys(STATUSES, 0)
+    detector = WildcardDetector(get_resolver())
+    try:
+        async with asyncio.timeout(config.SUBDOMAIN_RESOLVE_TIME):
+            async for resolved in resolve_names(
+                trie.domain, names[: config.SUBDOMAIN_RESOLVE_MAX_NAMES], detector=detector
+            ):
+                trie.set_resolution(resolved)
+                counts[resolved.status] += 1
+                if on_result is not None:
+                    on_result(resolved)
+    except TimeoutError:
+        pass
+    finally:
+        detector.close()
+
+    checked = sum(counts.values())
+    return SubdomainResolution(
+        checked=checked,
+        live=counts["live"],
+        dead=counts["dead"],
+        wildcard=counts["wildcard"],
+        errors=counts["error"],
+        unchecked=len(names) - checked,
+        wildcards=detector.wildcards(),
+        elapsed_ms=round((time.monotonic() - started) * 1000, 1),
+    )
@@ -5,50 +5,32 @@ No wordlist attacks, no DNS brute forcing, no permutation generation.
 
 from __future__ import annotations
 
-from app.models import SubdomainEntry, HistoricalCertificate
+from typing import Iterable
+
+from app.models import CtName
+from app.subdomain_trie import SubdomainTrie, get_subdomain_store
 
 
 def aggregate_subdomains(
     domain: str,
-    ct_certs: list[HistoricalCertificate],
+    ct_names: Iterable[CtName],
     tls_san: list[str] | None = None,
-) -> list[SubdomainEntry]:
+) -> SubdomainTrie:
     """
     Aggregate unique subdomains from Certificate Transparency and TLS SAN entries.
     Only includes subdomains that end with the target domain.
+
+    The trie is kept in the in-memory store so the paginated subdomains
+    endpoint can serve it without rebuilding.
     """
-    seen: set[str] = set()
-    subdomains: list[SubdomainEntry] = []
-
-    # Collect from CT log entries
-    for cert in ct_certs:
-        for san in cert.san_entries:
-            name = san.strip().lower()
-            # Skip wildcards and non-matching domains
-            if name.startswith("*."):
-                name = name[2:]
-            if not name.endswith(f".{domain}") and name != domain:
-                continue
-            if name == domain:
-                continue  # Skip the root domain itself
-            if name not in seen:
-                seen.add(name)
-                subdomains.append(SubdomainEntry(subdomain=name, source="crt.sh"))
+    trie = SubdomainTrie(domain)
+
+    # Collect from CT log SAN names
+    trie.add_ct_names(ct_names)
 
     # Collect from live TLS handshake SAN entries
-    if tls_san:
-        for san in tls_san:
-            name = san.strip().lower()
-            if name.startswith("*."):
-                name = name[2:]
-            if not name.endswith(f".{domain}") and name != domain:
-                continue
-            if name == domain:
-                continue
-            if name not in seen:
-                seen.add(name)
-                subdomains.append(SubdomainEntry(subdomain=name, source="tls_handshake"))
-
-    # Sort alphabetically
-    subdomains.sort(key=lambda s: s.subdomain)
-    return subdomains
+    for san in tls_san or ():
+        trie.add(san, "tls_handshake")
+
+    get_subdomain_store().put(trie)
+    return trie
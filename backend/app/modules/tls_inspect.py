@@ -1,21 +1,31 @@
 """
-TLS Certificate Inspection — single HTTPS handshake to extract certificate metadata.
+TLS Certificate Inspection — HTTPS handshake to extract certificate metadata.
 No port scanning. Only connects to port 443.
+
+Runs natively on asyncio streams: handshakes with the domain's A/AAAA
+addresses race happy-eyeballs style and the full verified chain is captured
+(on Python 3.13+; the leaf certificate alone before that).
 """
 
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import hashlib
 import ssl
-import socket
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import zip_longest
 from typing import Optional
-from datetime import datetime
 
 from cryptography import x509
-from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, ec, dsa, ed25519, ed448
 
+from app import config
 from app.models import CertificateInfo
+from app.resolver import get_resolver
 
 
 def _get_key_info(cert: x509.Certificate) -> tuple[Optional[str], Optional[int]]:
@@ -43,50 +53,162 @@ def _extract_san(cert: x509.Certificate) -> list[str]:
         return []
 
 
-def _sync_tls_inspect(domain: str) -> CertificateInfo:
-    """Synchronous TLS handshake — will be run in thread executor."""
-    context = ssl.create_default_context()
-
-    with socket.create_connection((domain, 443), timeout=8) as sock:
-        with context.wrap_socket(sock, server_hostname=domain) as ssock:
-            tls_version = ssock.version()
-            cipher = ssock.cipher()
-            cipher_suite = cipher[0] if cipher else None
-
-            # Get the full certificate chain (DER)
-            der_cert = ssock.getpeercert(binary_form=True)
-            peer_cert = x509.load_der_x509_certificate(der_cert)
-
-            # Chain subjects
-            chain_info = []
-            # We only get the leaf cert from the socket; extract chain from ssl
-            der_chain = ssock.getpeercert(binary_form=True)
-            if der_chain:
-                leaf = x509.load_der_x509_certificate(der_chain)
-                chain_info.append(leaf.subject.rfc4514_string())
-
-                # Try getting issuer info
-                chain_info.append(leaf.issuer.rfc4514_string())
-
-            algo, key_len = _get_key_info(peer_cert)
-            san = _extract_san(peer_cert)
-
-            return CertificateInfo(
-                issuer=peer_cert.issuer.rfc4514_string(),
-                subject=peer_cert.subject.rfc4514_string(),
-                serial_number=format(peer_cert.serial_number, "X"),
-                not_before=peer_cert.not_valid_before_utc.isoformat(),
-                not_after=peer_cert.not_valid_after_utc.isoformat(),
-                san_entries=san,
-                tls_version=tls_version,
-                cipher_suite=cipher_suite,
-                public_key_algorithm=algo,
-                key_length=key_len,
-                certificate_chain=chain_info,
-            )
-
-
-async def inspect_tls(domain: str) -> CertificateInfo:
-    """Async wrapper — runs the blocking TLS handshake in a thread pool."""
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, _sync_tls_inspect, domain)
+@dataclass(frozen=True)
+class _ParsedCert:
+    issuer: str
+    subject: str
+    serial_number: str
+    not_before: str
+    not_after: str
+    san_entries: tuple[str, ...]
+    public_key_algorithm: Optional[str]
+    key_length: Optional[int]
+
+
+# Parsed certificates by SHA-256 of their DER encoding. Shared CDN and
+# intermediate certificates are parsed once per process.
+_parsed: OrderedDict[bytes, _ParsedCert] = OrderedDict()
+
+
+def _parse_der(der: bytes) -> _ParsedCert:
+    fingerprint = hashlib.sha256(der).digest()
+    parsed = _parsed.get(fingerprint)
+    if parsed is not None:
+        _parsed.move_to_end(fingerprint)
+        return parsed
+
+    cert = x509.load_der_x509_certificate(der)
+    algo, key_len = _get_key_info(cert)
+    parsed = _ParsedCert(
+        issuer=cert.issuer.rfc4514_string(),
+        subject=cert.subject.rfc4514_string(),
+        serial_number=format(cert.serial_number, "X"),
+        not_before=cert.not_valid_before_utc.isoformat(),
+        not_after=cert.not_valid_after_utc.isoformat(),
+        san_entries=tuple(_extract_san(cert)),
+        public_key_algorithm=algo,
+        key_length=key_len,
+    )
+    _parsed[fingerprint] = parsed
+    while len(_parsed) > config.TLS_PARSED_CACHE_SIZE:
+        _parsed.popitem(last=False)
+    return parsed
+
+
+def _verified_chain(ssl_object: ssl.SSLObject) -> list[bytes]:
+    """
+    DER certificates of the verified chain, leaf first.
+
+    The chain is only exposed publicly from Python 3.13; earlier versions
+    report the leaf alone.
+    """
+    if sys.version_info >= (3, 13):
+        chain = ssl_object.get_verified_chain()
+        if chain:
+            return list(chain)
+    leaf = ssl_object.getpeercert(binary_form=True)
+    return [leaf] if leaf else []
+
+
+_context: Optional[ssl.SSLContext] = None
+
+
+def _ssl_context() -> ssl.SSLContext:
+    global _context
+    if _context is None:
+        _context = ssl.create_default_context()
+        if config.TLS_CA_FILE:
+            _context.load_verify_locations(cafile=config.TLS_CA_FILE)
+    return _context
+
+
+async def _handshake(domain: str, address: str) -> CertificateInfo:
+    """One TLS handshake with ``address``, presenting ``domain`` as SNI."""
+    _, writer = await asyncio.wait_for(
+        asyncio.open_connection(
+            address, config.TLS_PORT,
+            ssl=_ssl_context(), server_hostname=domain,
+            ssl_handshake_timeout=config.TLS_TIMEOUT,
+        ),
+        timeout=config.TLS_TIMEOUT,
+    )
+    try:
+        ssl_object: ssl.SSLObject = writer.get_extra_info("ssl_object")
+        tls_version = ssl_object.version()
+        cipher = ssl_object.cipher()
+        chain = [_parse_der(der) for der in _verified_chain(ssl_object)]
+    finally:
+        writer.close()
+        with contextlib.suppress(Exception):
+            await asyncio.wait_for(writer.wait_closed(), timeout=1.0)
+
+    if not chain:
+        raise ssl.SSLError(f"{address} presented no certificate")
+    leaf = chain[0]
+    return CertificateInfo(
+        issuer=leaf.issuer,
+        subject=leaf.subject,
+        serial_number=leaf.serial_number,
+        not_before=leaf.not_before,
+        not_after=leaf.not_after,
+        san_entries=list(leaf.san_entries),
+        tls_version=tls_version,
+        cipher_suite=cipher[0] if cipher else None,
+        public_key_algorithm=leaf.public_key_algorithm,
+        key_length=leaf.key_length,
+        certificate_chain=[cert.subject for cert in chain],
+    )
+
+
+def _interleave(ipv6: list[str], ipv4: list[str]) -> list[str]:
+    """Alternate address families, IPv6 first (RFC 8305 §4)."""
+    ordered = []
+    for pair in zip_longest(ipv6, ipv4):
+        ordered.extend(address for address in pair if address)
+    return ordered
+
+
+async def inspect_tls(
+    domain: str,
+    ipv4: Optional[list[str]] = None,
+    ipv6: Optional[list[str]] = None,
+) -> CertificateInfo:
+    """
+    Inspect the certificate served for ``domain`` on port 443.
+
+    Handshakes with every A/AAAA address are started in parallel,
+    staggered by ``TLS_ATTEMPT_DELAY`` (happy eyeballs); the first to
+    complete wins and the rest are cancelled. Addresses are resolved
+    through the shared resolver when not provided.
+    """
+    if not ipv4 and not ipv6:
+        resolver = get_resolver()
+        ipv4, ipv6 = await asyncio.gather(
+            resolver.resolve(domain, "A"), resolver.resolve(domain, "AAAA")
+        )
+    addresses = _interleave(ipv6 or [], ipv4 or [])
+    if not addresses:
+        raise OSError(f"{domain} has no A/AAAA records to connect to")
+
+    attempts: list[asyncio.Task] = []
+    failures: list[BaseException] = []
+    try:
+        for i, address in enumerate(addresses):
+            attempts.append(asyncio.create_task(_handshake(domain, address)))
+            last = i == len(addresses) - 1
+            deadline = None if last else time.monotonic() + config.TLS_ATTEMPT_DELAY
+            while attempts:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break  # stagger elapsed: start the next address
+                for task in done:
+                    attempts.remove(task)
+                    if task.exception() is None:
+                        return task.result()
+                    failures.append(task.exception())
+    finally:
+        for task in attempts:
+            task.cancel()
+
+    raise failures[-1]
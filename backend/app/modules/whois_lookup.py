@@ -1,17 +1,22 @@
 """
 WHOIS Lookup — public WHOIS query to extract registrar, dates, name servers.
 Respects redacted/private fields by returning None.
+
+Queries go through the shared async WHOIS client; TLDs without a port-43
+server fall back to RDAP.
 """
 
 from __future__ import annotations
 
-import asyncio
 from datetime import datetime
 from typing import Optional
 
-import whois
+from whois.parser import PywhoisError, WhoisEntry
 
+from app import config
+from app.http_clients import get_client
 from app.models import WhoisInfo
+from app.whois_client import get_whois_client
 
 
 def _stringify_date(val) -> Optional[str]:
@@ -36,12 +41,56 @@ def _ensure_list(val) -> list[str]:
     return [str(val)]
 
 
-def _sync_whois(domain: str) -> WhoisInfo:
-    """Synchronous WHOIS lookup — runs in a thread executor."""
-    try:
-        w = whois.whois(domain)
-    except Exception:
+def _from_rdap(data: dict) -> WhoisInfo:
+    """Map an RDAP domain object onto the WHOIS fields we report."""
+    events = {e.get("eventAction"): e.get("eventDate") for e in data.get("events", [])}
+    registrar = organization = None
+    emails: list[str] = []
+    for entity in data.get("entities", []):
+        roles = entity.get("roles", [])
+        for prop in (entity.get("vcardArray") or [None, []])[1]:
+            if prop[0] == "fn" and "registrar" in roles:
+                registrar = str(prop[3])
+            elif prop[0] == "org" and "registrant" in roles:
+                organization = str(prop[3])
+            elif prop[0] == "email":
+                emails.append(str(prop[3]))
+    return WhoisInfo(
+        registrar=registrar,
+        creation_date=events.get("registration"),
+        expiration_date=events.get("expiration"),
+        updated_date=events.get("last changed"),
+        name_servers=[ns["ldhName"].lower() for ns in data.get("nameservers", []) if ns.get("ldhName")],
+        status=_ensure_list(data.get("status")),
+        organization=organization,
+        emails=emails,
+    )
+
+
+async def _lookup_rdap(domain: str) -> WhoisInfo:
+    """RDAP fallback for TLDs that publish no port-43 WHOIS server."""
+    resp = await get_client("rdap").get(config.RDAP_DOMAIN_URL.format(domain=domain))
+    if resp.status_code == 404:
         return WhoisInfo()
+    resp.raise_for_status()
+    return _from_rdap(resp.json())
+
+
+async def lookup_whois(domain: str) -> WhoisInfo:
+    """
+    Query WHOIS for ``domain`` through the shared async client.
+
+    An unregistered domain yields an empty WhoisInfo; throttling and
+    connection failures raise so they are reported as module errors.
+    """
+    response = await get_whois_client().lookup(domain)
+    if response is None:
+        return await _lookup_rdap(domain)
+
+    try:
+        w = WhoisEntry.load(domain, response.text)
+    except PywhoisError:
+        return WhoisInfo()  # "No match" / not registered
 
     return WhoisInfo(
         registrar=w.get("registrar"),
@@ -53,9 +102,3 @@ def _sync_whois(domain: str) -> WhoisInfo:
         organization=w.get("org") or w.get("organization"),
         emails=_ensure_list(w.get("emails")),
     )
-
-
-async def lookup_whois(domain: str) -> WhoisInfo:
-    """Async wrapper — runs the blocking WHOIS query in a thread pool."""
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, _sync_whois, domain)
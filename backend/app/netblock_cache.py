@@ -0,0 +1,125 @@
+"""
+Netblock Cache — RDAP IP results keyed by the network they describe.
+
+An RDAP answer for one address covers its whole registered range, so the
+result is stored against that range and reused for every later address
+inside it. Ranges are indexed by the CIDR blocks that make them up, one
+hash table per prefix length; a lookup probes the populated lengths from
+the most specific down, so nested registrations (a customer /24 inside a
+provider /16) resolve to the innermost block.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from app import config
+from app.models import AsnInfo
+
+
+@dataclass
+class _Block:
+    version: int
+    cidrs: list[tuple[int, int]]  # (prefix length, network address as int)
+    info: AsnInfo
+    expires: float
+
+
+class NetblockCache:
+    def __init__(self, max_entries: int = 10_000, ttl: float = 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Insertion/use order for LRU eviction, keyed by (version, first, last)
+        self._blocks: OrderedDict[tuple[int, int, int], _Block] = OrderedDict()
+        # (version, prefix length) -> network int -> block key
+        self._index: dict[tuple[int, int], dict[int, tuple[int, int, int]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, ip: str) -> Optional[AsnInfo]:
+        """Return the cached result for the most specific block containing ``ip``."""
+        try:
+            addr = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        value = int(addr)
+        bits = addr.max_prefixlen
+        lengths = sorted(
+            (length for version, length in self._index if version == addr.version),
+            reverse=True,
+        )
+        for length in lengths:
+            network = value >> (bits - length) << (bits - length)
+            key = self._index.get((addr.version, length), {}).get(network)
+            if key is None:
+                continue
+            block = self._blocks[key]
+            if block.expires <= time.monotonic():
+                self.expired += 1
+                self._remove(key)
+                continue
+            self._blocks.move_to_end(key)
+            self.hits += 1
+            return block.info
+        self.misses += 1
+        return None
+
+    def put(self, first: str, last: str, info: AsnInfo) -> None:
+        """Cache ``info`` for every address from ``first`` to ``last`` inclusive."""
+        try:
+            start, end = ipaddress.ip_address(first), ipaddress.ip_address(last)
+            networks = list(ipaddress.summarize_address_range(start, end))
+        except (ValueError, TypeError):
+            return
+        key = (start.version, int(start), int(end))
+        if key in self._blocks:
+            self._remove(key)
+        block = _Block(
+            version=start.version,
+            cidrs=[(net.prefixlen, int(net.network_address)) for net in networks],
+            info=info,
+            expires=time.monotonic() + self.ttl,
+        )
+        self._blocks[key] = block
+        for length, network in block.cidrs:
+            self._index.setdefault((block.version, length), {})[network] = key
+        while len(self._blocks) > self.max_entries:
+            self._remove(next(iter(self._blocks)))
+            self.evictions += 1
+
+    def _remove(self, key: tuple[int, int, int]) -> None:
+        block = self._blocks.pop(key)
+        for length, network in block.cidrs:
+            table = self._index.get((block.version, length))
+            if table is not None and table.get(network) == key:
+                del table[network]
+                if not table:
+                    del self._index[(block.version, length)]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._blocks),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+
+_cache: Optional[NetblockCache] = None
+
+
+def get_netblock_cache() -> NetblockCache:
+    """Return the process-wide netblock cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = NetblockCache(config.NETBLOCK_CACHE_SIZE, config.NETBLOCK_CACHE_TTL)
+    return _cache
@@ -0,0 +1,249 @@
+"""
+Domain Normalizer — turns user input into canonical domain names.
+
+``normalize_domain`` strips schemes, credentials, paths and ports, converts
+internationalized names to their IDNA (punycode) form and validates the
+result against precompiled patterns. ``LineNormalizer`` runs it over a
+stream of lines and drops duplicates, for batch imports of millions of
+names; ``normalize_lines`` and the ``/normalize`` endpoint both use it.
+
+The Public Suffix List is loaded into a trie keyed by reversed label, so
+the registrable domain of ``www.foo.co.uk`` (``foo.co.uk``) is found by
+walking a few dict lookups. Its ICANN section covers suffixes sold by
+registries, which is what WHOIS knows about; the private section adds
+suffixes such as ``github.io`` whose subdomains belong to different
+owners.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+import idna
+
+from app import config
+
+
+_SCHEME = re.compile(r"^[a-z][a-z0-9+.-]*://", re.IGNORECASE)
+_HOST_END = re.compile(r"[/?#]")
+_HOSTNAME = re.compile(r"(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+(?:[a-z]{2,63}|xn--[a-z0-9-]{1,59})")
+
+MAX_LENGTH = 253
+
+
+def normalize_domain(value: str) -> str:
+    """
+    Canonical ASCII form of a domain typed or pasted by a user.
+
+    Accepts URLs (``https://user@Bücher.example:8443/path``), trailing dots
+    and Unicode names; raises ValueError for anything that is not a
+    hostname with at least two labels.
+    """
+    host = value.strip()
+    if "://" in host:
+        host = _SCHEME.sub("", host, count=1)
+    host = _HOST_END.split(host, 1)[0]
+    host = host.rpartition("@")[2].partition(":")[0].rstrip(".").lower()
+    if not host.isascii():
+        try:
+            host = idna.encode(host, uts46=True).decode("ascii")
+        except idna.IDNAError as exc:
+            raise ValueError(f"Invalid domain format: {host} ({exc})") from None
+    if len(host) > MAX_LENGTH or not _HOSTNAME.fullmatch(host):
+        raise ValueError(f"Invalid domain format: {host}")
+    return host
+
+
+# ── Public Suffix List ────────────────────────────────────────────────────────
+
+_RULE = 1
+_EXCEPTION = 2
+
+
+class _Node:
+    __slots__ = ("children", "rule", "icann")
+
+    def __init__(self):
+        self.children: Optional[dict[str, _Node]] = None
+        self.rule = 0  # _RULE or _EXCEPTION when a rule ends at this label
+        self.icann = False
+
+
+def _ascii_label(label: str) -> str:
+    # List entries are already lowercase NFC, so plain punycode gives their IDNA form
+    return label if label.isascii() else "xn--" + label.encode("punycode").decode("ascii")
+
+
+class PublicSuffixList:
+    def __init__(self, lines: Iterable[str]):
+        self.root = _Node()
+        self.rules = 0
+        icann = True
+        for line in lines:
+            line = line.strip()
+            if line.startswith("// ===BEGIN PRIVATE DOMAINS==="):
+                icann = False
+            if not line or line.startswith("//"):
+                continue
+            rule = line.split()[0]
+            exception = rule.startswith("!")
+            node = self.root
+            for label in reversed(rule.lstrip("!").split(".")):
+                if node.children is None:
+                    node.children = {}
+                label = _ascii_label(label)
+                child = node.children.get(label)
+                if child is None:
+                    child = node.children[label] = _Node()
+                node = child
+            node.rule = _EXCEPTION if exception else _RULE
+            node.icann = icann
+            self.rules += 1
+
+    @classmethod
+    def load(cls, path: Path) -> "PublicSuffixList":
+        with open(path, encoding="utf-8") as f:
+            return cls(f)
+
+    def suffix_length(self, labels: list[str], private: bool = True) -> int:
+        """
+        Number of trailing ``labels`` that form the public suffix.
+
+        Follows the list's algorithm: the longest matching rule wins, an
+        exception rule removes its leftmost label, and an unlisted TLD is a
+        suffix of its own. ``private=False`` ignores the private section.
+        """
+        length = 1
+        node = self.root
+        for depth, label in enumerate(reversed(labels), 1):
+            children = node.children
+            if not children:
+                break
+            child = children.get(label)
+            if child is not None and child.rule == _EXCEPTION and (private or child.icann):
+                return depth - 1
+            wildcard = children.get("*")
+            if wildcard is not None and wildcard.rule == _RULE and (private or wildcard.icann):
+                length = depth
+            if child is None:
+                break
+            if child.rule == _RULE and (private or child.icann):
+                length = depth
+            node = child
+        return length
+
+    def public_suffix(self, name: str, private: bool = True) -> str:
+        labels = name.split(".")
+        return ".".join(labels[-self.suffix_length(labels, private):])
+
+    def registrable_domain(self, name: str, private: bool = True) -> Optional[str]:
+        """The public suffix plus one label (``foo.co.uk``); None if ``name`` is itself a suffix."""
+        labels = name.split(".")
+        length = self.suffix_length(labels, private)
+        if len(labels) <= length:
+            return None
+        return ".".join(labels[-length - 1:])
+
+
+_psl: Optional[PublicSuffixList] = None
+
+
+def get_public_suffix_list() -> PublicSuffixList:
+    """Return the process-wide list loaded from ``PSL_PATH``, loading it on first use."""
+    global _psl
+    if _psl is None:
+        _psl = PublicSuffixList.load(config.PSL_PATH)
+    return _psl
+
+
+def registrable_domain(name: str, private: bool = True) -> Optional[str]:
+    """Registrable domain of a normalized ``name`` (see ``PublicSuffixList.registrable_domain``)."""
+    return get_public_suffix_list().registrable_domain(name, private)
+
+
+# ── Bulk ──────────────────────────────────────────────────────────────────────
+
+@dataclass
+class NormalizeStats:
+    lines: int = 0
+    valid: int = 0  # unique domains yielded
+    invalid: int = 0
+    duplicates: int = 0
+
+
+class NormalizedLine(NamedTuple):
+    index: int  # line number in the input, from 0
+    input: str
+    domain: Optional[str]  # None when the line is invalid
+    registrable: Optional[str]
+    public_suffix: Optional[str]
+    error: Optional[str]
+
+
+class LineNormalizer:
+    """
+    Normalize-and-deduplicate state for one stream of input lines.
+
+    ``feed`` takes lines one at a time, so synchronous and streaming
+    callers share the same logic. With ``registrable`` names are reduced to
+    their registrable domain before deduplication, so ``www.foo.co.uk`` and
+    ``mail.foo.co.uk`` collapse into ``foo.co.uk``. Memory grows with the
+    number of unique domains only.
+    """
+
+    def __init__(self, registrable: bool = False, stats: Optional[NormalizeStats] = None):
+        self.registrable = registrable
+        self.stats = stats if stats is not None else NormalizeStats()
+        self._psl = get_public_suffix_list()
+        self._seen: set[str] = set()
+
+    def _split(self, domain: str) -> tuple[Optional[str], str]:
+        """``(registrable domain, public suffix)`` of a normalized name."""
+        labels = domain.split(".")
+        length = self._psl.suffix_length(labels)
+        parent = ".".join(labels[-length - 1:]) if len(labels) > length else None
+        return parent, ".".join(labels[-length:])
+
+    def feed(self, line: str) -> Optional[NormalizedLine]:
+        """The line's result; None if it repeats a domain already seen."""
+        stats = self.stats
+        index = stats.lines
+        stats.lines += 1
+        try:
+            domain = normalize_domain(line)
+        except ValueError as exc:
+            stats.invalid += 1
+            return NormalizedLine(index, line, None, None, None, str(exc))
+        split = None
+        if self.registrable:
+            split = self._split(domain)
+            domain = split[0] or domain
+        if domain in self._seen:
+            stats.duplicates += 1
+            return None
+        self._seen.add(domain)
+        stats.valid += 1
+        # Suffixes are only worked out once per unique domain unless needed for deduplication
+        registrable, suffix = split or self._split(domain)
+        return NormalizedLine(index, line, domain, registrable, suffix, None)
+
+
+def normalize_lines(
+    lines: Iterable[str],
+    registrable: bool = False,
+    stats: Optional[NormalizeStats] = None,
+) -> Iterator[NormalizedLine]:
+    """
+    Normalize and deduplicate ``lines`` (see ``LineNormalizer``).
+
+    Each domain is yielded once, at its first occurrence; invalid lines are
+    yielded with ``domain`` None and the reason in ``error``.
+    """
+    normalizer = LineNormalizer(registrable, stats)
+    for line in lines:
+        result = normalizer.feed(line)
+        if result is not None:
+            yield result
@@ -0,0 +1,156 @@
+"""
+Module Pipeline — dependency-aware scheduler for scan modules.
+
+Each module declares the inputs it needs as ``"module"`` or
+``"module.attribute"`` paths (e.g. ASN needs ``"dns.A"``). Every module
+starts the moment its dependencies resolve, and the scheduler records a
+timeline from which the critical path of the scan is derived. An optional
+budget bounds the whole run; modules still unfinished when it runs out are
+cancelled and reported as pending.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from app.models import ModuleTiming, ScanTimeline
+
+
+@dataclass(frozen=True)
+class ModuleSpec:
+    """A schedulable unit: ``run`` receives a dict of its resolved inputs."""
+
+    name: str
+    run: Callable[[dict[str, Any]], Awaitable[Any]]
+    inputs: tuple[str, ...] = ()
+
+    @property
+    def deps(self) -> tuple[str, ...]:
+        return tuple(dict.fromkeys(path.split(".", 1)[0] for path in self.inputs))
+
+
+def _resolve(path: str, results: dict[str, Any]) -> Any:
+    module, _, attr = path.partition(".")
+    value = results[module]
+    return getattr(value, attr) if attr else value
+
+
+def _check_graph(specs: list[ModuleSpec]) -> None:
+    """Reject unknown dependencies and cycles before anything is started."""
+    by_name = {spec.name: spec for spec in specs}
+    for spec in specs:
+        for dep in spec.deps:
+            if dep not in by_name:
+                raise ValueError(f"Module '{spec.name}' depends on unknown module '{dep}'")
+
+    visiting: set[str] = set()
+    done: set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle involving module '{name}'")
+        visiting.add(name)
+        for dep in by_name[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for spec in specs:
+        visit(spec.name)
+
+
+def critical_path(timings: dict[str, ModuleTiming]) -> list[str]:
+    """Follow the blocking dependency chain back from the last module to finish."""
+    if not timings:
+        return []
+    name: Optional[str] = max(timings.values(), key=lambda t: t.end_ms).module
+    path: list[str] = []
+    while name is not None:
+        path.append(name)
+        name = timings[name].blocked_by
+    return path[::-1]
+
+
+async def run_pipeline(
+    specs: list[ModuleSpec],
+    on_result: Optional[Callable[[str, Any], None]] = None,
+    budget: Optional[float] = None,
+) -> tuple[dict[str, Any], ScanTimeline]:
+    """
+    Run ``specs`` as a DAG and return ``(results_by_module, timeline)``.
+
+    ``on_result(name, value)`` fires as each module completes. An exception
+    from any module cancels the rest and propagates. After ``budget``
+    seconds the modules still running or waiting are cancelled: they are
+    missing from the results and their timings have status ``pending``.
+    """
+    _check_graph(specs)
+    t0 = time.monotonic()
+    results: dict[str, Any] = {}
+    timings: dict[str, ModuleTiming] = {}
+    started: dict[str, tuple[float, Optional[str]]] = {}  # module -> (start_ms, blocked_by)
+    tasks: dict[str, asyncio.Task] = {}
+
+    def _ms() -> float:
+        return round((time.monotonic() - t0) * 1000, 1)
+
+    async def _run(spec: ModuleSpec) -> Any:
+        blocked_by = None
+        if spec.deps:
+            # asyncio.wait (not gather) so a dependent never cancels its deps
+            await asyncio.wait([tasks[dep] for dep in spec.deps])
+            for dep in spec.deps:
+                tasks[dep].result()  # re-raise a failed dependency
+            blocked_by = max(spec.deps, key=lambda dep: timings[dep].end_ms)
+
+        start = _ms()
+        started[spec.name] = (start, blocked_by)
+        value = await spec.run({path: _resolve(path, results) for path in spec.inputs})
+        end = _ms()
+
+        results[spec.name] = value
+        timings[spec.name] = ModuleTiming(
+            module=spec.name,
+            start_ms=start,
+            end_ms=end,
+            duration_ms=round(end - start, 1),
+            blocked_by=blocked_by,
+        )
+        if on_result is not None:
+            on_result(spec.name, value)
+        return value
+
+    # Create every task before any of them runs so dependents can find theirs
+    for spec in specs:
+        tasks[spec.name] = asyncio.ensure_future(_run(spec))
+    try:
+        done, _ = await asyncio.wait(tasks.values(), timeout=budget, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+    total = _ms()
+    for spec in specs:
+        if spec.name not in timings:
+            start, blocked_by = started.get(spec.name, (total, None))
+            timings[spec.name] = ModuleTiming(
+                module=spec.name,
+                start_ms=start,
+                end_ms=total,
+                duration_ms=round(total - start, 1),
+                blocked_by=blocked_by,
+                status="pending",
+            )
+    return results, ScanTimeline(
+        total_ms=total,
+        critical_path=critical_path(timings),
+        modules=[timings[spec.name] for spec in specs],
+    )
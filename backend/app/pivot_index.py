@@ -0,0 +1,281 @@
+"""
+Pivot Index — which scanned domains share an IP, netblock, ASN, nameserver,
+certificate or registrar.
+
+Every scan adds its infrastructure values to an inverted index, one row
+per (kind, value, domain), so "who else is on 203.0.113.7" or "who else
+uses this certificate" is a single index lookup instead of re-scanning and
+comparing every domain.
+
+A scan replaces the domain's values of a kind only when every module that
+feeds the kind succeeded; otherwise its values are added and the old ones
+kept, so an upstream outage does not drop the domain from its pivots.
+
+Addresses and netblocks also store their address range (16-byte
+big-endian, IPv4 mapped into ``::ffff:0:0/96``) so CIDR queries are range
+scans: the IPs inside a block, or the netblocks containing an address.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from app import config
+from app.models import DomainPivots, PivotMatch, PivotValue
+
+
+# Pivot kinds and the modules whose results feed each
+KIND_MODULES: dict[str, tuple[str, ...]] = {
+    "ip": ("dns",),
+    "netblock": ("asn",),
+    "asn": ("asn",),
+    "ns": ("dns", "whois"),
+    "cert_serial": ("tls", "ct"),
+    "san": ("tls", "ct"),
+    "registrar": ("whois",),
+}
+
+# Kinds whose values carry an address range
+RANGE_KINDS = ("ip", "netblock")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pivots (
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    lo BLOB,
+    hi BLOB,
+    PRIMARY KEY (kind, value, domain)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pivots_domain ON pivots (domain, kind);
+CREATE INDEX IF NOT EXISTS pivots_range ON pivots (kind, lo) WHERE lo IS NOT NULL;
+"""
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+# ── Values ────────────────────────────────────────────────────────────────────
+
+def _packed(address: ipaddress.IPv4Address | ipaddress.IPv6Address) -> bytes:
+    if address.version == 4:
+        return b"\0" * 10 + b"\xff\xff" + address.packed
+    return address.packed
+
+
+def address_range(value: str) -> Optional[tuple[bytes, bytes]]:
+    """``(lo, hi)`` of an address, a CIDR or a ``first - last`` range; None otherwise."""
+    value = value.strip()
+    try:
+        if " - " in value:
+            first, last = (ipaddress.ip_address(part.strip()) for part in value.split(" - ", 1))
+            return _packed(first), _packed(last)
+        if "/" in value:
+            network = ipaddress.ip_network(value, strict=False)
+            return _packed(network.network_address), _packed(network.broadcast_address)
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return None
+    return _packed(address), _packed(address)
+
+
+def normalize(kind: str, value: str) -> str:
+    """Canonical form of a pivot value, so the same thing from different sources matches."""
+    value = value.strip()
+    if kind in ("ns", "san"):
+        return value.lower().rstrip(".")
+    if kind == "cert_serial":
+        # crt.sh gives lowercase hex with leading zeros, the TLS module uppercase without
+        return value.replace(":", "").upper().lstrip("0") or "0"
+    if kind == "asn":
+        return value.upper() if value.upper().startswith("AS") else f"AS{value}"
+    if kind == "ip":
+        try:
+            return str(ipaddress.ip_address(value))
+        except ValueError:
+            return value
+    if kind == "registrar":
+        return value.lower()
+    return value
+
+
+def _values(kind: str, module: str, result: Any) -> Iterator[str]:
+    """Raw pivot values of ``kind`` in one module's result."""
+    if kind == "ip" and module == "dns":
+        yield from result.A
+        yield from result.AAAA
+    elif kind == "ns" and module == "dns":
+        yield from result.NS
+    elif kind == "ns" and module == "whois":
+        yield from result.name_servers
+    elif kind == "registrar" and module == "whois":
+        if result.registrar:
+            yield result.registrar
+    elif kind == "asn" and module == "asn":
+        if result.asn:
+            yield result.asn
+    elif kind == "netblock" and module == "asn":
+        if result.netblock:
+            yield result.netblock
+    elif kind == "cert_serial" and module == "tls":
+        if result.serial_number:
+            yield result.serial_number
+    elif kind == "san" and module == "tls":
+        yield from result.san_entries
+    elif kind in ("cert_serial", "san") and module == "ct":
+        for cert in result.certificates:
+            if kind == "san":
+                yield from cert.san_entries
+            elif cert.serial_number:
+                yield cert.serial_number
+
+
+def extract(results: dict[str, Any]) -> dict[str, tuple[set[str], bool]]:
+    """
+    Pivot values by kind from module results (by module name), each with
+    whether every module feeding the kind contributed.
+    """
+    pivots: dict[str, tuple[set[str], bool]] = {}
+    for kind, modules in KIND_MODULES.items():
+        present = [module for module in modules if results.get(module) is not None]
+        if not present:
+            continue
+        values = {
+            normalize(kind, raw)
+            for module in present
+            for raw in _values(kind, module, results[module])
+            if raw and raw.strip()
+        }
+        pivots[kind] = (values, len(present) == len(modules))
+    return pivots
+
+
+# ── Index ─────────────────────────────────────────────────────────────────────
+
+class PivotIndex:
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def record(self, domain: str, scanned_at: float, results: dict[str, Any]) -> None:
+        """Index one scan's module results (by module name) for ``domain``."""
+        pivots = extract(results)
+        if not pivots:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for kind, (values, complete) in pivots.items():
+                    if complete:
+                        known = {row[0] for row in conn.execute(
+                            "SELECT value FROM pivots WHERE domain = ? AND kind = ?", (domain, kind)
+                        )}
+                        conn.executemany(
+                            "DELETE FROM pivots WHERE kind = ? AND value = ? AND domain = ?",
+                            [(kind, value, domain) for value in known - values],
+                        )
+                    rows = []
+                    for value in values:
+                        bounds = address_range(value) if kind in RANGE_KINDS else None
+                        rows.append((kind, value, domain, scanned_at, scanned_at, *(bounds or (None, None))))
+                    conn.executemany(
+                        "INSERT INTO pivots (kind, value, domain, first_seen, last_seen, lo, hi)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                        " ON CONFLICT (kind, value, domain) DO UPDATE SET last_seen = excluded.last_seen",
+                        rows,
+                    )
+
+    def _where(self, kind: str, value: str) -> tuple[str, tuple]:
+        """
+        Condition selecting the rows a query matches.
+
+        An IP query with a CIDR or range matches the addresses inside it; a
+        netblock query with an address, CIDR or range matches the netblocks
+        overlapping it (prefixes either nest or are disjoint). Anything else
+        is an exact match on the normalized value.
+        """
+        if kind in RANGE_KINDS:
+            bounds = address_range(value)
+            if bounds is not None and (kind == "netblock" or bounds[0] != bounds[1]):
+                lo, hi = bounds
+                if kind == "ip":
+                    return "kind = ? AND lo BETWEEN ? AND ?", (kind, lo, hi)
+                return "kind = ? AND lo <= ? AND hi >= ?", (kind, hi, lo)
+        return "kind = ? AND value = ?", (kind, normalize(kind, value))
+
+    def count(self, kind: str, value: str) -> int:
+        where, params = self._where(kind, value)
+        with self._lock:
+            return self._connect().execute(f"SELECT count(*) FROM pivots WHERE {where}", params).fetchone()[0]
+
+    def lookup(self, kind: str, value: str, offset: int = 0, limit: int = 50) -> list[PivotMatch]:
+        """Domains matching ``value``, most recently seen first."""
+        where, params = self._where(kind, value)
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT domain, value, first_seen, last_seen FROM pivots WHERE {where}"
+                " ORDER BY last_seen DESC, domain LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [
+            PivotMatch(domain=domain, value=match, first_seen=_iso(first_seen), last_seen=_iso(last_seen))
+            for domain, match, first_seen, last_seen in rows
+        ]
+
+    def domain_pivots(self, domain: str) -> Optional[DomainPivots]:
+        """Every pivot value of ``domain`` with how many domains share it; None if not indexed."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT p.kind, p.value, p.first_seen, p.last_seen,"
+                " (SELECT count(*) FROM pivots q WHERE q.kind = p.kind AND q.value = p.value)"
+                " FROM pivots p WHERE p.domain = ? ORDER BY p.kind, p.value",
+                (domain,),
+            ).fetchall()
+        if not rows:
+            return None
+        return DomainPivots(domain=domain, pivots=[
+            PivotValue(kind=kind, value=value, domains=domains, first_seen=_iso(first_seen), last_seen=_iso(last_seen))
+            for kind, value, first_seen, last_seen, domains in rows
+        ])
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._connect().execute("SELECT kind, count(*) FROM pivots GROUP BY kind").fetchall())
+        return {kind: counts.get(kind, 0) for kind in KIND_MODULES}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_index: Optional[PivotIndex] = None
+
+
+def get_pivot_index() -> PivotIndex:
+    """Return the process-wide pivot index, opening it on first use."""
+    global _index
+    if _index is None:
+        _index = PivotIndex(config.PIVOT_INDEX_PATH)
+    return _index
@@ -0,0 +1,120 @@
+"""
+SQLite Rate-Limit Storage — ``sqlite:///path`` as the limiter's ``storage_uri``.
+
+The default ``memory://`` storage counts per process, so with several
+uvicorn workers each one allows the full limit. This storage keeps the
+fixed-window counters slowapi uses in a SQLite file shared by every
+process on the host. Deployments spanning hosts should point
+``OPENSCOPE_RATE_LIMIT_STORAGE_URI`` at ``redis://`` instead.
+
+Importing this module registers the ``sqlite`` scheme with ``limits``.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from limits.storage import Storage
+
+
+PURGE_EVERY = 1000  # increments between sweeps of lapsed windows
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    key TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def sqlite_path(uri: str) -> Path:
+    """Path of a ``sqlite:///relative`` or ``sqlite:////absolute`` URI."""
+    scheme, sep, path = uri.partition(":///")
+    if scheme != "sqlite" or not sep or not path:
+        raise ValueError(f"Expected sqlite:///path, got {uri!r}")
+    return Path(path)
+
+
+class SQLiteStorage(Storage):
+    """Fixed-window counters in SQLite (moving-window strategies are not supported)."""
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        self.path = sqlite_path(uri)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self) -> type[Exception]:
+        return sqlite3.Error
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._writes += 1
+                if self._writes % PURGE_EVERY == 0:
+                    conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+                # A lapsed window starts over at ``amount``
+                return conn.execute(
+                    "INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?)"
+                    " ON CONFLICT (key) DO UPDATE SET"
+                    " count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END,"
+                    " expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END"
+                    " RETURNING count",
+                    (key, amount, now + expiry, now, now),
+                ).fetchone()[0]
+
+    def _row(self, key: str) -> Optional[tuple[int, float]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT count, expires_at FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+        return row if row and row[1] > time.time() else None
+
+    def get(self, key: str) -> int:
+        row = self._row(key)
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        row = self._row(key)
+        return row[1] if row else time.time()
+
+    def check(self) -> bool:
+        try:
+            with self._lock:
+                self._connect().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
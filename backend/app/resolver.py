@@ -0,0 +1,293 @@
+"""
+DNS Resolver Engine — one long-lived async resolver shared by every module.
+
+Answers are cached per (name, rdtype) for their record TTL, NXDOMAIN and
+empty answers are cached negatively, identical in-flight queries are
+shared, and each query is hedged across the configured nameservers: the
+fastest one is asked first and the next is raced in if it has not answered
+within ``DNS_HEDGE_DELAY``. Nameservers whose circuit breaker is open
+(they kept timing out) are left out of the race until a trial query
+succeeds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import dns.asyncresolver
+import dns.exception
+import dns.rdatatype
+import dns.resolver
+
+from app import config
+from app.breakers import CircuitOpen, get_breaker
+
+
+class DnsError(Exception):
+    """Every nameserver failed to answer (SERVFAIL, refused, malformed, ...)."""
+
+
+class DnsTimeout(DnsError):
+    """Every nameserver timed out."""
+
+
+def _outage(exc: BaseException) -> Optional[bool]:
+    """Only timeouts count against a nameserver; SERVFAIL and the like are usually the domain's fault."""
+    return True if isinstance(exc, DnsTimeout) else None
+
+
+@dataclass
+class NameserverStats:
+    queries: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    hedged_out: int = 0  # cancelled because another nameserver answered first
+    latency_ms: Optional[float] = None  # exponentially weighted moving average
+
+    def record(self, elapsed: float, outcome: str) -> None:
+        self.queries += 1
+        if outcome == "timeout":
+            self.timeouts += 1
+        elif outcome == "error":
+            self.errors += 1
+        else:
+            if outcome == "hedged_out":
+                # Elapsed time is only a lower bound, but it still ranks the
+                # slower server behind the one that won the race
+                self.hedged_out += 1
+            ms = elapsed * 1000
+            self.latency_ms = ms if self.latency_ms is None else 0.8 * self.latency_ms + 0.2 * ms
+
+
+@dataclass
+class _CacheStats:
+    hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+
+
+@dataclass
+class _Entry:
+    expires: float
+    records: list[str] = field(default_factory=list)
+
+
+def _negative_ttl(exc: dns.exception.DNSException) -> float:
+    """TTL for a negative answer: the SOA minimum from the authority section, if any."""
+    responses = []
+    if isinstance(exc, dns.resolver.NXDOMAIN):
+        responses = list(exc.responses().values())
+    elif isinstance(exc, dns.resolver.NoAnswer) and exc.kwargs.get("response") is not None:
+        responses = [exc.kwargs["response"]]
+    for response in responses:
+        for rrset in response.authority:
+            if rrset.rdtype == dns.rdatatype.SOA and len(rrset):
+                return min(rrset.ttl, rrset[0].minimum, config.DNS_MAX_TTL)
+    return config.DNS_NEGATIVE_TTL
+
+
+class DnsResolver:
+    def __init__(
+        self,
+        nameservers: list[str],
+        port: int = 53,
+        timeout: float = 5.0,
+        hedge_delay: float = 0.25,
+        cache_size: int = 20_000,
+    ):
+        self.nameservers = list(nameservers)
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.cache_size = cache_size
+        self._resolvers: dict[str, dns.asyncresolver.Resolver] = {}
+        for ns in self.nameservers:
+            resolver = dns.asyncresolver.Resolver(configure=False)
+            resolver.nameservers = [ns]
+            resolver.port = port
+            resolver.timeout = timeout
+            resolver.lifetime = timeout
+            self._resolvers[ns] = resolver
+        self._cache: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self._inflight: dict[tuple[str, str], asyncio.Task] = {}
+        self.ns_stats = {ns: NameserverStats() for ns in self.nameservers}
+        self.cache_stats = _CacheStats()
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    async def resolve(self, name: str, rdtype: str) -> list[str]:
+        """
+        Return the text form of every record of ``rdtype`` for ``name``.
+
+        An empty list means NXDOMAIN or no records of that type. Raises
+        DnsTimeout / DnsError when no nameserver produced an answer.
+        """
+        key = (name.lower().rstrip("."), rdtype.upper())
+
+        entry = self._cache.get(key)
+        if entry is not None:
+            if entry.expires > time.monotonic():
+                self._cache.move_to_end(key)
+                if entry.records:
+                    self.cache_stats.hits += 1
+                else:
+                    self.cache_stats.negative_hits += 1
+                return list(entry.records)
+            del self._cache[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.cache_stats.misses += 1
+            task = asyncio.ensure_future(self._fetch(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.cache_stats.coalesced += 1
+        # Shielded so one caller giving up does not cancel the shared query
+        return list(await asyncio.shield(task))
+
+    async def resolve_first(self, name: str, rdtype: str = "A") -> Optional[str]:
+        """Return the first record for ``name`` or None, swallowing resolution failures."""
+        try:
+            records = await self.resolve(name, rdtype)
+        except DnsError:
+            return None
+        return records[0] if records else None
+
+    def stats(self) -> dict:
+        return {
+            "cache": {
+                "entries": len(self._cache),
+                **self.cache_stats.__dict__,
+            },
+            "nameservers": {
+                ns: {
+                    **s.__dict__,
+                    "latency_ms": round(s.latency_ms, 1) if s.latency_ms is not None else None,
+                }
+                for ns, s in self.ns_stats.items()
+            },
+        }
+
+    # ── Internals ────────────────────────────────────────────────────────────
+
+    async def _fetch(self, key: tuple[str, str]) -> list[str]:
+        records, ttl = await self._query(*key)
+        self._store(key, records, ttl)
+        return records
+
+    def _store(self, key: tuple[str, str], records: list[str], ttl: float) -> None:
+        if ttl <= 0:
+            return
+        self._cache[key] = _Entry(expires=time.monotonic() + ttl, records=records)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _ordered_nameservers(self) -> list[str]:
+        """
+        Fastest healthy nameserver first; untried ones keep their configured order.
+
+        Nameservers behind an open breaker are skipped.
+        """
+        def rank(ns: str):
+            s = self.ns_stats[ns]
+            failure_rate = (s.errors + s.timeouts) / s.queries if s.queries else 0.0
+            return (failure_rate > 0.5, s.latency_ms if s.latency_ms is not None else 0.0)
+        available = [ns for ns in self.nameservers if get_breaker(f"dns:{ns}").available]
+        return sorted(available, key=rank)
+
+    async def _ask(self, ns: str, name: str, rdtype: str) -> tuple[list[str], float]:
+        try:
+            with get_breaker(f"dns:{ns}").guard(_outage):
+                return await self._ask_nameserver(ns, name, rdtype)
+        except CircuitOpen as exc:
+            raise DnsError(str(exc)) from exc
+
+    async def _ask_nameserver(self, ns: str, name: str, rdtype: str) -> tuple[list[str], float]:
+        started = time.monotonic()
+        try:
+            answer = await self._resolvers[ns].resolve(name, rdtype, raise_on_no_answer=True)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as exc:
+            self.ns_stats[ns].record(time.monotonic() - started, "ok")
+            return [], _negative_ttl(exc)
+        except asyncio.CancelledError:
+            self.ns_stats[ns].record(time.monotonic() - started, "hedged_out")
+            raise
+        except dns.exception.Timeout:
+            self.ns_stats[ns].record(time.monotonic() - started, "timeout")
+            raise DnsTimeout(f"{ns} timed out resolving {name} {rdtype}")
+        except dns.exception.DNSException as exc:
+            self.ns_stats[ns].record(time.monotonic() - started, "error")
+            raise DnsError(f"{ns} failed resolving {name} {rdtype}: {exc}") from exc
+        self.ns_stats[ns].record(time.monotonic() - started, "ok")
+        records = [rdata.to_text() for rdata in answer]
+        return records, min(answer.rrset.ttl, config.DNS_MAX_TTL)
+
+    async def _query(self, name: str, rdtype: str) -> tuple[list[str], float]:
+        """Hedged query: launch the next nameserver after each hedge delay; first answer wins."""
+        order = self._ordered_nameservers()
+        tasks: list[asyncio.Task] = []
+        failures: list[Exception] = []
+        try:
+            for i, ns in enumerate(order):
+                tasks.append(asyncio.create_task(self._ask(ns, name, rdtype)))
+                last = i == len(order) - 1
+                result = await self._first_answer(tasks, failures, None if last else self.hedge_delay)
+                if result is not None:
+                    return result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if not order:
+            raise DnsError(f"No nameserver available for {name} {rdtype}: every circuit is open")
+        if failures and all(isinstance(f, DnsTimeout) for f in failures):
+            raise DnsTimeout(f"All nameservers timed out resolving {name} {rdtype}")
+        raise DnsError(f"No nameserver answered {name} {rdtype}: {failures[-1] if failures else ''}")
+
+    @staticmethod
+    async def _first_answer(
+        tasks: list[asyncio.Task],
+        failures: list[Exception],
+        wait: Optional[float],
+    ) -> Optional[tuple[list[str], float]]:
+        """
+        Wait up to ``wait`` seconds (until all finish if None) for a task to answer.
+
+        Failed tasks are moved to ``failures``; returns the first answer or None.
+        """
+        deadline = None if wait is None else time.monotonic() + wait
+        while tasks:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                return None
+            for task in done:
+                tasks.remove(task)
+                exc = task.exception()
+                if exc is None:
+                    return task.result()
+                failures.append(exc)
+        return None
+
+
+_resolver: Optional[DnsResolver] = None
+
+
+def get_resolver() -> DnsResolver:
+    """Return the process-wide resolver, creating it on first use."""
+    global _resolver
+    if _resolver is None:
+        _resolver = DnsResolver(
+            config.DNS_NAMESERVERS,
+            port=config.DNS_PORT,
+            timeout=config.DNS_TIMEOUT,
+            hedge_delay=config.DNS_HEDGE_DELAY,
+            cache_size=config.DNS_CACHE_SIZE,
+        )
+    return _resolver
@@ -0,0 +1,71 @@
+"""
+Fast JSON Responses — models serialized straight to bytes, compressed on demand.
+
+Responses are encoded by pydantic-core's serializer in one pass into a
+single buffer, skipping the ``jsonable_encoder`` → ``dict`` → ``json.dumps``
+round trip FastAPI performs for returned models. Bodies larger than
+``RESPONSE_COMPRESS_MIN_SIZE`` are compressed with brotli (when the
+optional ``brotli`` package is installed) or gzip, whichever the client
+accepts.
+"""
+
+from __future__ import annotations
+
+import gzip
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from app import config
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+def _accepted_encodings(request: Request) -> set[str]:
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(coding.lower())
+    return accepted
+
+
+def encode_json(content: Any, include: Optional[dict] = None) -> bytes:
+    """Serialize a model (optionally projected with ``include``) or plain data to JSON bytes."""
+    if isinstance(content, bytes):
+        return content  # already serialized, e.g. a stored job result
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content, include=include)
+    return to_json(content)
+
+
+def json_response(
+    request: Request,
+    content: Any,
+    include: Optional[dict] = None,
+    status_code: int = 200,
+) -> Response:
+    """Build a JSON response for ``content``, compressed if large and the client allows it."""
+    body = encode_json(content, include)
+    headers = {"Vary": "Accept-Encoding"}
+
+    if config.RESPONSE_COMPRESS_MIN_SIZE and len(body) >= config.RESPONSE_COMPRESS_MIN_SIZE:
+        accepted = _accepted_encodings(request)
+        if brotli is not None and "br" in accepted:
+            body = brotli.compress(body, quality=config.RESPONSE_BROTLI_QUALITY)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            body = gzip.compress(body, compresslevel=config.RESPONSE_GZIP_LEVEL)
+            headers["Content-Encoding"] = "gzip"
+
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
@@ -1,20 +1,40 @@
 """
-Scan Orchestrator — runs all passive data collection modules in parallel.
-Handles timeouts and error isolation per module.
+Scan Orchestrator — runs all passive data collection modules as a
+dependency graph. Handles timeouts and error isolation per module.
 """
 
 from __future__ import annotations
 
 import asyncio
+import inspect
+import sqlite3
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Optional, get_args, get_origin
 
+from pydantic import BaseModel
+
+from app import config
+from app.breakers import deadline as breaker_deadline
+from app.cache import cached
+from app.deadlines import module_deadlines
+from app.history import get_history_store
+from app.http_clients import get_client
+from app.limits import upstream_slot
+from app.metrics import MODULE_DURATION, MODULE_ERRORS, MODULE_QUEUE_WAIT, SCANS_IN_FLIGHT, SCANS_TOTAL
 from app.models import (
+    CacheStatus,
     ScanResponse,
+    ScanTimeline,
     OverviewInfo,
     CertificateInfo,
+    CtLookup,
     DnsRecords,
     WhoisInfo,
     AsnInfo,
+    SubdomainResolution,
+    SubdomainSummary,
 )
 from app.modules.dns_lookup import lookup_dns
 from app.modules.whois_lookup import lookup_whois
@@ -22,15 +42,28 @@ from app.modules.tls_inspect import inspect_tls
 from app.modules.ct_lookup import lookup_ct
 from app.modules.asn_lookup import lookup_asn
 from app.modules.subdomains import aggregate_subdomains
+from app.modules.subdomain_resolve import resolve_subdomains
+from app.normalizer import registrable_domain
+from app.pipeline import ModuleSpec, run_pipeline
+from app.pivot_index import get_pivot_index
+from app.singleflight import SingleFlight
+from app.subdomain_trie import SubdomainTrie
 
 
-MODULE_TIMEOUT = 12  # seconds per module
+# Upstream each module talks to, for per-upstream concurrency limits
+MODULE_UPSTREAMS = {
+    "dns": "dns",
+    "whois": "whois",
+    "tls": "tls",
+    "ct": "crt.sh",
+    "asn": "rdap",
+}
 
 
 async def _run_with_timeout(coro, name: str, errors: dict):
-    """Run a coroutine with a timeout; capture errors instead of raising."""
+    """Await a module call; capture errors instead of raising."""
     try:
-        return await asyncio.wait_for(coro, timeout=MODULE_TIMEOUT)
+        return await coro
     except asyncio.TimeoutError:
         errors[name] = "Module timed out"
         return None
@@ -39,61 +72,413 @@ async def _run_with_timeout(coro, name: str, errors: dict):
         return None
 
 
-async def run_scan(domain: str) -> ScanResponse:
-    """Execute all passive reconnaissance modules and build a unified response."""
-    errors: dict[str, str] = {}
+def _limited(name: str, factory, queued: dict[str, float]):
+    """
+    Wrap a module call so it waits for a slot on its upstream first.
 
-    # Run all modules concurrently
-    dns_task = _run_with_timeout(lookup_dns(domain), "dns", errors)
-    whois_task = _run_with_timeout(lookup_whois(domain), "whois", errors)
-    tls_task = _run_with_timeout(inspect_tls(domain), "tls", errors)
-    ct_task = _run_with_timeout(lookup_ct(domain), "ct", errors)
+    The module's adaptive deadline (see ``app.deadlines``) starts once the
+    slot is held, so time spent queued behind a busy upstream during batch
+    scans does not count against it. The wait is recorded in ``queued``
+    (seconds, by module).
+    """
+    upstream = MODULE_UPSTREAMS[name]
 
-    # Gather first batch (ASN needs IP from DNS, but we'll resolve independently)
-    dns_result, whois_result, tls_result, ct_result = await asyncio.gather(
-        dns_task, whois_task, tls_task, ct_task
-    )
+    async def _call():
+        started = time.perf_counter()
+        async with upstream_slot(upstream):
+            waited = time.perf_counter() - started
+            queued[name] = waited
+            MODULE_QUEUE_WAIT.labels(upstream).observe(waited)
+            deadline = module_deadlines.deadline(name)
+            try:
+                # Breakers count a call cut off here as a failure of its upstream
+                async with breaker_deadline(deadline):
+                    result = await factory()
+            except asyncio.TimeoutError:
+                module_deadlines.observe(name, deadline)
+                raise
+            module_deadlines.observe(name, time.perf_counter() - started - waited)
+            return result
+    return _call
+
+
+SectionCallback = Callable[[str, Any], None]
+
+# Coalesce concurrent identical work: whole scans by domain, and upstream
+# module calls by (module, cache key)
+scan_flights = SingleFlight()
+module_flights = SingleFlight()
+
+
+# ── Module Registry ───────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class ScanModule:
+    """
+    One data collection step.
 
-    # Defaults
-    dns_data = dns_result or DnsRecords()
-    whois_data = whois_result or WhoisInfo()
-    tls_data = tls_result or CertificateInfo()
-    ct_data = ct_result or []
+    ``collect(domain, inputs)`` receives the values named in ``inputs``
+    (``"module"`` or ``"module.attribute"``). Modules listed in
+    MODULE_UPSTREAMS go through the cache, upstream limits and error
+    isolation; the others are local computations over earlier results.
 
-    # Get the primary IP from DNS A records
-    ip_address = dns_data.A[0] if dns_data.A else None
+    A module with ``opt_in`` (the name of a config flag) only runs in full
+    scans while that flag is set; partial scans run it when selected.
+    """
 
-    # Run ASN lookup with the resolved IP
-    asn_result = await _run_with_timeout(
-        lookup_asn(domain, ip_address), "asn", errors
+    name: str
+    section: str  # ScanResponse field filled by this module
+    default: Callable[[], Any]
+    collect: Callable[[str, dict[str, Any]], Any]
+    inputs: tuple[str, ...] = ()
+    cache_key: Optional[Callable[[str, dict[str, Any]], str]] = None
+    section_value: Optional[Callable[[Any], Any]] = None  # result → section data
+    opt_in: Optional[str] = None
+
+    @property
+    def default_on(self) -> bool:
+        return self.opt_in is None or getattr(config, self.opt_in)
+
+    def section_data(self, result: Any) -> Any:
+        return self.section_value(result) if self.section_value else result
+
+
+def _primary_ip(inputs: dict[str, Any]) -> Optional[str]:
+    a_records = inputs["dns.A"]
+    return a_records[0] if a_records else None
+
+
+def _collect_asn(domain: str, inputs: dict[str, Any]):
+    return lookup_asn(
+        domain, _primary_ip(inputs),
+        rdap_client=get_client("rdap"),
+        ipinfo_client=get_client("ipinfo"),
     )
-    asn_data = asn_result or AsnInfo()
 
-    # Aggregate subdomains from CT and TLS
-    subdomains = aggregate_subdomains(domain, ct_data, tls_data.san_entries)
 
-    # Build overview
-    overview = OverviewInfo(
+def _build_overview(domain: str, inputs: dict[str, Any]) -> OverviewInfo:
+    whois_data: WhoisInfo = inputs["whois"]
+    asn_data: AsnInfo = inputs["asn"]
+    return OverviewInfo(
         domain=domain,
-        ip_address=ip_address,
+        ip_address=_primary_ip(inputs),
         asn=asn_data.asn,
         registrar=whois_data.registrar,
         created_date=whois_data.creation_date,
         expires_date=whois_data.expiration_date,
-        cert_expiry=tls_data.not_after,
+        cert_expiry=inputs["tls.not_after"],
         hosting_provider=asn_data.hosting_provider,
         country=asn_data.country,
     )
 
-    return ScanResponse(
+
+def _whois_domain(domain: str, _inputs: Any = None) -> str:
+    # Registries only know ICANN-registrable names: github.io, not user.github.io
+    return registrable_domain(domain, private=False) or domain
+
+
+def _ct_domain(domain: str, _inputs: Any = None) -> str:
+    # CT is searched per registrable domain (private suffixes included), so
+    # scans of www.example.com and example.com share one crt.sh query and index
+    return registrable_domain(domain) or domain
+
+
+MODULES: list[ScanModule] = [
+    ScanModule("dns", "dns_records", DnsRecords, lambda d, _: lookup_dns(d)),
+    ScanModule(
+        "whois", "whois", WhoisInfo, lambda d, _: lookup_whois(_whois_domain(d)),
+        cache_key=_whois_domain,
+    ),
+    ScanModule(
+        "tls", "certificates", CertificateInfo,
+        lambda d, inputs: inspect_tls(d, ipv4=inputs["dns.A"], ipv6=inputs["dns.AAAA"]),
+        inputs=("dns.A", "dns.AAAA"),
+    ),
+    ScanModule(
+        "ct", "historical_certificates", CtLookup,
+        lambda d, _: lookup_ct(_ct_domain(d), client=get_client("crt.sh")),
+        cache_key=_ct_domain,
+        section_value=lambda result: result.certificates,
+    ),
+    ScanModule(
+        "asn", "asn_info", AsnInfo, _collect_asn,
+        inputs=("dns.A",),
+        cache_key=lambda d, inputs: _primary_ip(inputs) or d,
+    ),
+    ScanModule(
+        "subdomains", "subdomains", SubdomainTrie,
+        lambda d, inputs: aggregate_subdomains(_ct_domain(d), inputs["ct.names"], inputs["tls.san_entries"]),
+        inputs=("ct.names", "tls.san_entries"),
+        section_value=lambda trie: trie.page(0, config.SUBDOMAIN_INLINE_LIMIT)[1],
+    ),
+    ScanModule(
+        "subdomain_summary", "subdomain_summary", SubdomainSummary,
+        lambda d, inputs: inputs["subdomains"].summary(config.SUBDOMAIN_INLINE_LIMIT),
+        inputs=("subdomains",),
+    ),
+    ScanModule(
+        "resolve", "subdomain_resolution", SubdomainResolution,
+        lambda d, inputs: resolve_subdomains(inputs["subdomains"]),
+        inputs=("subdomains",),
+        opt_in="SUBDOMAIN_RESOLVE",
+    ),
+    ScanModule(
+        "overview", "overview", OverviewInfo, _build_overview,
+        inputs=("dns.A", "whois", "tls.not_after", "asn"),
+    ),
+]
+
+
+# ── Selection ─────────────────────────────────────────────────────────────────
+
+# ScanResponse fields that are always returned, whatever was selected
+META_FIELDS = ("domain", "scan_timestamp", "errors", "pending", "cache", "timeline")
+
+
+def _with_dependencies(names: set[str]) -> set[str]:
+    by_name = {module.name: module for module in MODULES}
+    needed: set[str] = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name in needed:
+            continue
+        needed.add(name)
+        pending.extend(path.split(".", 1)[0] for path in by_name[name].inputs)
+    return needed
+
+
+def _projection(fields: Iterable[str]) -> dict[str, Any]:
+    """
+    Turn ``"section"`` / ``"section.field"`` paths into a ``model_dump`` include.
+
+    Raises ValueError for paths that name no ScanResponse field.
+    """
+    include: dict[str, Any] = {name: True for name in META_FIELDS}
+    for path in fields:
+        top, _, sub = path.partition(".")
+        info = ScanResponse.model_fields.get(top)
+        if info is None:
+            raise ValueError(f"Unknown field '{path}'")
+        if not sub:
+            include[top] = True
+            continue
+        annotation = info.annotation
+        is_list = get_origin(annotation) is list
+        model = get_args(annotation)[0] if is_list else annotation
+        if not (isinstance(model, type) and issubclass(model, BaseModel)) or sub not in model.model_fields:
+            raise ValueError(f"Unknown field '{path}'")
+        if include.get(top) is True:
+            continue  # whole section already requested
+        fields_of_top = include.setdefault(top, {"__all__": {}} if is_list else {})
+        (fields_of_top["__all__"] if is_list else fields_of_top)[sub] = True
+    return include
+
+
+def plan_scan(
+    modules: Optional[Iterable[str]] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> tuple[Optional[frozenset[str]], Optional[dict[str, Any]]]:
+    """
+    Work out which modules a partial scan must run and how to project it.
+
+    ``modules`` may name modules (``dns``) or the sections they fill
+    (``dns_records``); ``fields`` are ScanResponse paths such as
+    ``"certificates.not_after"``; a module is run if either selects it.
+    Returns ``(modules_to_run, include)``, where None means everything.
+    Dependencies of the selected modules are run but their sections are
+    left out of the response.
+    """
+    if modules is None and fields is None:
+        return None, None
+
+    by_section = {module.section: module.name for module in MODULES}
+    names = {module.name for module in MODULES}
+    wanted: set[str] = set()
+    for item in modules or ():
+        if item in names:
+            wanted.add(item)
+        elif item in by_section:
+            wanted.add(by_section[item])
+        else:
+            raise ValueError(f"Unknown module '{item}'")
+
+    if fields is None:
+        fields = [module.section for module in MODULES if module.name in wanted]
+    include = _projection(fields)
+    wanted |= {by_section[top] for top in include if top in by_section}
+    return frozenset(_with_dependencies(wanted)), include
+
+
+def _pipeline_spec(
+    module: ScanModule,
+    domain: str,
+    errors: dict[str, str],
+    cache_status: dict[str, CacheStatus],
+    queued: dict[str, float],
+    on_section: Optional[SectionCallback],
+) -> ModuleSpec:
+    async def _collect_local(inputs: dict[str, Any]) -> Any:
+        result = module.collect(domain, inputs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def run(inputs: dict[str, Any]) -> Any:
+        if module.name in MODULE_UPSTREAMS:
+            key = module.cache_key(domain, inputs) if module.cache_key else domain
+            fetch = _limited(module.name, lambda: module.collect(domain, inputs), queued)
+            result = await _run_with_timeout(
+                cached(
+                    module.name, key,
+                    lambda: module_flights.do((module.name, key), fetch),
+                    cache_status, module.section,
+                ),
+                module.name, errors,
+            )
+        else:
+            # Derived sections fail on their own too, rather than taking the scan down
+            result = await _run_with_timeout(_collect_local(inputs), module.name, errors)
+
+        data = result if result is not None else module.default()
+        if on_section is not None:
+            on_section(module.section, module.section_data(data))
+        return data
+
+    return ModuleSpec(module.name, run, module.inputs)
+
+
+def _module_status(module: ScanModule, errors: dict, cache_status: dict) -> str:
+    if module.name in errors:
+        return "timeout" if errors[module.name] == "Module timed out" else "error"
+    if module.section in cache_status:
+        return "cached"
+    return "ok"
+
+
+def _record_timings(timeline: ScanTimeline, queued: dict[str, float]) -> None:
+    """Fill in queue waits and export the scan's module timings to Prometheus."""
+    for timing in timeline.modules:
+        timing.queued_ms = round(queued.get(timing.module, 0.0) * 1000, 1)
+        MODULE_DURATION.labels(timing.module, timing.status).observe(timing.duration_ms / 1000)
+        if timing.status in ("error", "timeout"):
+            upstream = MODULE_UPSTREAMS.get(timing.module, "local")
+            MODULE_ERRORS.labels(timing.module, upstream, timing.status).inc()
+
+
+# ── Scan ──────────────────────────────────────────────────────────────────────
+
+async def run_scan(
+    domain: str,
+    on_section: Optional[SectionCallback] = None,
+    modules: Optional[frozenset[str]] = None,
+) -> ScanResponse:
+    """
+    Execute all passive reconnaissance modules and build a unified response.
+
+    Modules run as a dependency graph: each starts as soon as the inputs it
+    declares are available. ``on_section(name, data)`` is called as soon as
+    each ScanResponse section (``dns_records``, ``whois``, ...) is ready, so
+    callers can stream partial results before the slowest module finishes.
+
+    ``modules`` (see ``plan_scan``) limits the run to those modules; the
+    sections of modules that did not run keep their empty defaults. Without
+    it, opt-in modules (live subdomain resolution) run only if enabled.
+
+    The whole scan gets ``SCAN_DEADLINE`` seconds. Modules still running
+    then are abandoned: their sections keep their empty defaults and are
+    listed in ``pending``.
+
+    Concurrent scans of the same domain and module set share one execution. Streaming
+    callers run their own scan (they need per-section callbacks) but still
+    share in-flight upstream calls with every other scan.
+    """
+    if on_section is None:
+        return await scan_flights.do(
+            (domain, modules), lambda: _execute_scan(domain, None, modules)
+        )
+    return await _execute_scan(domain, on_section, modules)
+
+
+def affected_modules(failed: Iterable[str]) -> set[str]:
+    """``failed`` modules plus every module that consumed the output of one of them."""
+    affected = set(failed)
+    for module in MODULES:  # dependencies are listed before their dependents
+        if any(source.split(".")[0] in affected for source in module.inputs):
+            affected.add(module.name)
+    return affected
+
+
+def _settled(selected: list[ScanModule], results: dict[str, Any], errors: dict[str, str]) -> dict[str, Any]:
+    """Results (by module) that neither failed, nor were cut off, nor were built on one that was."""
+    affected = affected_modules([*errors, *(module.name for module in selected if module.name not in results)])
+    return {module.name: results[module.name] for module in selected if module.name not in affected}
+
+
+async def _record_history(
+    domain: str,
+    selected: list[ScanModule],
+    settled: dict[str, Any],
+    errors: dict[str, str],
+) -> None:
+    """Store the scan in the history; sections built on failed or pending modules keep their previous value."""
+    sections = {module.section: settled[module.name] for module in selected if module.name in settled}
+    try:
+        await asyncio.to_thread(get_history_store().record, domain, time.time(), sections)
+    except sqlite3.Error as exc:
+        errors["history"] = f"History not recorded: {exc}"
+
+
+async def _record_pivots(domain: str, settled: dict[str, Any], errors: dict[str, str]) -> None:
+    """Add the scan's IPs, nameservers, certificates, ... to the pivot index."""
+    try:
+        await asyncio.to_thread(get_pivot_index().record, domain, time.time(), settled)
+    except sqlite3.Error as exc:
+        errors["pivots"] = f"Pivot index not updated: {exc}"
+
+
+async def _execute_scan(
+    domain: str,
+    on_section: Optional[SectionCallback],
+    modules: Optional[frozenset[str]] = None,
+) -> ScanResponse:
+    errors: dict[str, str] = {}
+    cache_status: dict[str, CacheStatus] = {}
+    queued: dict[str, float] = {}
+    selected = [module for module in MODULES if (module.default_on if modules is None else module.name in modules)]
+
+    SCANS_TOTAL.inc()
+    with SCANS_IN_FLIGHT.track_inprogress():
+        results, timeline = await run_pipeline([
+            _pipeline_spec(module, domain, errors, cache_status, queued, on_section)
+            for module in selected
+        ], budget=config.SCAN_DEADLINE)
+
+    by_name = {module.name: module for module in MODULES}
+    for timing in timeline.modules:
+        if timing.module in results:
+            timing.status = _module_status(by_name[timing.module], errors, cache_status)
+    _record_timings(timeline, queued)
+
+    settled = _settled(selected, results, errors)
+    if config.HISTORY_ENABLED:
+        await _record_history(domain, selected, settled, errors)
+    if config.PIVOT_INDEX_ENABLED:
+        await _record_pivots(domain, settled, errors)
+
+    # Modules cut off by SCAN_DEADLINE report their empty default
+    sections = {
+        module.section: module.section_data(results[module.name] if module.name in results else module.default())
+        for module in selected
+    }
+    pending = [module.section for module in selected if module.name not in results]
+    # Every section is already a validated model built by our own modules
+    return ScanResponse.model_construct(
         domain=domain,
         scan_timestamp=datetime.now(timezone.utc).isoformat(),
-        overview=overview,
-        certificates=tls_data,
-        historical_certificates=ct_data,
-        dns_records=dns_data,
-        whois=whois_data,
-        asn_info=asn_data,
-        subdomains=subdomains,
+        **sections,
         errors=errors,
+        pending=pending,
+        cache=cache_status,
+        timeline=timeline,
     )
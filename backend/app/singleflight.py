@@ -0,0 +1,38 @@
+"""
+Single-flight Coalescing — concurrent calls with the same key share one
+execution. Later callers attach to the in-flight task and receive the same
+result (or exception) as the first.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0  # calls that actually executed
+        self.followers = 0  # calls that attached to an in-flight execution
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.followers += 1
+        # Shielded so one caller going away does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        total = self.leaders + self.followers
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "hit_ratio": round(self.followers / total, 4) if total else 0.0,
+        }
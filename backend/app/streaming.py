@@ -0,0 +1,86 @@
+"""
+Progressive Scan Streaming — publishes each ScanResponse section over
+Server-Sent Events as soon as its module finishes, and live subdomain
+resolutions as NDJSON as each name resolves.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator
+
+from pydantic_core import to_json
+
+from app.modules.subdomain_resolve import resolve_subdomains
+from app.scanner import run_scan
+from app.subdomain_trie import SubdomainTrie
+
+
+_DONE = object()
+
+
+def _sse(event: str, payload: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + to_json(payload) + b"\n\n"
+
+
+async def scan_event_stream(domain: str) -> AsyncIterator[bytes]:
+    """
+    Run a scan and yield SSE frames.
+
+    Emits ``start``, then one event per section named after the
+    ScanResponse field (``dns_records``, ``whois``, ``certificates``,
+    ``historical_certificates``, ``asn_info``, ``subdomains``,
+    ``subdomain_summary``, ``subdomain_resolution`` when enabled,
+    ``overview``), and finally ``complete`` with the
+    timestamp, errors, pending sections, cache status and module timeline.
+    A scan that fails outright ends with a ``failed`` event instead.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(
+        run_scan(domain, on_section=lambda name, data: queue.put_nowait((name, data)))
+    )
+    task.add_done_callback(lambda _: queue.put_nowait(_DONE))
+
+    try:
+        yield _sse("start", {"domain": domain})
+        while (item := await queue.get()) is not _DONE:
+            name, data = item
+            yield _sse(name, {"section": name, "data": data})
+
+        if task.cancelled() or task.exception() is not None:
+            exc = None if task.cancelled() else task.exception()
+            yield _sse("failed", {"detail": str(exc) if exc else "Scan cancelled"})
+            return
+
+        result = task.result()
+        yield _sse("complete", {
+            "domain": result.domain,
+            "scan_timestamp": result.scan_timestamp,
+            "errors": result.errors,
+            "pending": result.pending,
+            "cache": result.cache,
+            "timeline": result.timeline,
+        })
+    finally:
+        task.cancel()
+
+
+async def resolution_stream(trie: SubdomainTrie) -> AsyncIterator[bytes]:
+    """
+    Resolve a trie's names and yield NDJSON: a ``result`` line per name as
+    it resolves, then a ``summary`` line with the counts and wildcard zones.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(resolve_subdomains(trie, on_result=queue.put_nowait))
+    task.add_done_callback(lambda _: queue.put_nowait(_DONE))
+
+    try:
+        while (item := await queue.get()) is not _DONE:
+            yield to_json({"type": "result", **item.model_dump()}) + b"\n"
+        if task.cancelled() or task.exception() is not None:
+            exc = None if task.cancelled() else task.exception()
+            yield to_json({"type": "error", "detail": str(exc) if exc else "Resolution cancelled"}) + b"\n"
+            return
+        yield to_json({"type": "summary", **task.result().model_dump()}) + b"\n"
+    finally:
+        task.cancel()
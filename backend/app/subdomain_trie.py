@@ -0,0 +1,299 @@
+"""
+Subdomain Trie — discovered names stored by reversed label.
+
+``api.dev.example.com`` under ``example.com`` is stored at the path
+``dev → api``, so every branch of the namespace is a subtree that knows how
+many names sit below it. That makes the hierarchical counts free and lets
+a page at any offset be found by skipping whole subtrees instead of
+walking and sorting every name. Nodes keep their per-depth counts up to
+date as names are added and cache their sorted children until a new child
+arrives, so serving a page does no sorting. Each name records the sources
+it was seen in, the first/last date it was seen and, once the resolution
+stage has run, whether it still resolves.
+
+Recently scanned domains keep their trie in memory; older ones are rebuilt
+from the CT index on demand.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import OrderedDict
+from typing import Iterator, Optional
+
+from app import config
+from app.models import CtName, ResolvedName, SubdomainBranch, SubdomainEntry, SubdomainSummary
+
+
+# Known sources, in reporting order; each is one bit in an entry's mask
+SOURCES: list[str] = ["crt.sh", "tls_handshake"]
+
+
+def _source_bit(source: str) -> int:
+    if source not in SOURCES:
+        SOURCES.append(source)
+    return 1 << SOURCES.index(source)
+
+
+class _Node:
+    __slots__ = ("children", "sources", "first_seen", "last_seen", "count", "depths", "resolved", "_sorted")
+
+    def __init__(self):
+        self.children: Optional[dict[str, _Node]] = None
+        self.sources = 0  # non-zero when this node is itself a discovered name
+        self.first_seen: Optional[str] = None
+        self.last_seen: Optional[str] = None
+        self.count = 0  # discovered names at or below this node
+        self.depths: Optional[list[int]] = None  # names below this node by relative depth (index 0 unused)
+        self.resolved: Optional[ResolvedName] = None
+        self._sorted: Optional[list[tuple[str, _Node]]] = None  # children in label order, until one is added
+
+    def add_child(self, label: str) -> "_Node":
+        if self.children is None:
+            self.children = {}
+        child = self.children[label] = _Node()
+        self._sorted = None
+        return child
+
+    def sorted_children(self) -> list[tuple[str, "_Node"]]:
+        if self._sorted is None:
+            self._sorted = sorted(self.children.items()) if self.children else []
+        return self._sorted
+
+
+class SubdomainTrie:
+    def __init__(self, domain: str = ""):
+        self.domain = domain
+        self.suffix = f".{domain}"
+        self.root = _Node()
+
+    def __len__(self) -> int:
+        return self.root.count
+
+    # ── Building ─────────────────────────────────────────────────────────────
+
+    def add(self, name: str, source: str, seen: Optional[str] = None) -> bool:
+        """
+        Record ``name`` (wildcards stripped) if it is a subdomain of the domain.
+
+        Returns True if the name was new.
+        """
+        name = name.strip().lower()
+        if name.startswith("*."):
+            name = name[2:]
+        if not name.endswith(self.suffix):
+            return False
+        labels = name[: -len(self.suffix)].split(".")
+
+        path = [self.root]
+        node = self.root
+        for label in reversed(labels):
+            child = node.children.get(label) if node.children else None
+            if child is None:
+                child = node.add_child(label)
+            node = child
+            path.append(node)
+
+        is_new = node.sources == 0
+        node.sources |= _source_bit(source)
+        if seen:
+            node.first_seen = min(node.first_seen or seen, seen)
+            node.last_seen = max(node.last_seen or seen, seen)
+        if is_new:
+            depth = len(path) - 1
+            for ancestor in path:
+                ancestor.count += 1
+                if depth:
+                    if ancestor.depths is None:
+                        ancestor.depths = [0]
+                    if len(ancestor.depths) <= depth:
+                        ancestor.depths.extend([0] * (depth + 1 - len(ancestor.depths)))
+                    ancestor.depths[depth] += 1
+                depth -= 1
+        return is_new
+
+    def add_ct_names(self, names: list[CtName]) -> None:
+        for ct_name in names:
+            self.add(ct_name.name, "crt.sh", ct_name.first_seen)
+            if ct_name.last_seen and ct_name.last_seen != ct_name.first_seen:
+                self.add(ct_name.name, "crt.sh", ct_name.last_seen)
+
+    def set_resolution(self, resolved: ResolvedName) -> bool:
+        """Attach a resolution result to a discovered name; False if the name is unknown."""
+        node, _ = self._find(resolved.subdomain)
+        if node is None or not node.sources:
+            return False
+        node.resolved = resolved
+        return True
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def _find(self, under: Optional[str]) -> tuple[Optional[_Node], list[str]]:
+        """Node for the subtree rooted at ``under`` plus its labels from the domain down."""
+        if not under or under == self.domain:
+            return self.root, []
+        under = under.strip().lower()
+        if not under.endswith(self.suffix):
+            return None, []
+        labels = under[: -len(self.suffix)].split(".")[::-1]
+        node = self.root
+        for label in labels:
+            node = node.children.get(label) if node.children else None
+            if node is None:
+                return None, []
+        return node, labels
+
+    def _name(self, labels: list[str]) -> str:
+        return ".".join(reversed(labels)) + self.suffix
+
+    def _entry(self, labels: list[str], node: _Node) -> SubdomainEntry:
+        sources = [s for i, s in enumerate(SOURCES) if node.sources & (1 << i)]
+        resolved = node.resolved
+        return SubdomainEntry(
+            subdomain=self._name(labels),
+            source=sources[0],
+            sources=sources,
+            first_seen=node.first_seen,
+            last_seen=node.last_seen,
+            status=resolved.status if resolved else None,
+            addresses=resolved.addresses if resolved else [],
+            cname=resolved.cname if resolved else None,
+        )
+
+    def names(self) -> list[str]:
+        """Every name in the trie, in hierarchical order."""
+        return [self._name(path) for path, _ in self._walk(self.root, [])]
+
+    def _walk(self, node: _Node, labels: list[str]) -> Iterator[tuple[list[str], _Node]]:
+        """Names below ``node``: depth-first, parents first, siblings in label order."""
+        stack = [(labels + [label], child) for label, child in reversed(node.sorted_children())]
+        while stack:
+            path, current = stack.pop()
+            if current.sources:
+                yield path, current
+            for label, child in reversed(current.sorted_children()):
+                stack.append((path + [label], child))
+
+    def page(
+        self,
+        offset: int = 0,
+        limit: int = 50,
+        under: Optional[str] = None,
+        contains: Optional[str] = None,
+        source: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> tuple[int, list[SubdomainEntry]]:
+        """
+        Return ``(total, entries)`` for one page of the names below ``under``
+        (the whole domain by default) in hierarchical order.
+
+        Without ``contains``/``source``/``status`` filters the offset is
+        reached by skipping whole subtrees on their counts. ``status`` is a
+        resolution status, or ``unchecked`` for names not resolved yet.
+        """
+        node, labels = self._find(under)
+        if node is None:
+            return 0, []
+
+        if contains or source or status:
+            if source and source not in SOURCES:
+                return 0, []
+            needle = (contains or "").lower()
+            bit = _source_bit(source) if source else 0
+            total = 0
+            items: list[SubdomainEntry] = []
+            for path, match in self._walk(node, labels):
+                if bit and not match.sources & bit:
+                    continue
+                if needle and needle not in self._name(path):
+                    continue
+                if status and (match.resolved.status if match.resolved else "unchecked") != status:
+                    continue
+                if offset <= total < offset + limit:
+                    items.append(self._entry(path, match))
+                total += 1
+            return total, items
+
+        total = node.count - (1 if node.sources and labels else 0)
+        items = []
+        for path, match in self._seek(node, labels, offset):
+            if len(items) >= limit:
+                break
+            items.append(self._entry(path, match))
+        return total, items
+
+    def _seek(self, node: _Node, labels: list[str], skip: int) -> Iterator[tuple[list[str], _Node]]:
+        """Like ``_walk`` below ``node`` (excluding it), starting ``skip`` names in."""
+        for label, child in node.sorted_children():
+            if skip >= child.count:
+                skip -= child.count
+                continue
+            path = labels + [label]
+            if child.sources:
+                if skip == 0:
+                    yield path, child
+                else:
+                    skip -= 1
+            yield from self._seek(child, path, skip)
+            skip = 0
+
+    def levels(self, under: Optional[str] = None) -> dict[int, int]:
+        """Number of names at each depth below ``under`` (1 = direct children)."""
+        node, _ = self._find(under)
+        if node is None or node.depths is None:
+            return {}
+        return {depth: count for depth, count in enumerate(node.depths) if depth and count}
+
+    def branches(self, under: Optional[str] = None, limit: int = 20) -> list[SubdomainBranch]:
+        """Direct children of ``under`` with the number of names in each, largest first."""
+        node, labels = self._find(under)
+        if node is None or not node.children:
+            return []
+        ranked = heapq.nsmallest(limit, node.children.items(), key=lambda item: (-item[1].count, item[0]))
+        return [
+            SubdomainBranch(name=self._name(labels + [label]), count=child.count)
+            for label, child in ranked
+        ]
+
+    def summary(self, inline: int) -> SubdomainSummary:
+        total = len(self)
+        return SubdomainSummary(
+            total=total,
+            inline=min(inline, total),
+            truncated=total > inline,
+            levels=self.levels(),
+            branches=self.branches(),
+        )
+
+
+# ── In-memory store ───────────────────────────────────────────────────────────
+
+class SubdomainStore:
+    """Tries of the most recently scanned domains, LRU-bounded."""
+
+    def __init__(self, max_domains: int):
+        self.max_domains = max_domains
+        self._tries: OrderedDict[str, SubdomainTrie] = OrderedDict()
+
+    def get(self, domain: str) -> Optional[SubdomainTrie]:
+        trie = self._tries.get(domain)
+        if trie is not None:
+            self._tries.move_to_end(domain)
+        return trie
+
+    def put(self, trie: SubdomainTrie) -> None:
+        self._tries[trie.domain] = trie
+        self._tries.move_to_end(trie.domain)
+        while len(self._tries) > self.max_domains:
+            self._tries.popitem(last=False)
+
+
+_store: Optional[SubdomainStore] = None
+
+
+def get_subdomain_store() -> SubdomainStore:
+    """Return the process-wide trie store, creating it on first use."""
+    global _store
+    if _store is None:
+        _store = SubdomainStore(config.SUBDOMAIN_TRIES)
+    return _store
@@ -0,0 +1,469 @@
+"""
+Watchlist — registered domains re-scanned in the background.
+
+Every watched domain has a next-due time in a SQLite store. The scheduler
+keeps them in a heap ordered by due time (ties broken by the nearest
+certificate or registration expiry), pops whatever is due, and re-scans
+within ``WATCH_CONCURRENCY`` scans and the ``watchlist`` upstream pool.
+A domain is re-scanned every ``WATCH_INTERVAL``; inside
+``WATCH_EXPIRY_WINDOW`` of an expiry the period shrinks linearly towards
+``WATCH_MIN_INTERVAL`` so renewals (or their absence) show up quickly.
+Every period gets ±``WATCH_JITTER`` so domains added together drift apart.
+
+Each check compares every section against the digest of its last stored
+value and only writes the sections that changed. Due times are claimed in
+the store before a scan, so several workers running the scheduler never
+scan the same domain twice.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import heapq
+import json
+import math
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from app import config
+from app.history import section_value
+from app.limits import upstream_pool
+from app.models import ScanResponse, WatchChange, WatchEntry, WatchExpiration
+from app.scanner import MODULE_UPSTREAMS, MODULES, affected_modules, run_scan
+
+
+LEASE_SECONDS = 15 * 60  # a claimed domain is due again if its check never finishes
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watch_domains (
+    domain TEXT PRIMARY KEY,
+    added_at REAL NOT NULL,
+    next_due REAL NOT NULL,
+    last_checked REAL,
+    cert_expiry TEXT,
+    expires_date TEXT,
+    expiry REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS watch_domains_expiry ON watch_domains (expiry);
+CREATE TABLE IF NOT EXISTS watch_sections (
+    domain TEXT NOT NULL,
+    section TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (domain, section)
+);
+CREATE TABLE IF NOT EXISTS watch_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    domain TEXT NOT NULL,
+    section TEXT NOT NULL,
+    changed_at REAL NOT NULL,
+    initial INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS watch_changes_recent ON watch_changes (changed_at DESC);
+CREATE INDEX IF NOT EXISTS watch_changes_domain ON watch_changes (domain, changed_at DESC);
+"""
+
+# Sections snapshotted per check, and the module that fills each. Live
+# resolution counts move on every check, so they are not snapshotted.
+SECTION_MODULES: dict[str, str] = {module.section: module.name for module in MODULES if module.name != "resolve"}
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+
+
+def parse_expiry(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds of an ISO date from a scan (naive values are UTC); None if unparseable."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def next_interval(expiry: Optional[float], now: float) -> float:
+    """Re-scan period for a domain whose earliest expiry is ``expiry``."""
+    if expiry is None or expiry - now >= config.WATCH_EXPIRY_WINDOW:
+        return config.WATCH_INTERVAL
+    remaining = max(expiry - now, 0.0)
+    return max(config.WATCH_MIN_INTERVAL, config.WATCH_INTERVAL * remaining / config.WATCH_EXPIRY_WINDOW)
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+
+class WatchStore:
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    # ── Domains ──────────────────────────────────────────────────────────────
+
+    def add(self, domains: list[str], now: float) -> list[str]:
+        """Watch ``domains`` (due immediately); returns those not already watched."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                added = [
+                    domain for domain in domains
+                    if conn.execute(
+                        "INSERT OR IGNORE INTO watch_domains (domain, added_at, next_due) VALUES (?, ?, ?)",
+                        (domain, now, now),
+                    ).rowcount
+                ]
+        return added
+
+    def remove(self, domain: str) -> bool:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                removed = conn.execute("DELETE FROM watch_domains WHERE domain = ?", (domain,)).rowcount
+                conn.execute("DELETE FROM watch_sections WHERE domain = ?", (domain,))
+                conn.execute("DELETE FROM watch_changes WHERE domain = ?", (domain,))
+        return bool(removed)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT count(*) FROM watch_domains").fetchone()[0]
+
+    def entries(self, offset: int, limit: int) -> list[WatchEntry]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT domain, added_at, last_checked, next_due, cert_expiry, expires_date, last_error"
+                " FROM watch_domains ORDER BY domain LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [
+            WatchEntry(
+                domain=domain, added_at=_iso(added_at), last_checked=_iso(last_checked),
+                next_check=_iso(next_due), cert_expiry=cert_expiry,
+                expires_date=expires_date, last_error=last_error,
+            )
+            for domain, added_at, last_checked, next_due, cert_expiry, expires_date, last_error in rows
+        ]
+
+    # ── Scheduling ───────────────────────────────────────────────────────────
+
+    def schedule(self) -> list[tuple[float, Optional[float], str]]:
+        """``(next_due, expiry, domain)`` for every watched domain."""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT next_due, expiry, domain FROM watch_domains"
+            ).fetchall()
+
+    def claim(self, domain: str, due: float, lease_until: float) -> bool:
+        """Move ``domain`` from ``due`` to ``lease_until``; False if someone else got there first."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute(
+                    "UPDATE watch_domains SET next_due = ? WHERE domain = ? AND next_due = ?",
+                    (lease_until, domain, due),
+                ).rowcount == 1
+
+    def expiries(self, domain: str) -> tuple[Optional[str], Optional[str]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT cert_expiry, expires_date FROM watch_domains WHERE domain = ?", (domain,)
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def record(
+        self,
+        domain: str,
+        checked_at: float,
+        sections: dict[str, Any],
+        cert_expiry: Optional[str],
+        expires_date: Optional[str],
+        expiry: Optional[float],
+        next_due: float,
+        error: Optional[str],
+    ) -> Optional[list[str]]:
+        """Store the sections whose content changed and reschedule; returns the changed sections.
+
+        None if the domain was unwatched while it was being checked.
+        """
+        changed = []
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                exists = conn.execute(
+                    "UPDATE watch_domains SET last_checked = ?, next_due = ?, cert_expiry = ?,"
+                    " expires_date = ?, expiry = ?, last_error = ? WHERE domain = ?",
+                    (checked_at, next_due, cert_expiry, expires_date, expiry, error, domain),
+                ).rowcount
+                if not exists:
+                    return None
+                previous = dict(conn.execute(
+                    "SELECT section, digest FROM watch_sections WHERE domain = ?", (domain,)
+                ).fetchall())
+                for section, value in sections.items():
+                    data = json.dumps(value, sort_keys=True, separators=(",", ":"))
+                    digest = hashlib.sha256(data.encode()).hexdigest()
+                    if previous.get(section) == digest:
+                        continue
+                    conn.execute(
+                        "INSERT OR REPLACE INTO watch_sections (domain, section, digest) VALUES (?, ?, ?)",
+                        (domain, section, digest),
+                    )
+                    conn.execute(
+                        "INSERT INTO watch_changes (domain, section, changed_at, initial, data)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (domain, section, checked_at, section not in previous, data),
+                    )
+                    changed.append(section)
+        return changed
+
+    # ── Reports ──────────────────────────────────────────────────────────────
+
+    def expirations(self, until: float, limit: int) -> list[WatchExpiration]:
+        """Domains with a certificate or registration expiring before ``until``, soonest first."""
+        now = time.time()
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT domain, cert_expiry, expires_date, next_due FROM watch_domains"
+                " WHERE expiry IS NOT NULL AND expiry <= ? ORDER BY expiry LIMIT ?",
+                (until, limit),
+            ).fetchall()
+
+        def days_left(value: Optional[str]) -> Optional[float]:
+            ts = parse_expiry(value)
+            return round((ts - now) / 86400, 1) if ts is not None else None
+
+        return [
+            WatchExpiration(
+                domain=domain,
+                cert_expiry=cert_expiry, cert_days_left=days_left(cert_expiry),
+                expires_date=expires_date, domain_days_left=days_left(expires_date),
+                next_check=_iso(next_due),
+            )
+            for domain, cert_expiry, expires_date, next_due in rows
+        ]
+
+    def changes(
+        self,
+        domain: Optional[str],
+        since: Optional[float],
+        limit: int,
+        include_initial: bool = False,
+    ) -> list[WatchChange]:
+        """Most recent section changes first, optionally for one domain / after ``since``."""
+        clauses, params = [], []
+        if domain:
+            clauses.append("domain = ?")
+            params.append(domain)
+        if since is not None:
+            clauses.append("changed_at > ?")
+            params.append(since)
+        if not include_initial:
+            clauses.append("initial = 0")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT domain, section, changed_at, initial, data FROM watch_changes {where}"
+                " ORDER BY changed_at DESC, id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [
+            WatchChange(
+                domain=row_domain, section=section, changed_at=_iso(changed_at),
+                initial=bool(initial), data=json.loads(data),
+            )
+            for row_domain, section, changed_at, initial, data in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# ── Scheduler ─────────────────────────────────────────────────────────────────
+
+class WatchScheduler:
+    def __init__(self, store: WatchStore):
+        self.store = store
+        self._heap: list[tuple[float, float, str]] = []  # (due, expiry or inf, domain)
+        self._due: dict[str, float] = {}  # current due time; older heap entries are skipped
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(config.WATCH_CONCURRENCY)
+        self._running: set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._loaded_at = 0.0
+        self.checks = 0
+        self.failed_checks = 0
+        self.changes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._task, *self._running) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def schedule(self, domain: str, due: float, expiry: Optional[float] = None) -> None:
+        self._due[domain] = due
+        heapq.heappush(self._heap, (due, expiry if expiry is not None else math.inf, domain))
+        self._wakeup.set()
+
+    def unschedule(self, domain: str) -> None:
+        self._due.pop(domain, None)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "scheduled": len(self._due),
+            "in_flight": len(self._running),
+            "checks": self.checks,
+            "failed_checks": self.failed_checks,
+            "changes": self.changes,
+        }
+
+    # ── Internals ────────────────────────────────────────────────────────────
+
+    async def _load(self) -> None:
+        rows = await asyncio.to_thread(self.store.schedule)
+        self._heap = [(due, expiry if expiry is not None else math.inf, domain) for due, expiry, domain in rows]
+        heapq.heapify(self._heap)
+        self._due = {domain: due for due, _, domain in rows}
+        self._loaded_at = time.monotonic()
+
+    async def _next_due(self) -> tuple[str, float]:
+        """Wait until the earliest scheduled domain is due; pop and return it."""
+        while True:
+            if time.monotonic() - self._loaded_at >= config.WATCH_SYNC_INTERVAL:
+                await self._load()  # picks up domains added or claimed by other workers
+            self._wakeup.clear()
+            while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            delay = config.WATCH_SYNC_INTERVAL
+            if self._heap:
+                due, _, domain = self._heap[0]
+                if due <= time.time():
+                    heapq.heappop(self._heap)
+                    del self._due[domain]
+                    return domain, due
+                delay = min(delay, due - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 0.0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self) -> None:
+        await self._load()
+        while True:
+            await self._slots.acquire()
+            try:
+                domain, due = await self._next_due()
+                claimed = await asyncio.to_thread(
+                    self.store.claim, domain, due, time.time() + LEASE_SECONDS
+                )
+            except BaseException:
+                self._slots.release()
+                raise
+            if not claimed:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._check(domain))
+            self._running.add(task)
+            task.add_done_callback(self._check_done)
+
+    def _check_done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        self._slots.release()
+
+    async def _check(self, domain: str) -> None:
+        errors: dict[str, str] = {}
+        response: Optional[ScanResponse] = None
+        try:
+            with upstream_pool("watchlist"):
+                response = await run_scan(domain)
+            errors = response.errors
+        except Exception as exc:
+            errors = {"scan": str(exc) or type(exc).__name__}
+        self.checks += 1
+
+        # Sections of failed or unfinished modules (and of the modules built
+        # on them) keep their previous value instead of being recorded as emptied
+        failed = set(errors)
+        sections = {}
+        if response is not None:
+            failed = affected_modules([*errors, *(SECTION_MODULES[section] for section in response.pending if section in SECTION_MODULES)])
+            sections = {
+                section: section_value(getattr(response, section))
+                for section, module in SECTION_MODULES.items()
+                if module not in failed
+            }
+        # A check counts as failed when no upstream answered at all
+        if response is None or failed >= set(MODULE_UPSTREAMS):
+            self.failed_checks += 1
+
+        cert_expiry, expires_date = await asyncio.to_thread(self.store.expiries, domain)
+        if response is not None and "tls" not in failed:
+            cert_expiry = response.overview.cert_expiry
+        if response is not None and "whois" not in failed:
+            expires_date = response.overview.expires_date
+        known = [ts for ts in (parse_expiry(cert_expiry), parse_expiry(expires_date)) if ts is not None]
+        expiry = min(known) if known else None
+
+        now = time.time()
+        interval = next_interval(expiry, now)
+        due = now + interval * (1 + random.uniform(-config.WATCH_JITTER, config.WATCH_JITTER))
+        error = "; ".join(f"{name}: {message}" for name, message in errors.items()) or None
+
+        changed = await asyncio.to_thread(
+            self.store.record, domain, now, sections, cert_expiry, expires_date, expiry, due, error
+        )
+        if changed is not None:
+            self.changes += len(changed)
+            self.schedule(domain, due, expiry)
+
+
+_store: Optional[WatchStore] = None
+_scheduler: Optional[WatchScheduler] = None
+
+
+def get_watch_store() -> WatchStore:
+    """Return the process-wide watchlist store, creating it on first use."""
+    global _store
+    if _store is None:
+        _store = WatchStore(config.WATCH_PATH)
+    return _store
+
+
+def get_watch_scheduler() -> WatchScheduler:
+    """Return the process-wide scheduler (started in the app lifespan when enabled)."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = WatchScheduler(get_watch_store())
+    return _scheduler
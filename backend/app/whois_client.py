@@ -0,0 +1,279 @@
+"""
+WHOIS Client — native asyncio port-43 client shared by every scan.
+
+The WHOIS server for each TLD is discovered once from IANA and cached,
+registry answers are followed to the registrar's server, and every server
+gets its own concurrency limit and token bucket so a batch of domains
+under one TLD cannot trip the registry's rate limiter. When a server does
+refuse us, the lookup fails with ``WhoisThrottled`` and the server is left
+alone for a cooldown period instead of being hammered with retries. A
+server that stops answering trips its circuit breaker, and queries to it
+fail at once until a trial query gets through.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app import config
+from app.breakers import CircuitOpen, get_breaker
+from app.singleflight import SingleFlight
+
+
+class WhoisError(Exception):
+    """The WHOIS server could not be reached or returned nothing usable."""
+
+
+class WhoisThrottled(WhoisError):
+    """The WHOIS server is rate limiting us (or would be, if we queried it now)."""
+
+
+# Servers that need something other than the bare domain as the query
+_QUERY_FORMATS = {
+    "whois.verisign-grs.com": "domain {domain}",
+    "whois.denic.de": "-T dn,ace {domain}",
+    "whois.jprs.jp": "{domain}/e",
+}
+
+_IANA_WHOIS = re.compile(r"^(?:whois|refer):[ \t]*(\S+)", re.IGNORECASE | re.MULTILINE)
+_REFERRAL = re.compile(
+    r"^\s*(?:Registrar WHOIS Server|Whois Server|ReferralServer):[ \t]*(?:r?whois://)?([\w.-]+)",
+    re.IGNORECASE | re.MULTILINE,
+)
+_THROTTLED = re.compile(
+    r"limit exceeded|query rate|too many (?:requests|queries)|quota exceeded"
+    r"|exceeded the maximum|try again later",
+    re.IGNORECASE,
+)
+
+
+# ── Per-server politeness ─────────────────────────────────────────────────────
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """
+        Take a token, returning how long to wait before using it.
+
+        Returns None (taking nothing) if the wait would exceed ``max_wait``.
+        Tokens may go negative: each caller reserves its slot in the queue.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+        if wait > max_wait:
+            return None
+        self.tokens -= 1
+        return wait
+
+
+@dataclass
+class _ServerState:
+    semaphore: asyncio.Semaphore
+    bucket: _TokenBucket
+    cooldown_until: float = 0.0
+    queries: int = 0
+    errors: int = 0
+    throttled: int = 0
+    rejected: int = 0  # refused locally because the wait would exceed WHOIS_MAX_WAIT
+    latency_ms: Optional[float] = None  # exponentially weighted moving average
+
+    def stats(self) -> dict:
+        cooldown = self.cooldown_until - time.monotonic()
+        return {
+            "queries": self.queries,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "cooldown_seconds": round(cooldown, 1) if cooldown > 0 else 0,
+        }
+
+
+def _outage(exc: BaseException) -> Optional[bool]:
+    """Unreachable servers and empty answers count against the breaker; throttling does not."""
+    if isinstance(exc, WhoisThrottled):
+        return None
+    return isinstance(exc, WhoisError)
+
+
+# ── Client ────────────────────────────────────────────────────────────────────
+
+@dataclass
+class WhoisResponse:
+    """Raw WHOIS text plus the servers that produced it, registry first."""
+
+    text: str
+    servers: list[str] = field(default_factory=list)
+
+
+class WhoisClient:
+    def __init__(
+        self,
+        port: int = 43,
+        timeout: float = 10.0,
+        max_response: int = 1024 * 1024,
+        servers: Optional[dict[str, str]] = None,
+    ):
+        self.port = port
+        self.timeout = timeout
+        self.max_response = max_response
+        # TLD -> WHOIS server; None means IANA lists no server (RDAP only)
+        self._tld_servers: dict[str, Optional[str]] = dict(servers or {})
+        self._discovery = SingleFlight()
+        self._servers: dict[str, _ServerState] = {}
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    async def server_for(self, tld: str) -> Optional[str]:
+        """Return the WHOIS server for ``tld``, asking IANA the first time."""
+        tld = tld.lower().rstrip(".")
+        if tld not in self._tld_servers:
+            await self._discovery.do(tld, lambda: self._discover(tld))
+        return self._tld_servers.get(tld)
+
+    async def lookup(self, domain: str) -> Optional[WhoisResponse]:
+        """
+        Query the registry for ``domain`` and follow its referral, if any.
+
+        Returns None when the TLD has no WHOIS server. Raises WhoisThrottled
+        when the registry is rate limiting us and WhoisError on other
+        failures. A failing registrar referral keeps the registry answer.
+        """
+        server = await self.server_for(domain.rsplit(".", 1)[-1])
+        if server is None:
+            return None
+
+        text = await self.query(server, domain)
+        response = WhoisResponse(text=text, servers=[server])
+        for _ in range(config.WHOIS_MAX_REFERRALS):
+            referral = self._referral(text, response.servers)
+            if referral is None:
+                break
+            try:
+                text = await self.query(referral, domain)
+            except WhoisError:
+                break
+            response.text += "\n" + text
+            response.servers.append(referral)
+        return response
+
+    async def query(self, server: str, domain: str) -> str:
+        """Send one query to ``server`` within its breaker, concurrency and rate limits."""
+        state = self._state(server)
+        try:
+            with get_breaker(f"whois:{server}").guard(_outage):
+                return await self._query(state, server, domain)
+        except CircuitOpen as exc:
+            state.rejected += 1
+            raise WhoisError(str(exc)) from exc
+
+    async def _query(self, state: _ServerState, server: str, domain: str) -> str:
+        now = time.monotonic()
+        if state.cooldown_until > now:
+            state.rejected += 1
+            raise WhoisThrottled(
+                f"WHOIS server {server} is rate limiting; "
+                f"retry in {int(state.cooldown_until - now) + 1}s"
+            )
+        wait = state.bucket.reserve(config.WHOIS_MAX_WAIT)
+        if wait is None:
+            state.rejected += 1
+            raise WhoisThrottled(f"WHOIS query budget for {server} exhausted; try again shortly")
+        if wait:
+            await asyncio.sleep(wait)
+
+        async with state.semaphore:
+            started = time.monotonic()
+            state.queries += 1
+            try:
+                text = await asyncio.wait_for(self._exchange(server, domain), self.timeout)
+            except (OSError, asyncio.TimeoutError) as exc:
+                state.errors += 1
+                reason = "timed out" if isinstance(exc, asyncio.TimeoutError) else str(exc)
+                raise WhoisError(f"WHOIS query to {server} failed: {reason}") from exc
+            ms = (time.monotonic() - started) * 1000
+            state.latency_ms = ms if state.latency_ms is None else 0.8 * state.latency_ms + 0.2 * ms
+
+        if _THROTTLED.search(text[:4096]):
+            state.throttled += 1
+            state.cooldown_until = time.monotonic() + config.WHOIS_THROTTLE_COOLDOWN
+            raise WhoisThrottled(f"WHOIS server {server} refused the query: rate limit exceeded")
+        if not text.strip():
+            state.errors += 1
+            raise WhoisError(f"WHOIS server {server} returned an empty response")
+        return text
+
+    def stats(self) -> dict:
+        return {
+            "tld_servers": len(self._tld_servers),
+            "servers": {name: state.stats() for name, state in self._servers.items()},
+        }
+
+    # ── Internals ────────────────────────────────────────────────────────────
+
+    def _state(self, server: str) -> _ServerState:
+        state = self._servers.get(server)
+        if state is None:
+            state = self._servers[server] = _ServerState(
+                semaphore=asyncio.Semaphore(config.WHOIS_SERVER_CONCURRENCY),
+                bucket=_TokenBucket(config.WHOIS_SERVER_RATE, config.WHOIS_SERVER_BURST),
+            )
+        return state
+
+    async def _discover(self, tld: str) -> None:
+        text = await self.query(config.WHOIS_IANA_SERVER, tld)
+        match = _IANA_WHOIS.search(text)
+        self._tld_servers[tld] = match.group(1).lower() if match else None
+
+    @staticmethod
+    def _referral(text: str, visited: list[str]) -> Optional[str]:
+        for match in _REFERRAL.finditer(text):
+            server = match.group(1).lower().rstrip(".")
+            if server and server not in visited and "." in server:
+                return server
+        return None
+
+    async def _exchange(self, server: str, domain: str) -> str:
+        query = _QUERY_FORMATS.get(server, "{domain}").format(domain=domain)
+        reader, writer = await asyncio.open_connection(server, self.port)
+        try:
+            writer.write(query.encode() + b"\r\n")
+            await writer.drain()
+            chunks: list[bytes] = []
+            size = 0
+            while size < self.max_response:
+                chunk = await reader.read(min(65536, self.max_response - size))
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+        finally:
+            writer.close()
+        return b"".join(chunks).decode("utf-8", errors="replace")
+
+
+_client: Optional[WhoisClient] = None
+
+
+def get_whois_client() -> WhoisClient:
+    """Return the process-wide WHOIS client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = WhoisClient(
+            port=config.WHOIS_PORT,
+            timeout=config.WHOIS_TIMEOUT,
+            max_response=config.WHOIS_MAX_RESPONSE,
+            servers=config.WHOIS_SERVERS,
+        )
+    return _client
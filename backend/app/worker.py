@@ -0,0 +1,132 @@
+"""
+Scan Worker — runs queued scans from the job queue.
+
+Usage (from backend/, with the same OPENSCOPE_* settings as the API):
+    python -m app.worker
+    python -m app.worker --concurrency 32
+
+Each worker keeps up to ``--concurrency`` scans in flight and renews the
+leases of the jobs it holds. Start as many workers as the upstreams
+allow; per-upstream concurrency limits apply per process. SIGINT / SIGTERM
+stop claiming new jobs and let running scans finish.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import time
+from typing import Optional
+
+from app import config
+from app.cache import get_cache
+from app.ct_index import get_ct_index
+from app.history import get_history_store
+from app.http_clients import http_clients
+from app.jobs import Job, JobQueue, get_job_queue
+from app.pivot_index import get_pivot_index
+from app.responses import encode_json
+from app.scanner import plan_scan, run_scan
+
+
+PURGE_INTERVAL = 600  # seconds between sweeps of expired job results
+
+
+class Worker:
+    def __init__(self, queue: JobQueue, concurrency: int, name: Optional[str] = None):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._running: dict[str, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+        self._slot_free = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        renewer = asyncio.create_task(self._renew_leases())
+        purged_at = 0.0
+        try:
+            while not self._stopping.is_set():
+                if time.monotonic() - purged_at >= PURGE_INTERVAL:
+                    await asyncio.to_thread(self.queue.purge, time.time() - config.JOBS_RESULT_TTL)
+                    purged_at = time.monotonic()
+                self._slot_free.clear()
+                free = self.concurrency - len(self._running)
+                jobs = await asyncio.to_thread(self.queue.claim, self.name, free) if free else []
+                for job in jobs:
+                    task = asyncio.create_task(self._execute(job))
+                    self._running[job.id] = task
+                    task.add_done_callback(lambda _, job_id=job.id: self._finished(job_id))
+                if len(jobs) < free:
+                    await self._idle(config.JOBS_POLL_INTERVAL)  # queue drained
+                elif not free:
+                    await self._idle(None)  # wait for a running scan to finish
+            if self._running:
+                await asyncio.gather(*self._running.values(), return_exceptions=True)
+        finally:
+            renewer.cancel()
+
+    async def _idle(self, timeout: Optional[float]) -> None:
+        waits = [asyncio.create_task(self._stopping.wait()), asyncio.create_task(self._slot_free.wait())]
+        try:
+            await asyncio.wait(waits, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for wait in waits:
+                wait.cancel()
+
+    def _finished(self, job_id: str) -> None:
+        self._running.pop(job_id, None)
+        self._slot_free.set()
+
+    async def _execute(self, job: Job) -> None:
+        try:
+            modules, include = plan_scan(job.modules, job.fields)
+            result = await run_scan(job.domain, modules=modules)
+            body = encode_json(result, include)
+        except Exception as exc:
+            await asyncio.to_thread(self.queue.fail, self.name, job.id, str(exc) or type(exc).__name__)
+            return
+        await asyncio.to_thread(self.queue.complete, self.name, job.id, body)
+
+    async def _renew_leases(self) -> None:
+        while True:
+            await asyncio.sleep(config.JOBS_LEASE / 3)
+            await asyncio.to_thread(self.queue.renew, self.name, list(self._running))
+
+
+async def _main(concurrency: int) -> None:
+    worker = Worker(get_job_queue(), concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:
+            # Windows event loops have no signal handlers; hop onto the loop from the C-level handler
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(worker.stop))
+    http_clients.start()
+    try:
+        await worker.run()
+    finally:
+        await http_clients.aclose()
+        get_cache().close()
+        get_ct_index().close()
+        get_history_store().close()
+        get_pivot_index().close()
+        get_job_queue().close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=config.JOBS_WORKER_CONCURRENCY,
+                        help="scans in flight in this worker")
+    args = parser.parse_args()
+    asyncio.run(_main(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
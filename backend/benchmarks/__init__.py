@@ -0,0 +1 @@
+# OpenScope Benchmarks
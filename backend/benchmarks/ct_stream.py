@@ -0,0 +1,153 @@
+"""
+CT Parser Benchmark — streaming crt.sh parser vs. the old load-everything path.
+
+Generates a synthetic crt.sh payload (default 1,000,000 entries) and serves
+it through an in-memory httpx transport in 64 KiB chunks, so no network is
+involved. Each mode runs in its own subprocess and reports wall time and
+peak RSS.
+
+Usage (from backend/):
+    python -m benchmarks.ct_stream                      # both modes, 1M entries
+    python -m benchmarks.ct_stream --entries 200000 --modes legacy
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.models import HistoricalCertificate
+
+
+DOMAIN = "example.com"
+CHUNK_SIZE = 64 * 1024
+
+
+def _entry(i: int) -> dict:
+    day = i % 3650
+    return {
+        "issuer_ca_id": 16418,
+        "issuer_name": "C=US, O=Let's Encrypt, CN=R3",
+        "common_name": f"host{i % 5000}.{DOMAIN}",
+        "name_value": f"host{i % 5000}.{DOMAIN}\nwww.host{i % 5000}.{DOMAIN}",
+        "id": 1_000_000_000 + i,
+        "entry_timestamp": f"20{10 + day // 365:02d}-01-01T00:00:00.000",
+        "not_before": f"20{10 + day // 365:02d}-{1 + day % 12:02d}-{1 + day % 28:02d}T00:00:00",
+        "not_after": f"20{11 + day // 365:02d}-{1 + day % 12:02d}-{1 + day % 28:02d}T00:00:00",
+        # Every entry appears twice (precertificate + certificate), like crt.sh
+        "serial_number": f"{i // 2:032x}",
+    }
+
+
+async def _payload(entries: int):
+    """Yield the JSON array in fixed-size chunks without materialising it."""
+    buf = ["["]
+    size = 1
+    for i in range(entries):
+        piece = ("," if i else "") + json.dumps(_entry(i))
+        buf.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield "".join(buf).encode()
+            buf, size = [], 0
+    buf.append("]")
+    yield "".join(buf).encode()
+
+
+class _StreamingBody(httpx.AsyncByteStream):
+    def __init__(self, entries: int):
+        self.entries = entries
+
+    async def __aiter__(self):
+        async for chunk in _payload(self.entries):
+            yield chunk
+
+
+def _client(entries: int) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, stream=_StreamingBody(entries))
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def _run_streaming(entries: int) -> tuple[int, int]:
+    from app.modules.ct_lookup import lookup_ct
+
+    async with _client(entries) as client:
+        result = await lookup_ct(DOMAIN, client=client)
+    return len(result.certificates), len(result.names)
+
+
+async def _run_legacy(entries: int) -> tuple[int, int]:
+    """The pre-streaming implementation: resp.json(), one model per serial, full sort."""
+    async with _client(entries) as client:
+        resp = await client.get("https://crt.sh", params={"q": f"%.{DOMAIN}", "output": "json"})
+        data = resp.json()
+
+    seen: set[str] = set()
+    certs: list[HistoricalCertificate] = []
+    for entry in data:
+        serial = entry.get("serial_number", "")
+        if serial in seen:
+            continue
+        seen.add(serial)
+        name_value = entry.get("name_value", "")
+        certs.append(HistoricalCertificate(
+            issuer=entry.get("issuer_name"),
+            common_name=entry.get("common_name"),
+            serial_number=serial,
+            not_before=entry.get("not_before"),
+            not_after=entry.get("not_after"),
+            san_entries=[s.strip() for s in name_value.split("\n") if s.strip()],
+        ))
+    certs.sort(key=lambda c: c.not_before or "", reverse=True)
+    names = {n for c in certs for n in c.san_entries}
+    return len(certs[:50]), len(names)
+
+
+def _child(mode: str, entries: int) -> None:
+    runner = _run_streaming if mode == "streaming" else _run_legacy
+    started = time.perf_counter()
+    kept, names = asyncio.run(runner(entries))
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "mode": mode, "entries": entries, "kept": kept, "names": names,
+        "seconds": round(elapsed, 2), "peak_rss_mb": round(peak_kb / 1024, 1),
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--modes", nargs="+", default=["streaming", "legacy"],
+                        choices=["streaming", "legacy"])
+    parser.add_argument("--child", choices=["streaming", "legacy"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.entries)
+        return
+
+    print(f"{'mode':<10} {'entries':>10} {'kept':>5} {'names':>7} {'seconds':>8} {'peak RSS MB':>12}")
+    for mode in args.modes:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.ct_stream", "--child", mode, "--entries", str(args.entries)],
+            capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            print(f"{mode:<10} failed: {out.stderr.strip().splitlines()[-1] if out.stderr else out.returncode}")
+            continue
+        r = json.loads(out.stdout)
+        print(f"{r['mode']:<10} {r['entries']:>10} {r['kept']:>5} {r['names']:>7} "
+              f"{r['seconds']:>8} {r['peak_rss_mb']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Load Driver — scans per second, tail latency and memory against local stand-ins.
+
+Starts the upstream stand-ins (``benchmarks.standins``) in a subprocess,
+points the app at them through ``OPENSCOPE_*`` variables, then keeps
+``--concurrency`` scans in flight until ``--scans`` have finished, either
+by calling ``run_scan`` in this process or through ``POST /scan`` on a
+uvicorn server started in a subprocess. Reports throughput, scan latency
+and per-module p50/p95/p99 (from each response's timeline), module errors
+and peak RSS.
+
+The result cache is off unless ``--cache`` is given, rate limits are off
+and WHOIS politeness limits are lifted, so the numbers measure the scan
+path rather than our own throttling. Everything is written to a temporary
+data directory.
+
+Options not listed below (``--profile``, ``--cassette``, ``--record``,
+``--seed``) are passed to the stand-ins; see ``python -m benchmarks.standins -h``.
+Nothing from ``app`` is imported before the stand-in environment is set,
+since ``app.config`` reads it once at import.
+
+Usage (from backend/):
+    python -m benchmarks.load
+    python -m benchmarks.load --target http --scans 1000 --concurrency 64 --workers 2
+    python -m benchmarks.load --profile crt.sh:latency=1.5,payload=2000 --profile dns:failure_rate=0.02
+    python -m benchmarks.load --domains example.com,example.org --cassette data/bench-cassette.json --record
+    python -m benchmarks.load --domains example.com,example.org --cassette data/bench-cassette.json --json run.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class Sample:
+    seconds: float
+    modules: dict[str, float] = field(default_factory=dict)  # module -> duration ms
+    errors: list[str] = field(default_factory=list)  # modules that failed
+    failed: Optional[str] = None  # the scan itself failed (HTTP error, exception)
+
+
+# ── Environment ───────────────────────────────────────────────────────────────
+
+def _start_standins(argv: list[str]) -> tuple[subprocess.Popen, dict[str, str]]:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.standins", *argv],
+        stdout=subprocess.PIPE, text=True,
+    )
+    line = proc.stdout.readline()
+    if not line:
+        proc.wait()
+        sys.exit(f"stand-ins failed to start (exit code {proc.returncode})")
+    return proc, json.loads(line)["env"]
+
+
+def _stop(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def _app_env(args: argparse.Namespace, standin_env: dict[str, str], data_dir: str) -> dict[str, str]:
+    return {
+        **standin_env,
+        "OPENSCOPE_DATA_DIR": data_dir,
+        "OPENSCOPE_CACHE_ENABLED": "true" if args.cache else "false",
+        "OPENSCOPE_RATE_LIMIT_ENABLED": "false",
+        "OPENSCOPE_WHOIS_SERVER_CONCURRENCY": str(max(args.concurrency, 2)),
+        "OPENSCOPE_WHOIS_SERVER_RATE": "1000000",
+        "OPENSCOPE_WHOIS_SERVER_BURST": "1000000",
+    }
+
+
+def _domains(args: argparse.Namespace) -> list[str]:
+    pool = args.domains.split(",") if args.domains else [f"bench{i}.com" for i in range(args.distinct or args.scans)]
+    return [pool[i % len(pool)] for i in range(args.scans)]
+
+
+# ── Drivers ───────────────────────────────────────────────────────────────────
+
+def _sample(seconds: float, response: dict) -> Sample:
+    timeline = response.get("timeline") or {}
+    return Sample(
+        seconds=seconds,
+        modules={m["module"]: m["duration_ms"] for m in timeline.get("modules", [])},
+        errors=sorted(response.get("errors") or {}),
+    )
+
+
+async def _drive(domains: list[str], concurrency: int, scan) -> tuple[list[Sample], float]:
+    """Run ``scan(domain) -> Sample`` over ``domains`` with ``concurrency`` in flight."""
+    queue = iter(domains)
+    samples: list[Sample] = []
+
+    async def worker():
+        for domain in queue:
+            started = time.perf_counter()
+            try:
+                samples.append(await scan(domain, started))
+            except Exception as exc:
+                samples.append(Sample(seconds=time.perf_counter() - started, failed=f"{type(exc).__name__}: {exc}"))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+async def _run_in_process(domains: list[str], concurrency: int) -> tuple[list[Sample], float]:
+    # Imported only now: app.config reads the stand-in environment at import
+    from app.http_clients import http_clients
+    from app.scanner import run_scan
+
+    async def scan(domain: str, started: float) -> Sample:
+        response = await run_scan(domain)
+        return _sample(time.perf_counter() - started, response.model_dump(include={"timeline", "errors"}))
+
+    http_clients.start()
+    try:
+        return await _drive(domains, concurrency, scan)
+    finally:
+        await http_clients.aclose()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _run_over_http(
+    domains: list[str], concurrency: int, workers: int, env: dict[str, str]
+) -> tuple[list[Sample], float, subprocess.Popen]:
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+            "--log-level", "warning", "--no-access-log",
+        ],
+        env={**os.environ, **env},
+    )
+    base = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, timeout=120.0, limits=limits) as client:
+        for _ in range(300):
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if server.poll() is not None:
+                sys.exit(f"API server exited with code {server.returncode}")
+            await asyncio.sleep(0.1)
+
+        async def scan(domain: str, started: float) -> Sample:
+            resp = await client.post("/scan", json={"domain": domain})
+            resp.raise_for_status()
+            return _sample(time.perf_counter() - started, resp.json())
+
+        samples, wall = await _drive(domains, concurrency, scan)
+    return samples, wall, server
+
+
+# ── Memory ────────────────────────────────────────────────────────────────────
+
+def _psutil_peak_kib(pid: int) -> Optional[int]:
+    """Peak working set of ``pid`` plus its children via psutil (Windows only); None otherwise."""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    try:
+        process = psutil.Process(pid)
+        peaks = [getattr(p.memory_info(), "peak_wset", None) for p in [process, *process.children()]]
+    except psutil.Error:
+        return None
+    if any(peak is None for peak in peaks):
+        return None
+    return sum(peaks) // 1024
+
+
+def _own_peak_rss_kib() -> Optional[int]:
+    """Peak RSS of this process; None where neither ``resource`` nor psutil can tell."""
+    if resource is None:
+        return _psutil_peak_kib(os.getpid())
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # bytes on macOS, KiB elsewhere
+
+
+def _peak_rss_kib(pid: int) -> Optional[int]:
+    """VmHWM of ``pid`` plus its children (uvicorn workers); psutil where /proc is missing."""
+    total = 0
+    pids = [pid]
+    try:
+        children = Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+        pids += [int(child) for child in children]
+        for current in pids:
+            for line in Path(f"/proc/{current}/status").read_text().splitlines():
+                if line.startswith("VmHWM:"):
+                    total += int(line.split()[1])
+    except OSError:
+        return _psutil_peak_kib(pid)
+    return total
+
+
+# ── Report ────────────────────────────────────────────────────────────────────
+
+def _percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted ``values``."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, round(q / 100 * len(values) + 0.5) - 1))
+    return values[rank]
+
+
+def _summary(samples: list[Sample], wall: float, peak_rss_kib: Optional[int], args: argparse.Namespace) -> dict:
+    latencies = {"scan": sorted(s.seconds * 1000 for s in samples if s.failed is None)}
+    for sample in samples:
+        for module, ms in sample.modules.items():
+            latencies.setdefault(module, []).append(ms)
+    errors: dict[str, int] = {}
+    for sample in samples:
+        for module in sample.errors:
+            errors[module] = errors.get(module, 0) + 1
+    failures = [s.failed for s in samples if s.failed]
+    return {
+        "target": args.target,
+        "scans": len(samples),
+        "concurrency": args.concurrency,
+        "wall_seconds": round(wall, 3),
+        "throughput": round(len(samples) / wall, 2) if wall else 0.0,
+        "failed_scans": len(failures),
+        "first_failure": failures[0] if failures else None,
+        "module_errors": errors,
+        "latency_ms": {
+            name: {
+                "p50": round(_percentile(sorted(values), 50), 1),
+                "p95": round(_percentile(sorted(values), 95), 1),
+                "p99": round(_percentile(sorted(values), 99), 1),
+                "max": round(max(values), 1) if values else 0.0,
+            }
+            for name, values in latencies.items()
+        },
+        "peak_rss_mib": round(peak_rss_kib / 1024, 1) if peak_rss_kib is not None else None,
+    }
+
+
+def _print(summary: dict) -> None:
+    print(
+        f"{summary['target']}: {summary['scans']} scans, concurrency {summary['concurrency']}, "
+        f"{summary['wall_seconds']:.2f}s wall, {summary['throughput']:.1f} scans/s"
+    )
+    print(f"\n{'latency ms':<18} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for name, row in summary["latency_ms"].items():
+        print(f"{name:<18} {row['p50']:>9.1f} {row['p95']:>9.1f} {row['p99']:>9.1f} {row['max']:>9.1f}")
+    print()
+    if summary["module_errors"]:
+        print(f"module errors: {json.dumps(summary['module_errors'])}")
+    if summary["failed_scans"]:
+        print(f"failed scans: {summary['failed_scans']} (first: {summary['first_failure']})")
+    if summary["peak_rss_mib"] is not None:
+        print(f"peak RSS: {summary['peak_rss_mib']} MiB")
+
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("scan", "http"), default="scan",
+                        help="run_scan in this process, or POST /scan on a uvicorn subprocess")
+    parser.add_argument("--scans", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--domains", help="comma-separated domains to cycle through (default: bench<N>.com)")
+    parser.add_argument("--distinct", type=int, help="number of generated domains to cycle through (default: --scans)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for --target http")
+    parser.add_argument("--cache", action="store_true", help="keep the result cache enabled")
+    parser.add_argument("--json", type=Path, help="also write the summary to this file")
+    args, standin_args = parser.parse_known_args()
+
+    standins, standin_env = _start_standins(standin_args)
+    try:
+        with tempfile.TemporaryDirectory(prefix="openscope-bench-") as data_dir:
+            env = _app_env(args, standin_env, data_dir)
+            domains = _domains(args)
+            if args.target == "scan":
+                os.environ.update(env)
+                samples, wall = asyncio.run(_run_in_process(domains, args.concurrency))
+                peak = _own_peak_rss_kib()
+            else:
+                samples, wall, server = asyncio.run(
+                    _run_over_http(domains, args.concurrency, args.workers, env)
+                )
+                peak = _peak_rss_kib(server.pid)
+                _stop(server)
+    finally:
+        _stop(standins)
+
+    summary = _summary(samples, wall, peak, args)
+    _print(summary)
+    if args.json:
+        args.json.write_text(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Serialization Benchmark — ScanResponse build + encode, old path vs. fast path.
+
+Builds a synthetic scan (default 20,000 subdomains and 2,000 historical
+certificates, i.e. an uncapped response) and times, per iteration:
+
+- request:  ``ScanRequest(**json.loads(body))`` vs. ``model_validate_json``
+- build:    ``ScanResponse(**sections)`` vs. ``ScanResponse.model_construct``
+            over section models the modules already produced
+- encode:   FastAPI's ``jsonable_encoder`` + ``json.dumps`` vs. pydantic-core
+- compress: gzip (and brotli when installed) of the encoded body
+
+Usage (from backend/):
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --subdomains 100000 --certificates 5000 --iterations 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import time
+from typing import Callable
+
+from fastapi.encoders import jsonable_encoder
+
+from app import config
+from app.models import (
+    AsnInfo,
+    CertificateInfo,
+    DnsRecords,
+    HistoricalCertificate,
+    OverviewInfo,
+    ScanRequest,
+    ScanResponse,
+    SubdomainEntry,
+    WhoisInfo,
+)
+from app.responses import brotli, encode_json
+
+
+DOMAIN = "example.com"
+
+
+def _sections(subdomains: int, certificates: int) -> dict:
+    """Section data as the modules produce it."""
+    return {
+        "overview": OverviewInfo(domain=DOMAIN, ip_address="93.184.215.14", asn="AS15133"),
+        "certificates": CertificateInfo(issuer="DigiCert", san_entries=[DOMAIN, f"www.{DOMAIN}"]),
+        "historical_certificates": [
+            HistoricalCertificate(
+                issuer="C=US, O=Let's Encrypt, CN=R3",
+                common_name=f"host{i}.{DOMAIN}",
+                serial_number=f"{i:032x}",
+                not_before="2024-01-01T00:00:00",
+                not_after="2024-04-01T00:00:00",
+                san_entries=[f"host{i}.{DOMAIN}", f"www.host{i}.{DOMAIN}"],
+            )
+            for i in range(certificates)
+        ],
+        "dns_records": DnsRecords(A=["93.184.215.14"], NS=["a.iana-servers.net."]),
+        "whois": WhoisInfo(registrar="RESERVED-Internet Assigned Numbers Authority"),
+        "asn_info": AsnInfo(asn="AS15133", country="US"),
+        "subdomains": [
+            SubdomainEntry(
+                subdomain=f"host{i}.dev{i % 50}.{DOMAIN}",
+                source="crt.sh",
+                sources=["crt.sh"],
+                first_seen="2021-03-04T00:00:00",
+                last_seen="2024-01-01T00:00:00",
+            )
+            for i in range(subdomains)
+        ],
+    }
+
+
+def _legacy(body: bytes, sections: dict) -> dict[str, Callable[[], object]]:
+    state: dict = {}
+
+    def request():
+        return ScanRequest(**json.loads(body))
+
+    def build():
+        state["resp"] = ScanResponse(
+            domain=DOMAIN, scan_timestamp="2026-01-01T00:00:00+00:00",
+            **sections,
+        )
+
+    def encode():
+        state["body"] = json.dumps(
+            jsonable_encoder(state["resp"]), ensure_ascii=False, separators=(",", ":")
+        ).encode()
+
+    return {"request": request, "build": build, "encode": encode, "_state": state}
+
+
+def _fast(body: bytes, sections: dict) -> dict[str, Callable[[], object]]:
+    state: dict = {}
+
+    def request():
+        return ScanRequest.model_validate_json(body)
+
+    def build():
+        state["resp"] = ScanResponse.model_construct(
+            domain=DOMAIN, scan_timestamp="2026-01-01T00:00:00+00:00",
+            **sections,
+        )
+
+    def encode():
+        state["body"] = encode_json(state["resp"])
+
+    return {"request": request, "build": build, "encode": encode, "_state": state}
+
+
+def _time(fn: Callable[[], object], iterations: int) -> float:
+    """Best-of-N wall time in milliseconds."""
+    best = float("inf")
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subdomains", type=int, default=20_000)
+    parser.add_argument("--certificates", type=int, default=2_000)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    body = json.dumps({"domain": f"https://{DOMAIN}/", "fields": ["overview", "subdomains"]}).encode()
+    sections = _sections(args.subdomains, args.certificates)
+    paths = {
+        "legacy": _legacy(body, sections),
+        "fast": _fast(body, sections),
+    }
+
+    print(f"{'stage':<10} {'legacy ms':>10} {'fast ms':>10} {'speedup':>8}")
+    for stage in ("request", "build", "encode"):
+        legacy = _time(paths["legacy"][stage], args.iterations)
+        fast = _time(paths["fast"][stage], args.iterations)
+        print(f"{stage:<10} {legacy:>10.2f} {fast:>10.3f} {legacy / fast:>7.1f}x")
+
+    legacy_body = paths["legacy"]["_state"]["body"]
+    fast_body = paths["fast"]["_state"]["body"]
+    assert json.loads(legacy_body) == json.loads(fast_body), "fast path changed the output"
+
+    print(f"\n{'encoding':<10} {'bytes':>12} {'ms':>10}")
+    print(f"{'identity':<10} {len(fast_body):>12} {0:>10.2f}")
+    gz = _time(lambda: gzip.compress(fast_body, compresslevel=config.RESPONSE_GZIP_LEVEL), args.iterations)
+    print(f"{'gzip':<10} {len(gzip.compress(fast_body, compresslevel=config.RESPONSE_GZIP_LEVEL)):>12} {gz:>10.2f}")
+    if brotli is not None:
+        quality = config.RESPONSE_BROTLI_QUALITY
+        br = _time(lambda: brotli.compress(fast_body, quality=quality), args.iterations)
+        print(f"{'br':<10} {len(brotli.compress(fast_body, quality=quality)):>12} {br:>10.2f}")
+    else:
+        print(f"{'br':<10} {'(install brotli)':>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,675 @@
+"""
+Upstream Stand-ins — local fakes of every service a scan talks to.
+
+One process serves:
+
+- DNS       UDP server answering A/AAAA/MX/TXT/NS/CNAME/SOA
+- WHOIS     port-43 server answering IANA referrals (pointing back at
+            itself) and registry-style domain records
+- TLS       server presenting a certificate issued on the fly for the SNI
+            name by a generated CA (trusted via ``OPENSCOPE_TLS_CA_FILE``)
+- HTTP      crt.sh, RDAP (IP and domain) and ipinfo.io look-alikes
+
+Each upstream has a profile of latency, jitter, failure rate and payload
+size (crt.sh entries, TXT records, SAN entries, WHOIS notice lines). On
+start the process prints one JSON line ``{"env": {...}}`` with the
+``OPENSCOPE_*`` variables that point the app at it.
+
+Answers are synthetic by default. With ``--cassette FILE --record`` the
+DNS, WHOIS and HTTP stand-ins forward to the real upstreams and save every
+answer; with ``--cassette FILE`` alone they replay the saved answers, so
+regression runs see identical upstream data. The TLS stand-in always uses
+its generated CA, since a recorded certificate cannot be served without
+its private key.
+
+Usage (from backend/):
+    python -m benchmarks.standins
+    python -m benchmarks.standins --profile crt.sh:latency=1.5,payload=5000 --profile whois:failure_rate=0.05
+    python -m benchmarks.standins --cassette data/bench-cassette.json --record
+    python -m benchmarks.standins --cassette data/bench-cassette.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import hashlib
+import json
+import random
+import signal
+import socket
+import ssl
+import sys
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+import httpx
+import uvicorn
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app import config
+from app.resolver import DnsResolver
+from app.whois_client import _REFERRAL, WhoisClient
+
+
+# ── Profiles ──────────────────────────────────────────────────────────────────
+
+@dataclass
+class Profile:
+    latency: float = 0.02  # seconds before each answer
+    jitter: float = 0.0  # ± uniform spread around latency
+    failure_rate: float = 0.0  # share of requests answered with an error
+    payload: int = 2  # upstream-specific size knob, see the module docstring
+
+    async def wait(self, rng: random.Random) -> None:
+        delay = self.latency + rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def fails(self, rng: random.Random) -> bool:
+        return rng.random() < self.failure_rate
+
+
+DEFAULT_PROFILES: dict[str, Profile] = {
+    "dns": Profile(latency=0.005, payload=2),
+    "whois": Profile(latency=0.15, payload=20),
+    "tls": Profile(latency=0.03, payload=2),
+    "crt.sh": Profile(latency=0.4, payload=200),
+    "rdap": Profile(latency=0.1),
+    "ipinfo": Profile(latency=0.05),
+}
+
+
+def parse_profile(spec: str) -> tuple[str, dict[str, float]]:
+    """Parse ``upstream:key=value,...`` (e.g. ``crt.sh:latency=1.5,payload=500``)."""
+    name, _, settings = spec.partition(":")
+    if name not in DEFAULT_PROFILES:
+        raise argparse.ArgumentTypeError(f"unknown upstream {name!r}; one of {', '.join(DEFAULT_PROFILES)}")
+    known = {f.name: f.type for f in fields(Profile)}
+    values: dict[str, float] = {}
+    for item in filter(None, settings.split(",")):
+        key, _, raw = item.partition("=")
+        if key not in known:
+            raise argparse.ArgumentTypeError(f"unknown profile setting {key!r}; one of {', '.join(known)}")
+        values[key] = int(raw) if known[key] == "int" else float(raw)
+    return name, values
+
+
+def build_profiles(specs: list[str]) -> dict[str, Profile]:
+    profiles = dict(DEFAULT_PROFILES)
+    for spec in specs:
+        name, values = parse_profile(spec)
+        profiles[name] = replace(profiles[name], **values)
+    return profiles
+
+
+# ── Record / replay ───────────────────────────────────────────────────────────
+
+class Cassette:
+    """Recorded upstream answers keyed by ``"<upstream> <request>"``, stored as JSON."""
+
+    def __init__(self, path: Optional[Path], record: bool = False):
+        self.path = path
+        self.recording = path is not None and record
+        self.replaying = path is not None and not record
+        self._entries: dict[str, Any] = {}
+        if self.replaying:
+            self._entries = json.loads(path.read_text())
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+
+    def save(self) -> None:
+        if self.recording:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self._entries, indent=1, sort_keys=True))
+
+
+# ── DNS ───────────────────────────────────────────────────────────────────────
+
+class _DnsProtocol(asyncio.DatagramProtocol):
+    def __init__(self, standins: "StandIns"):
+        self.standins = standins
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        task = asyncio.create_task(self._answer(data, addr))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _answer(self, data: bytes, addr) -> None:
+        try:
+            query = dns.message.from_wire(data)
+        except Exception:
+            return
+        response = dns.message.make_response(query)
+        profile = self.standins.profiles["dns"]
+        await profile.wait(self.standins.rng)
+        if profile.fails(self.standins.rng):
+            response.set_rcode(dns.rcode.SERVFAIL)
+        else:
+            for question in query.question:
+                name = question.name.to_text(omit_final_dot=True).lower()
+                rdtype = dns.rdatatype.to_text(question.rdtype)
+                try:
+                    records = await self.standins.dns_records(name, rdtype)
+                except Exception:
+                    response.set_rcode(dns.rcode.SERVFAIL)
+                    break
+                if records:
+                    response.answer.append(
+                        dns.rrset.from_text_list(question.name, 300, "IN", rdtype, records)
+                    )
+        self.transport.sendto(response.to_wire(), addr)
+
+
+def _synthetic_dns(name: str, rdtype: str, address: str, payload: int) -> list[str]:
+    return {
+        "A": [address],
+        "MX": [f"10 mail.{name}."],
+        "TXT": ['"v=spf1 -all"'] + [f'"bench-verification={i}"' for i in range(payload)],
+        "NS": [f"ns1.{name}.", f"ns2.{name}."],
+        "SOA": [f"ns1.{name}. hostmaster.{name}. 1 7200 3600 1209600 300"],
+    }.get(rdtype, [])
+
+
+# ── WHOIS ─────────────────────────────────────────────────────────────────────
+
+def _synthetic_whois(domain: str, payload: int) -> str:
+    lines = [
+        f"   Domain Name: {domain.upper()}",
+        "   Registry Domain ID: 0000000000_DOMAIN-BENCH",
+        "   Registrar: Bench Registrar, Inc.",
+        "   Registrar IANA ID: 9999",
+        "   Updated Date: 2024-01-01T00:00:00Z",
+        "   Creation Date: 2001-01-01T00:00:00Z",
+        "   Registry Expiry Date: 2030-01-01T00:00:00Z",
+        "   Domain Status: clientTransferProhibited",
+        f"   Name Server: NS1.{domain.upper()}",
+        f"   Name Server: NS2.{domain.upper()}",
+        "   DNSSEC: unsigned",
+        ">>> Last update of whois database: 2024-01-01T00:00:00Z <<<",
+        "",
+    ]
+    lines += [f"NOTICE: synthetic registry terms of use, line {i}." for i in range(payload)]
+    return "\r\n".join(lines) + "\r\n"
+
+
+# ── TLS ───────────────────────────────────────────────────────────────────────
+
+class _CertificateAuthority:
+    """Generated CA issuing one leaf per SNI name, cached as SSL contexts."""
+
+    def __init__(self, directory: Path, max_contexts: int = 4096):
+        self.directory = directory
+        self.max_contexts = max_contexts
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.not_before = now - datetime.timedelta(days=1)
+        self.not_after = now + datetime.timedelta(days=90)
+
+        self.key = ec.generate_private_key(ec.SECP256R1())
+        self.name = x509.Name([
+            x509.NameAttribute(NameOID.ORGANIZATION_NAME, "OpenScope Bench"),
+            x509.NameAttribute(NameOID.COMMON_NAME, "OpenScope Bench CA"),
+        ])
+        self.cert = (
+            x509.CertificateBuilder()
+            .subject_name(self.name).issuer_name(self.name)
+            .public_key(self.key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(self.not_before).not_valid_after(self.not_after)
+            .add_extension(x509.BasicConstraints(ca=True, path_length=0), critical=True)
+            .add_extension(
+                x509.KeyUsage(
+                    digital_signature=True, key_cert_sign=True, crl_sign=True,
+                    content_commitment=False, key_encipherment=False, data_encipherment=False,
+                    key_agreement=False, encipher_only=False, decipher_only=False,
+                ),
+                critical=True,
+            )
+            .sign(self.key, hashes.SHA256())
+        )
+        self.ca_file = directory / "ca.pem"
+        self.ca_file.write_bytes(self.cert.public_bytes(serialization.Encoding.PEM))
+
+        # One key for every leaf: issuing stays cheap for thousands of names
+        self.leaf_key = ec.generate_private_key(ec.SECP256R1())
+        self.key_file = directory / "leaf-key.pem"
+        self.key_file.write_bytes(self.leaf_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+        self._contexts: OrderedDict[str, ssl.SSLContext] = OrderedDict()
+
+    def context_for(self, name: str, extra_sans: int) -> ssl.SSLContext:
+        context = self._contexts.get(name)
+        if context is not None:
+            self._contexts.move_to_end(name)
+            return context
+
+        sans = [name, f"www.{name}"] + [f"san{i}.{name}" for i in range(extra_sans)]
+        leaf = (
+            x509.CertificateBuilder()
+            .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, name)]))
+            .issuer_name(self.name)
+            .public_key(self.leaf_key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(self.not_before).not_valid_after(self.not_after)
+            .add_extension(x509.SubjectAlternativeName([x509.DNSName(san) for san in sans]), critical=False)
+            .sign(self.key, hashes.SHA256())
+        )
+        chain_file = self.directory / f"leaf-{hashlib.sha1(name.encode()).hexdigest()}.pem"
+        chain_file.write_bytes(
+            leaf.public_bytes(serialization.Encoding.PEM) + self.cert.public_bytes(serialization.Encoding.PEM)
+        )
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(chain_file, self.key_file)
+
+        self._contexts[name] = context
+        while len(self._contexts) > self.max_contexts:
+            self._contexts.popitem(last=False)
+        return context
+
+
+class _TlsProtocol(asyncio.Protocol):
+    """
+    Holds a new connection for the profile latency, then upgrades it to TLS.
+
+    Reading is paused at once so the ClientHello stays in the socket until
+    the TLS layer is in place to receive it.
+    """
+
+    def __init__(self, standins: "StandIns"):
+        self.standins = standins
+        self._task: Optional[asyncio.Task] = None
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        transport.pause_reading()
+        self._task = asyncio.create_task(self.standins.tls_handshake(transport, self))
+
+    def eof_received(self) -> bool:
+        return False  # the client is done once it has the certificate: close
+
+
+# ── HTTP (crt.sh, RDAP, ipinfo) ───────────────────────────────────────────────
+
+def _synthetic_ct(domain: str, payload: int) -> list[dict]:
+    entries = []
+    for i in range(payload):
+        host = f"host{i // 2}.{domain}"
+        year = 2015 + (i // 2) % 10
+        entries.append({
+            "issuer_ca_id": 16418,
+            "issuer_name": "C=US, O=Let's Encrypt, CN=R3",
+            "common_name": host,
+            "name_value": f"{host}\nwww.{host}",
+            "id": 1_000_000_000 + i,
+            "entry_timestamp": f"{year}-01-01T00:00:00.000",
+            "not_before": f"{year}-01-01T00:00:00",
+            "not_after": f"{year}-04-01T00:00:00",
+            # Every certificate appears twice (precertificate + certificate), like crt.sh
+            "serial_number": f"{i // 2:032x}",
+        })
+    return entries
+
+
+def _vcard(name: str) -> list:
+    return ["vcard", [["version", {}, "text", "4.0"], ["fn", {}, "text", name]]]
+
+
+def _synthetic_rdap_ip(ip: str) -> dict:
+    return {
+        "objectClassName": "ip network",
+        "handle": f"NET-BENCH-{ip}",
+        "startAddress": ip,
+        "endAddress": ip,
+        "name": "BENCH-NET",
+        "country": "ZZ",
+        "entities": [{"roles": ["registrant"], "vcardArray": _vcard("Bench Networks")}],
+    }
+
+
+def _synthetic_rdap_domain(domain: str) -> dict:
+    return {
+        "objectClassName": "domain",
+        "ldhName": domain,
+        "events": [
+            {"eventAction": "registration", "eventDate": "2001-01-01T00:00:00Z"},
+            {"eventAction": "expiration", "eventDate": "2030-01-01T00:00:00Z"},
+        ],
+        "nameservers": [{"ldhName": f"ns1.{domain}"}, {"ldhName": f"ns2.{domain}"}],
+        "entities": [{"roles": ["registrar"], "vcardArray": _vcard("Bench Registrar, Inc.")}],
+    }
+
+
+def _synthetic_ipinfo(ip: str) -> dict:
+    return {"ip": ip, "org": "AS64500 Bench Networks", "country": "ZZ"}
+
+
+# ── Server ────────────────────────────────────────────────────────────────────
+
+class StandIns:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        profiles: Optional[dict[str, Profile]] = None,
+        cassette: Optional[Cassette] = None,
+        workdir: Optional[Path] = None,
+        seed: int = 0,
+    ):
+        self.host = host
+        self.profiles = profiles or dict(DEFAULT_PROFILES)
+        self.cassette = cassette or Cassette(None)
+        self.rng = random.Random(seed)
+        self.workdir = workdir or Path(tempfile.mkdtemp(prefix="openscope-standins-"))
+        self.ca = _CertificateAuthority(self.workdir)
+        self.ports: dict[str, int] = {}
+        self.served: dict[str, int] = {name: 0 for name in self.profiles}
+
+        # Real upstreams, only used while recording
+        self._real_dns: Optional[DnsResolver] = None
+        self._real_whois: Optional[WhoisClient] = None
+        self._real_http: Optional[httpx.AsyncClient] = None
+
+        self._dns_transport: Optional[asyncio.DatagramTransport] = None
+        self._servers: list[asyncio.AbstractServer] = []
+        self._http: Optional[uvicorn.Server] = None
+        self._http_task: Optional[asyncio.Task] = None
+
+        # Served before SNI picks a per-name certificate (and to clients sending no SNI)
+        self._tls_context = self.ca.context_for("localhost", 0)
+        self._tls_context.sni_callback = self._select_certificate
+
+    # ── Lifecycle ────────────────────────────────────────────────────────────
+
+    async def start(self) -> dict[str, str]:
+        """Start every stand-in on an ephemeral port; return the app's env overrides."""
+        if self.cassette.recording:
+            self._real_dns = DnsResolver(config.DNS_NAMESERVERS, port=53, timeout=config.DNS_TIMEOUT)
+            self._real_whois = WhoisClient(port=43, timeout=config.WHOIS_TIMEOUT)
+            self._real_http = httpx.AsyncClient(timeout=30.0, follow_redirects=True)
+
+        loop = asyncio.get_running_loop()
+        self._dns_transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DnsProtocol(self), local_addr=(self.host, 0)
+        )
+        self.ports["dns"] = self._dns_transport.get_extra_info("sockname")[1]
+
+        whois = await asyncio.start_server(self._whois_connection, self.host, 0)
+        tls = await loop.create_server(lambda: _TlsProtocol(self), self.host, 0)
+        self._servers += [whois, tls]
+        self.ports["whois"] = whois.sockets[0].getsockname()[1]
+        self.ports["tls"] = tls.sockets[0].getsockname()[1]
+
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, 0))
+        self.ports["http"] = sock.getsockname()[1]
+        self._http = uvicorn.Server(uvicorn.Config(
+            self._http_app(), log_level="warning", access_log=False, lifespan="off",
+        ))
+        self._http_task = asyncio.create_task(self._http.serve(sockets=[sock]))
+        while not self._http.started:
+            if self._http_task.done():
+                self._http_task.result()
+            await asyncio.sleep(0.01)
+        return self.env()
+
+    def env(self) -> dict[str, str]:
+        http = f"http://{self.host}:{self.ports['http']}"
+        return {
+            "OPENSCOPE_DNS_NAMESERVERS": self.host,
+            "OPENSCOPE_DNS_PORT": str(self.ports["dns"]),
+            "OPENSCOPE_WHOIS_IANA_SERVER": self.host,
+            "OPENSCOPE_WHOIS_PORT": str(self.ports["whois"]),
+            "OPENSCOPE_TLS_PORT": str(self.ports["tls"]),
+            "OPENSCOPE_TLS_CA_FILE": str(self.ca.ca_file),
+            "OPENSCOPE_CRT_SH_URL": f"{http}/crt.sh/",
+            "OPENSCOPE_RDAP_IP_URL": f"{http}/rdap/ip",
+            "OPENSCOPE_RDAP_DOMAIN_URL": f"{http}/rdap/domain/{{domain}}",
+            "OPENSCOPE_IPINFO_URL": f"{http}/ipinfo",
+        }
+
+    async def wait(self) -> None:
+        """Serve until the HTTP stand-in is told to exit (SIGINT / SIGTERM)."""
+        await self._http_task
+
+    async def close(self) -> None:
+        self.cassette.save()
+        if self._http is not None:
+            self._http.should_exit = True
+            await self._http_task
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        if self._dns_transport is not None:
+            self._dns_transport.close()
+        if self._real_http is not None:
+            await self._real_http.aclose()
+
+    # ── Answer sources ───────────────────────────────────────────────────────
+
+    async def _answer(
+        self,
+        key: str,
+        record: Callable[[], Awaitable[Any]],
+        synthesize: Callable[[], Any],
+        missing: Any,
+    ) -> Any:
+        """
+        Synthesize, record from the real upstream, or replay ``key``.
+
+        A failed recording raises and is not saved; callers answer with the
+        upstream's own kind of failure.
+        """
+        if self.cassette.replaying:
+            value = self.cassette.get(key)
+            return missing if value is None else value
+        if self.cassette.recording:
+            value = await record()
+            self.cassette.put(key, value)
+            return value
+        return synthesize()
+
+    async def dns_records(self, name: str, rdtype: str) -> list[str]:
+        self.served["dns"] += 1
+
+        return await self._answer(
+            f"dns {name} {rdtype}", lambda: self._real_dns.resolve(name, rdtype),
+            lambda: _synthetic_dns(name, rdtype, self.host, self.profiles["dns"].payload),
+            [],
+        )
+
+    async def whois_text(self, query: str) -> str:
+        if "." not in query:
+            # IANA-style TLD query: every TLD is served by this stand-in
+            return f"refer:        {self.host}\n\ndomain:       {query.upper()}\n\nwhois:        {self.host}\n"
+        self.served["whois"] += 1
+
+        async def record() -> str:
+            response = await self._real_whois.lookup(query)
+            if response is None:
+                return f"No match for \"{query.upper()}\".\n"
+            # Referrals were already followed; the app must not chase real servers
+            return _REFERRAL.sub("", response.text)
+
+        return await self._answer(
+            f"whois {query}", record,
+            lambda: _synthetic_whois(query, self.profiles["whois"].payload),
+            f"No match for \"{query.upper()}\".\n",
+        )
+
+    async def http_answer(self, upstream: str, key: str, real_url: str, synthesize: Callable[[], Any]) -> Response:
+        self.served[upstream] += 1
+        profile = self.profiles[upstream]
+        await profile.wait(self.rng)
+        if profile.fails(self.rng):
+            return Response("stand-in failure", status_code=503, media_type="text/plain")
+
+        async def record() -> dict:
+            resp = await self._real_http.get(real_url)
+            return {
+                "status": resp.status_code,
+                "content_type": resp.headers.get("content-type", "application/json"),
+                "body": resp.text,
+            }
+
+        try:
+            entry = await self._answer(
+                f"{upstream} {key}", record,
+                lambda: {"status": 200, "content_type": "application/json", "body": json.dumps(synthesize())},
+                {"status": 404, "content_type": "application/json", "body": "{}"},
+            )
+        except httpx.HTTPError as exc:
+            return Response(f"stand-in could not reach {upstream}: {exc}", status_code=502, media_type="text/plain")
+        return Response(entry["body"], status_code=entry["status"], media_type=entry["content_type"])
+
+    # ── Protocol handlers ────────────────────────────────────────────────────
+
+    async def _whois_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            line = await asyncio.wait_for(reader.readline(), timeout=10)
+            query = line.decode("utf-8", errors="replace").strip()
+            profile = self.profiles["whois"]
+            await profile.wait(self.rng)
+            if query and not profile.fails(self.rng):  # failures: close without answering
+                writer.write((await self.whois_text(query)).encode())
+                await writer.drain()
+        except Exception:
+            pass  # timeouts, resets and failed recordings: close without an answer
+        finally:
+            writer.close()
+
+    async def tls_handshake(self, transport: asyncio.Transport, protocol: asyncio.Protocol) -> None:
+        self.served["tls"] += 1
+        profile = self.profiles["tls"]
+        await profile.wait(self.rng)
+        if profile.fails(self.rng):
+            transport.abort()  # connection reset before the handshake
+            return
+        try:
+            await asyncio.get_running_loop().start_tls(
+                transport, protocol, self._tls_context, server_side=True, ssl_handshake_timeout=10,
+            )
+        except (asyncio.TimeoutError, ConnectionError, ssl.SSLError, OSError):
+            transport.abort()
+
+    def _select_certificate(self, ssl_object: ssl.SSLObject, server_name: Optional[str], _context) -> None:
+        if server_name:
+            ssl_object.context = self.ca.context_for(server_name.lower(), self.profiles["tls"].payload)
+
+    def _http_app(self) -> Starlette:
+        async def crt_sh(request: Request) -> Response:
+            domain = request.query_params.get("q", "").removeprefix("%.")
+            return await self.http_answer(
+                "crt.sh", request.url.query, f"{config.CRT_SH_URL}?{request.url.query}",
+                lambda: _synthetic_ct(domain, self.profiles["crt.sh"].payload),
+            )
+
+        async def rdap_ip(request: Request) -> Response:
+            ip = request.path_params["ip"]
+            return await self.http_answer(
+                "rdap", f"ip/{ip}", f"{config.RDAP_IP_URL}/{ip}", lambda: _synthetic_rdap_ip(ip)
+            )
+
+        async def rdap_domain(request: Request) -> Response:
+            domain = request.path_params["domain"]
+            return await self.http_answer(
+                "rdap", f"domain/{domain}", config.RDAP_DOMAIN_URL.format(domain=domain),
+                lambda: _synthetic_rdap_domain(domain),
+            )
+
+        async def ipinfo(request: Request) -> Response:
+            ip = request.path_params["ip"]
+            return await self.http_answer(
+                "ipinfo", ip, f"{config.IPINFO_URL}/{ip}/json", lambda: _synthetic_ipinfo(ip)
+            )
+
+        return Starlette(routes=[
+            Route("/crt.sh/", crt_sh),
+            Route("/rdap/ip/{ip}", rdap_ip),
+            Route("/rdap/domain/{domain}", rdap_domain),
+            Route("/ipinfo/{ip}/json", ipinfo),
+        ])
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+async def _serve(args: argparse.Namespace) -> None:
+    standins = StandIns(
+        host=args.host,
+        profiles=build_profiles(args.profile),
+        cassette=Cassette(args.cassette, record=args.record),
+        seed=args.seed,
+    )
+    env = await standins.start()
+    print(json.dumps({"env": env}), flush=True)
+    print(
+        "Stand-ins ready; point the app at them with:\n"
+        + "\n".join(f"  export {key}='{value}'" for key, value in env.items()),
+        file=sys.stderr,
+    )
+    try:
+        await standins.wait()
+    finally:
+        standins.cassette.save()
+        print(f"served: {json.dumps(standins.served)}", file=sys.stderr)
+        if standins.cassette.replaying and standins.cassette.misses:
+            print(f"cassette misses: {standins.cassette.misses}", file=sys.stderr)
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--profile", action="append", default=[], metavar="UPSTREAM:KEY=VALUE,...",
+        help=f"override an upstream profile ({', '.join(DEFAULT_PROFILES)}); "
+             f"keys: {', '.join(f.name for f in fields(Profile))}",
+    )
+    parser.add_argument("--cassette", type=Path, help="replay answers from this file (or record into it)")
+    parser.add_argument("--record", action="store_true", help="forward to the real upstreams and save to --cassette")
+    parser.add_argument("--seed", type=int, default=0, help="seed for jitter and injected failures")
+    args = parser.parse_args()
+    if args.record and not args.cassette:
+        parser.error("--record needs --cassette")
+    if args.cassette and not args.record and not args.cassette.exists():
+        parser.error(f"{args.cassette} does not exist; record it first with --record")
+
+    # Both stop signals end up as KeyboardInterrupt after uvicorn's graceful exit
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Shared test setup. Settings are read from the environment when app.config
+is imported, so every store is pointed at a scratch directory first.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault("OPENSCOPE_DATA_DIR", tempfile.mkdtemp(prefix="openscope-tests-"))
+
+from app import config  # noqa: E402  (reads the environment above)
+from app.models import AsnInfo, CertificateInfo, CtLookup, CtName, DnsRecords, WhoisInfo  # noqa: E402
+
+
+@pytest.fixture
+def fake_upstreams(monkeypatch):
+    """
+    Replace every upstream lookup of the scanner with a canned answer.
+
+    Returns the dict of fakes by module name; a test swaps one out to make
+    that upstream fail.
+    """
+    import app.scanner as scanner
+
+    async def dns(domain):
+        return DnsRecords(A=["192.0.2.1"], NS=["ns1.example.net"])
+
+    async def whois(domain):
+        return WhoisInfo(registrar="Example Registrar")
+
+    async def tls(domain, **kwargs):
+        return CertificateInfo(serial_number="01", not_after="2030-01-01", san_entries=[f"www.{domain}"])
+
+    async def ct(domain, client=None):
+        return CtLookup(names=[CtName(name=f"api.{domain}", first_seen="2024-01-01")])
+
+    async def asn(domain, ip_address=None, **kwargs):
+        return AsnInfo(asn="AS64500", country="NL")
+
+    fakes = {"dns": dns, "whois": whois, "tls": tls, "ct": ct, "asn": asn}
+    monkeypatch.setattr(config, "CACHE_ENABLED", False)
+    for name, attribute in (
+        ("dns", "lookup_dns"), ("whois", "lookup_whois"), ("tls", "inspect_tls"),
+        ("ct", "lookup_ct"), ("asn", "lookup_asn"),
+    ):
+        monkeypatch.setattr(scanner, attribute, lambda *args, _name=name, **kwargs: fakes[_name](*args, **kwargs))
+    return fakes
@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app import config
+from app.breakers import CircuitBreaker, CircuitOpen, deadline
+from app.http_clients import _BreakerTransport
+
+
+async def _hang(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(60)
+    raise AssertionError("unreachable")
+
+
+def test_deadline_timeouts_open_breaker():
+    async def scenario() -> CircuitBreaker:
+        breaker = CircuitBreaker("hung")
+
+        async def call():
+            with breaker.guard():
+                await asyncio.sleep(60)
+
+        for _ in range(config.BREAKER_FAILURES):
+            with pytest.raises(TimeoutError):
+                async with deadline(0.01):
+                    await call()
+        with pytest.raises(CircuitOpen):
+            await call()
+        return breaker
+
+    breaker = asyncio.run(scenario())
+    assert breaker.state == "open"
+    assert breaker.trips == 1
+    assert breaker.rejected == 1
+
+
+def test_hung_http_upstream_opens_breaker():
+    async def scenario() -> None:
+        transport = _BreakerTransport(httpx.MockTransport(_hang))
+        async with httpx.AsyncClient(transport=transport, timeout=30) as client:
+            for _ in range(config.BREAKER_FAILURES):
+                with pytest.raises(TimeoutError):
+                    async with deadline(0.01):
+                        await client.get("https://hung-upstream.test/")
+            with pytest.raises(CircuitOpen):
+                await client.get("https://hung-upstream.test/")
+
+    asyncio.run(scenario())
+
+
+def test_other_cancellation_is_not_a_failure():
+    async def scenario() -> CircuitBreaker:
+        breaker = CircuitBreaker("cancelled")
+
+        async def call():
+            with breaker.guard():
+                await asyncio.sleep(60)
+
+        for _ in range(config.BREAKER_FAILURES + 1):
+            task = asyncio.create_task(call())
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        return breaker
+
+    breaker = asyncio.run(scenario())
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
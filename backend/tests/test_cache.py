@@ -0,0 +1,99 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app import config
+from app.cache import TieredCache
+from app.models import AsnInfo
+from app.modules.asn_lookup import lookup_asn
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TieredCache(16, tmp_path / "cache.sqlite3")
+    yield cache
+    cache.close()
+
+
+def _loader(*values):
+    """A loader returning (or raising) ``values`` in turn, counting its calls."""
+    pending = list(values)
+
+    async def load():
+        load.calls += 1
+        value = pending.pop(0)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    load.calls = 0
+    return load
+
+
+ASN = AsnInfo(asn="AS64500", asn_name="EXAMPLE")
+
+
+def test_result_is_cached_in_both_layers(cache):
+    load = _loader(ASN)
+    value, status = asyncio.run(cache.get_or_load("asn", "192.0.2.1", load))
+    assert value == ASN and status is None
+
+    value, status = asyncio.run(cache.get_or_load("asn", "192.0.2.1", load))
+    assert value == ASN and status.layer == "l1"
+    assert cache.l2.get("asn:192.0.2.1") is not None
+    assert load.calls == 1
+
+
+def test_failed_load_is_not_cached(cache):
+    load = _loader(RuntimeError("upstream down"), ASN)
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_load("asn", "192.0.2.1", load))
+    assert cache.l2.get("asn:192.0.2.1") is None
+
+    value, status = asyncio.run(cache.get_or_load("asn", "192.0.2.1", load))
+    assert value == ASN and status is None
+    assert load.calls == 2
+
+
+def test_empty_result_is_kept_briefly_in_l1_only(cache, monkeypatch):
+    load = _loader(AsnInfo(), AsnInfo(), ASN)
+    asyncio.run(cache.get_or_load("asn", "192.0.2.1", load))
+    assert cache.l2.get("asn:192.0.2.1") is None
+
+    _, status = asyncio.run(cache.get_or_load("asn", "192.0.2.1", load))
+    assert status.layer == "l1"
+    assert load.calls == 1
+
+    # Past the negative TTL the source is asked again, not served stale
+    monkeypatch.setattr(config, "CACHE_NEGATIVE_TTL", 0)
+    for expected in (AsnInfo(), ASN):
+        value, status = asyncio.run(cache.get_or_load("asn", "192.0.2.1", load))
+        assert value == expected and status is None
+    assert load.calls == 3
+
+
+def test_empty_refresh_keeps_stale_entry(cache, monkeypatch):
+    asyncio.run(cache.get_or_load("asn", "192.0.2.1", _loader(ASN)))
+    monkeypatch.setitem(config.CACHE_TTLS, "asn", 0)
+
+    async def scenario():
+        value, status = await cache.get_or_load("asn", "192.0.2.1", _loader(AsnInfo()))
+        await asyncio.gather(*cache._refreshing.values())
+        return value, status
+
+    value, status = asyncio.run(scenario())
+    assert value == ASN and status.stale
+    assert cache.l1.get("asn:192.0.2.1")[1] == ASN
+
+
+def test_asn_lookup_raises_on_rdap_outage():
+    def unavailable(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(unavailable)) as client:
+            await lookup_asn("example.com", "198.51.100.7", rdap_client=client, ipinfo_client=client)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(scenario())
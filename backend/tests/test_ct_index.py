@@ -0,0 +1,15 @@
+from app.ct_index import CtIndex
+
+
+def test_undated_entries_keep_known_dates(tmp_path):
+    index = CtIndex(tmp_path / "ct.sqlite3")
+    try:
+        index.add_entries("example.com", [], [("www.example.com", None)])
+        index.add_entries("example.com", [], [("www.example.com", "2024-03-01T00:00:00")])
+        index.add_entries("example.com", [], [("www.example.com", "2023-01-01T00:00:00")])
+        index.add_entries("example.com", [], [("www.example.com", None)])
+        [name] = index.names("example.com")
+    finally:
+        index.close()
+    assert name.first_seen == "2023-01-01T00:00:00"
+    assert name.last_seen == "2024-03-01T00:00:00"
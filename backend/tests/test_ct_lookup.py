@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app import config
+from app.ct_index import CtIndex
+from app.modules import ct_lookup
+from app.modules.ct_lookup import _CtAccumulator, iter_json_array
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def _parse(data: bytes, size: int) -> list:
+    async def collect():
+        return [item async for item in iter_json_array(_chunks(data, size))]
+    return asyncio.run(collect())
+
+
+ITEMS = [
+    {"id": 1, "name_value": "www.example.com\napi.example.com", "issuer_name": "C=US, O=Let's Encrypt"},
+    {"id": 2, "name_value": "münchen.example.com", "note": "escaped \\\" quote, ] bracket and , comma"},
+    {"id": 3, "nested": {"list": [1, 2, {"deep": []}]}, "n": -1.5e3},
+]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 4096])
+def test_elements_split_across_chunks(size):
+    # Multi-byte UTF-8 and every token boundary land mid-chunk at some size
+    data = json.dumps(ITEMS, ensure_ascii=False, indent=1).encode()
+    assert _parse(data, size) == ITEMS
+
+
+def test_empty_array_and_non_array_bodies():
+    assert _parse(b"  [ ]  ", 1) == []
+    assert _parse(b'{"error": "rate limited"}', 4) == []
+    assert _parse(b"<html>502 Bad Gateway</html>", 4) == []
+
+
+@pytest.mark.parametrize("data", [b'[{"id": 1}, {"id": 2', b'[{"id": 1}', b'[{"id": 1}, {oops}]'])
+def test_truncated_or_malformed_array_raises(data):
+    with pytest.raises(ValueError):
+        _parse(data, 3)
+
+
+def _cert(serial: str, not_before: str, names: str = "") -> dict:
+    return {"serial_number": serial, "not_before": not_before, "name_value": names}
+
+
+def test_accumulator_keeps_newest_certificates():
+    acc = _CtAccumulator("example.com", limit=3)
+    for serial, not_before in [
+        ("a", "2021-01-01"), ("b", "2023-01-01"), ("c", "2020-01-01"),
+        ("d", "2024-01-01"),  # evicts c, the oldest kept
+        ("e", "2019-01-01"),  # older than everything kept: dropped
+        ("f", "2022-01-01"),  # evicts a
+    ]:
+        acc.add(_cert(serial, not_before))
+
+    assert [(c.serial_number, c.not_before) for c in acc.result().certificates] == [
+        ("d", "2024-01-01"), ("b", "2023-01-01"), ("f", "2022-01-01"),
+    ]
+
+
+def test_accumulator_ignores_duplicate_and_evicted_serials():
+    acc = _CtAccumulator("example.com", limit=2)
+    acc.add(_cert("a", "2020-01-01"))
+    acc.add(_cert("b", "2021-01-01"))
+    acc.add(_cert("b", "2021-01-01"))  # crt.sh lists a certificate once per log entry
+    acc.add(_cert("c", "2022-01-01"))  # evicts a
+    acc.add(_cert("a", "2020-01-01"))  # an evicted serial cannot come back
+
+    assert [c.serial_number for c in acc.result().certificates] == ["c", "b"]
+    assert acc.kept_serials == {"b", "c"}
+
+
+def test_accumulator_name_spans():
+    acc = _CtAccumulator("example.com", limit=10)
+    acc.add(_cert("a", "2022-06-01", "*.example.com\nWWW.example.com\nother.org"))
+    acc.add(_cert("b", "2020-01-01", "www.example.com"))
+    acc.add(_cert("c", None, "api.example.com"))
+
+    names = {n.name: (n.first_seen, n.last_seen) for n in acc.result().names}
+    assert names == {
+        "api.example.com": (None, None),
+        "www.example.com": ("2020-01-01", "2022-06-01"),
+    }
+
+
+class _SlowBody(httpx.AsyncByteStream):
+    """A crt.sh body that stalls halfway until ``release`` is set."""
+
+    def __init__(self, first: bytes, rest: bytes):
+        self.first, self.rest = first, rest
+        self.release = asyncio.Event()
+
+    async def __aiter__(self):
+        yield self.first
+        await self.release.wait()
+        yield self.rest
+
+
+def test_index_sync_outlives_a_cancelled_lookup(tmp_path, monkeypatch):
+    index = CtIndex(tmp_path / "ct.sqlite3")
+    monkeypatch.setattr(config, "CT_INDEX_ENABLED", True)
+    monkeypatch.setattr(ct_lookup, "get_ct_index", lambda: index)
+    data = json.dumps([
+        {"id": 7, "serial_number": "a", "not_before": "2024-01-01", "name_value": "www.example.com"},
+        {"id": 9, "serial_number": "b", "not_before": "2024-02-01", "name_value": "api.example.com"},
+    ]).encode()
+
+    async def scenario():
+        body = _SlowBody(data[:40], data[40:])
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, stream=body)))
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(0.05):
+                await ct_lookup.lookup_ct("example.com", client)
+        assert index.sync_state("example.com") is None
+
+        body.release.set()
+        for _ in range(100):
+            if index.sync_state("example.com") is not None:
+                break
+            await asyncio.sleep(0.01)
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert index.sync_state("example.com").max_cert_id == 9
+    assert [c.serial_number for c in index.certificates("example.com", 0, 10)] == ["b", "a"]
@@ -0,0 +1,99 @@
+import pytest
+
+from app import config
+from app.history import HistoryStore
+from app.models import CertificateInfo, DnsRecords, OverviewInfo
+from app.subdomain_trie import SubdomainTrie
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "HISTORY_SNAPSHOT_EVERY", 3)
+    store = HistoryStore(tmp_path / "history.sqlite3")
+    yield store
+    store.close()
+
+
+def _subdomains(*labels: str) -> SubdomainTrie:
+    trie = SubdomainTrie("example.com")
+    for label in labels:
+        trie.add(f"{label}.example.com", "crt.sh")
+    return trie
+
+
+def _scan(addresses, serial="01", subdomains=("www",)) -> dict:
+    return {
+        "dns_records": DnsRecords(A=list(addresses), NS=["ns1.example.net"]),
+        "certificates": CertificateInfo(serial_number=serial, issuer="Example CA"),
+        "overview": OverviewInfo(domain="example.com", ip_address=addresses[0]),
+        "subdomains": _subdomains(*subdomains),
+    }
+
+
+def test_unchanged_scans_extend_the_current_version(store):
+    first = store.record("example.com", 100.0, _scan(["192.0.2.1"]))
+    # Same content in a different order is the same state
+    again = store.record("example.com", 200.0, _scan(["192.0.2.1"], subdomains=("www",)))
+    assert again == first
+    [version] = store.versions("example.com", 0, 10)
+    assert version.scans == 2 and version.snapshot
+    assert version.first_seen < version.last_seen
+
+
+def test_changes_append_deltas_and_periodic_snapshots(store):
+    states = [
+        _scan(["192.0.2.1"]),
+        _scan(["192.0.2.1", "192.0.2.2"]),
+        _scan(["192.0.2.2"], serial="02"),
+        _scan(["192.0.2.2"], serial="02", subdomains=("www", "api")),
+        _scan(["192.0.2.3"], serial="02", subdomains=("www", "api")),
+    ]
+    versions = [store.record("example.com", 100.0 + i, scan) for i, scan in enumerate(states)]
+    assert len(set(versions)) == len(states)
+
+    history = store.versions("example.com", 0, 10)[::-1]
+    assert [v.snapshot for v in history] == [True, False, False, True, False]
+    assert history[1].changed == ["dns_records"]
+    assert history[2].changed == ["overview", "certificates", "dns_records"]
+    assert history[3].changed == ["subdomains"]
+
+    # Every version rebuilds to exactly what was scanned, across snapshot boundaries
+    for version, scan in zip(versions, states):
+        state = store.state("example.com", version)
+        assert state["dns_records"]["A"] == sorted(scan["dns_records"].A)
+        assert state["certificates"]["serial_number"] == scan["certificates"].serial_number
+        assert state["subdomains"] == sorted(scan["subdomains"].names())
+
+    assert store.version_at("example.com", 102.5).version == versions[2]
+    assert store.version_at("example.com", 50.0) is None
+
+
+def test_missing_sections_carry_forward(store):
+    store.record("example.com", 100.0, _scan(["192.0.2.1"], subdomains=("www", "api")))
+    # The subdomain module failed on the next scan: its section is left out
+    partial = _scan(["192.0.2.9"])
+    del partial["subdomains"]
+    version = store.record("example.com", 200.0, partial)
+    state = store.state("example.com", version)
+    assert state["subdomains"] == ["api.example.com", "www.example.com"]
+    assert store.versions("example.com", 0, 1)[0].changed == ["overview", "dns_records"]
+
+
+def test_diff_between_versions(store):
+    store.record("example.com", 100.0, _scan(["192.0.2.1"], subdomains=("www", "api")))
+    store.record("example.com", 200.0, _scan(["192.0.2.2"], serial="02", subdomains=("www", "dev")))
+    before = store.version_at("example.com", 150.0)
+    after = store.version_at("example.com")
+
+    diff = store.diff("example.com", before, after)
+    assert diff.subdomains.added == ["dev.example.com"]
+    assert diff.subdomains.removed == ["api.example.com"]
+    assert diff.dns_records["A"].added == ["192.0.2.2"]
+    assert diff.dns_records["A"].removed == ["192.0.2.1"]
+    assert "NS" not in diff.dns_records
+    assert diff.certificate.before.serial_number == "01"
+    assert diff.certificate.after.serial_number == "02"
+    # Certificate fields are covered by the rotation, not listed one by one
+    assert [(f.section, f.field, f.before, f.after) for f in diff.fields] == [
+        ("overview", "ip_address", "192.0.2.1", "192.0.2.2"),
+    ]
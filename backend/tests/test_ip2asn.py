@@ -0,0 +1,79 @@
+import asyncio
+import gzip
+import random
+
+from app.ip2asn import AsnTable, _flatten
+
+
+def _owner(pieces, value):
+    owners = [origin for first, last, origin in pieces if first <= value <= last]
+    assert len(owners) <= 1, "pieces overlap"
+    return owners[0] if owners else None
+
+
+def test_flatten_nested_ranges_innermost_wins():
+    outer = (0, 255, 1, 0)
+    middle = (64, 127, 2, 0)
+    inner = (96, 103, 3, 0)
+    sibling = (128, 135, 4, 0)
+    pieces = _flatten([inner, sibling, outer, middle])
+
+    assert [(first, last, origin[2]) for first, last, origin in pieces] == [
+        (0, 63, 1), (64, 95, 2), (96, 103, 3), (104, 127, 2), (128, 135, 4), (136, 255, 1),
+    ]
+
+
+def test_flatten_matches_brute_force_on_random_prefixes():
+    rng = random.Random(7)
+    ranges = []
+    for asn in range(1, 200):
+        length = rng.randint(4, 16)
+        start = rng.getrandbits(16) >> (16 - length) << (16 - length)
+        ranges.append((start, start + (1 << (16 - length)) - 1, asn, 0))
+    ranges = list({(r[0], r[1]): r for r in ranges}.values())  # one origin per prefix
+    pieces = _flatten(list(ranges))
+
+    assert pieces == sorted(pieces)
+    for value in range(0, 1 << 16, 37):
+        containing = [r for r in ranges if r[0] <= value <= r[1]]
+        expected = min(containing, key=lambda r: r[1] - r[0]) if containing else None
+        assert _owner(pieces, value) == expected
+
+
+def test_flatten_partial_overlap_goes_to_later_start():
+    pieces = _flatten([(0, 10, 1, 0), (5, 15, 2, 0)])
+    assert [(first, last, origin[2]) for first, last, origin in pieces] == [(0, 4, 1), (5, 15, 2)]
+
+
+def _load(path) -> AsnTable:
+    table = AsnTable(path)
+    asyncio.run(table.refresh())
+    return table
+
+
+def test_table_lookup_ip2asn_tsv(tmp_path):
+    path = tmp_path / "ip2asn-combined.tsv.gz"
+    with gzip.open(path, "wt") as fh:
+        fh.write("1.0.0.0\t1.0.255.255\t13335\tUS\tCLOUDFLARENET\n")
+        fh.write("1.0.4.0\t1.0.4.255\t64500\tAU\tEXAMPLE-CUSTOMER\n")
+        fh.write("1.1.0.0\t1.1.0.255\t0\tNone\tNot routed\n")
+        fh.write("2001:db8::\t2001:db8:ffff:ffff:ffff:ffff:ffff:ffff\t64501\tNL\tEXAMPLE-V6\n")
+    table = _load(path)
+
+    outer = table.lookup("1.0.200.1")
+    assert (outer.asn, outer.network, outer.country) == (13335, "1.0.0.0/16", "US")
+    inner = table.lookup("1.0.4.9")
+    assert (inner.asn, inner.network, inner.description) == (64500, "1.0.4.0/24", "EXAMPLE-CUSTOMER")
+    assert table.lookup("1.1.0.5") is None  # unrouted rows are skipped
+    assert table.lookup("2001:db8::1").asn == 64501
+    assert table.lookup("192.0.2.1") is None
+    assert table.stats()["ranges_v4"] == 3
+
+
+def test_table_lookup_pfx2as(tmp_path):
+    path = tmp_path / "routeviews.pfx2as"
+    path.write_text("10.0.0.0\t8\t64500\n10.1.0.0\t16\t64501_64502\n")
+    table = _load(path)
+
+    assert table.lookup("10.200.0.1").asn == 64500
+    assert table.lookup("10.1.2.3").asn == 64501  # first origin of a MOAS prefix
@@ -0,0 +1,65 @@
+import time
+
+from app.models import AsnInfo
+from app.netblock_cache import NetblockCache
+
+
+PROVIDER = AsnInfo(asn="AS64500", netblock="198.51.0.0/16")
+CUSTOMER = AsnInfo(asn="AS64501", netblock="198.51.100.0/24")
+
+
+def test_innermost_block_wins():
+    cache = NetblockCache()
+    cache.put("198.51.0.0", "198.51.255.255", PROVIDER)
+    cache.put("198.51.100.0", "198.51.100.255", CUSTOMER)
+
+    assert cache.get("198.51.100.77") == CUSTOMER
+    assert cache.get("198.51.7.1") == PROVIDER
+    assert cache.get("203.0.113.1") is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_range_that_is_not_a_single_prefix():
+    cache = NetblockCache()
+    # .10 - .20 is made of /31, /30, /30, /31 and /32 blocks
+    cache.put("192.0.2.10", "192.0.2.20", CUSTOMER)
+    for last_octet in range(10, 21):
+        assert cache.get(f"192.0.2.{last_octet}") == CUSTOMER
+    assert cache.get("192.0.2.9") is None
+    assert cache.get("192.0.2.21") is None
+
+
+def test_ipv6_and_invalid_input():
+    cache = NetblockCache()
+    cache.put("2001:db8::", "2001:db8::ffff", PROVIDER)
+    assert cache.get("2001:db8::1234") == PROVIDER
+    assert cache.get("2001:db8::1:0") is None
+    assert cache.get("not an address") is None
+    cache.put("192.0.2.1", "2001:db8::1", PROVIDER)  # mixed families are ignored
+    assert cache.stats()["entries"] == 1
+
+
+def test_lru_eviction_and_expiry():
+    cache = NetblockCache(max_entries=2)
+    cache.put("10.0.0.0", "10.0.0.255", PROVIDER)
+    cache.put("10.0.1.0", "10.0.1.255", CUSTOMER)
+    cache.get("10.0.0.1")  # marks the first block recently used
+    cache.put("10.0.2.0", "10.0.2.255", PROVIDER)
+
+    assert cache.get("10.0.1.1") is None  # least recently used went first
+    assert cache.get("10.0.0.1") == PROVIDER
+    assert cache.evictions == 1
+
+    cache = NetblockCache(ttl=0.0)
+    cache.put("10.0.0.0", "10.0.0.255", PROVIDER)
+    time.sleep(0.001)
+    assert cache.get("10.0.0.1") is None
+    assert cache.expired == 1 and cache.stats()["entries"] == 0
+
+
+def test_re_putting_a_block_replaces_it():
+    cache = NetblockCache()
+    cache.put("10.0.0.0", "10.0.0.255", PROVIDER)
+    cache.put("10.0.0.0", "10.0.0.255", CUSTOMER)
+    assert cache.get("10.0.0.1") == CUSTOMER
+    assert cache.stats()["entries"] == 1
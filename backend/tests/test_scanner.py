@@ -0,0 +1,32 @@
+import asyncio
+
+import app.scanner as scanner
+from app.scanner import run_scan
+
+
+def test_failing_derived_section_keeps_upstream_results(fake_upstreams, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("trie exploded")
+
+    monkeypatch.setattr(scanner, "aggregate_subdomains", broken)
+    response = asyncio.run(run_scan("derived-failure.example"))
+
+    assert response.errors == {"subdomains": "trie exploded"}
+    assert response.dns_records.A == ["192.0.2.1"]
+    assert response.whois.registrar == "Example Registrar"
+    assert response.asn_info.asn == "AS64500"
+    assert response.subdomains == []
+    timings = {timing.module: timing.status for timing in response.timeline.modules}
+    assert timings["subdomains"] == "error"
+    assert timings["overview"] == "ok"
+
+
+def test_failing_upstream_is_reported(fake_upstreams):
+    async def down(domain):
+        raise ConnectionError("whois server unreachable")
+
+    fake_upstreams["whois"] = down
+    response = asyncio.run(run_scan("upstream-failure.example"))
+
+    assert response.errors == {"whois": "whois server unreachable"}
+    assert response.dns_records.A == ["192.0.2.1"]
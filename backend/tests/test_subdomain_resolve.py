@@ -0,0 +1,41 @@
+import asyncio
+
+import app.modules.subdomain_resolve as subdomain_resolve
+from app.modules.subdomain_resolve import resolve_subdomains
+from app.subdomain_trie import SubdomainTrie
+
+
+class _Resolver:
+    """Answers A records from a table; anything else has no records."""
+
+    def __init__(self, answers: dict[str, list[str]]):
+        self.answers = answers
+
+    async def resolve(self, name: str, rdtype: str) -> list[str]:
+        return list(self.answers.get(name, [])) if rdtype == "A" else []
+
+
+def test_one_failing_name_does_not_end_the_run(monkeypatch):
+    resolver = _Resolver({"www.example.com": ["192.0.2.1"]})
+    monkeypatch.setattr(subdomain_resolve, "get_resolver", lambda: resolver)
+    resolve_name = subdomain_resolve.resolve_name
+
+    async def flaky_resolve_name(resolver, detector, name):
+        if name.startswith("broken."):
+            raise RuntimeError(f"resolver blew up on {name}")
+        return await resolve_name(resolver, detector, name)
+
+    monkeypatch.setattr(subdomain_resolve, "resolve_name", flaky_resolve_name)
+    trie = SubdomainTrie("example.com")
+    for name in ("www.example.com", "old.example.com", "broken.example.com"):
+        trie.add(name, "crt.sh")
+
+    resolution = asyncio.run(resolve_subdomains(trie))
+
+    assert (resolution.checked, resolution.live, resolution.dead, resolution.errors) == (3, 1, 1, 1)
+    statuses = {entry.subdomain: entry.status for entry in trie.page(limit=10)[1]}
+    assert statuses == {
+        "broken.example.com": "error",
+        "old.example.com": "dead",
+        "www.example.com": "live",
+    }
@@ -0,0 +1,27 @@
+from app.subdomain_trie import SubdomainTrie
+
+
+def _names(trie, **kwargs):
+    return [entry.subdomain for entry in trie.page(limit=100, **kwargs)[1]]
+
+
+def test_pages_and_levels_follow_later_inserts():
+    trie = SubdomainTrie("example.com")
+    for name in ("www.example.com", "api.dev.example.com", "dev.example.com"):
+        trie.add(name, "crt.sh")
+    assert _names(trie) == ["dev.example.com", "api.dev.example.com", "www.example.com"]
+    assert trie.levels() == {1: 2, 2: 1}
+
+    # New children must show up in cached orderings and depth counts
+    trie.add("b.api.dev.example.com", "crt.sh")
+    trie.add("app.example.com", "tls_handshake")
+    trie.add("www.example.com", "tls_handshake")  # known name, new source
+    assert _names(trie) == [
+        "app.example.com", "dev.example.com", "api.dev.example.com",
+        "b.api.dev.example.com", "www.example.com",
+    ]
+    assert trie.levels() == {1: 3, 2: 1, 3: 1}
+    assert trie.levels("dev.example.com") == {1: 1, 2: 1}
+    assert trie.levels("nope.example.com") == {}
+    assert trie.page(offset=3, limit=1)[1][0].subdomain == "b.api.dev.example.com"
+    assert _names(trie, under="dev.example.com") == ["api.dev.example.com", "b.api.dev.example.com"]
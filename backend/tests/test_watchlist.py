@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from app.watchlist import WatchScheduler, WatchStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = WatchStore(tmp_path / "watchlist.sqlite3")
+    yield store
+    store.close()
+
+
+def _check(store: WatchStore, domain: str) -> WatchScheduler:
+    async def scenario() -> WatchScheduler:
+        scheduler = WatchScheduler(store)
+        store.add([domain], 0.0)
+        await scheduler._check(domain)
+        return scheduler
+
+    return asyncio.run(scenario())
+
+
+def test_check_with_every_upstream_down_counts_as_failed(store, fake_upstreams):
+    async def down(*args, **kwargs):
+        raise ConnectionError("unreachable")
+
+    for name in fake_upstreams:
+        fake_upstreams[name] = down
+    scheduler = _check(store, "all-down.example")
+
+    assert (scheduler.checks, scheduler.failed_checks, scheduler.changes) == (1, 1, 0)
+    [entry] = store.entries(0, 1)
+    assert "dns: unreachable" in entry.last_error
+
+
+def test_check_with_some_upstreams_down_is_not_failed(store, fake_upstreams):
+    async def down(*args, **kwargs):
+        raise ConnectionError("unreachable")
+
+    fake_upstreams["whois"] = fake_upstreams["ct"] = down
+    scheduler = _check(store, "partly-down.example")
+
+    assert (scheduler.checks, scheduler.failed_checks) == (1, 0)
+    assert scheduler.changes > 0
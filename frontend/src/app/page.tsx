@@ -9,11 +9,16 @@ import DnsSection from "@/components/DnsSection";
 import SubdomainsSection from "@/components/SubdomainsSection";
 import InfrastructureSection from "@/components/InfrastructureSection";
 import ExportButton from "@/components/ExportButton";
-import { ScanResponse } from "@/lib/types";
-import { runScan } from "@/lib/api";
+import { ScanResponse, ScanSection } from "@/lib/types";
+import { emptyScanResponse, streamScan } from "@/lib/api";
+
+function SectionPlaceholder() {
+  return <div className="card shimmer-loading" style={{ height: "160px" }} />;
+}
 
 export default function Home() {
   const [scanData, setScanData] = useState<ScanResponse | null>(null);
+  const [received, setReceived] = useState<Set<ScanSection>>(new Set());
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [activeSection, setActiveSection] = useState("overview");
@@ -31,10 +36,19 @@ export default function Home() {
     setIsLoading(true);
     setError(null);
     setScanData(null);
+    setReceived(new Set());
 
     try {
-      const result = await runScan(domain);
-      setScanData(result);
+      await streamScan(domain, {
+        onStart: (scanDomain) => setScanData(emptyScanResponse(scanDomain)),
+        onSection: (section, data) => {
+          setScanData((prev) => (prev ? { ...prev, [section]: data } : prev));
+          setReceived((prev) => new Set(prev).add(section));
+        },
+        onComplete: (summary) => {
+          setScanData((prev) => (prev ? { ...prev, ...summary } : prev));
+        },
+      });
       setActiveSection("overview");
     } catch (err) {
       setError(err instanceof Error ? err.message : "Scan failed. Please try again.");
@@ -49,6 +63,8 @@ export default function Home() {
     ref?.current?.scrollIntoView({ behavior: "smooth", block: "start" });
   };
 
+  const has = (...sections: ScanSection[]) => sections.every((s) => received.has(s));
+
   // Show input screen when no data
   if (!scanData && !isLoading && !error) {
     return <DomainInput onScan={handleScan} isLoading={isLoading} />;
@@ -84,14 +100,20 @@ export default function Home() {
                 "Scanning..."
               )}
             </h1>
-            {scanData && (
+            {scanData?.scan_timestamp ? (
               <p className="text-xs mt-1" style={{ color: "var(--color-text-muted)" }}>
                 Completed {new Date(scanData.scan_timestamp).toLocaleString()}
               </p>
+            ) : (
+              isLoading && (
+                <p className="text-xs mt-1" style={{ color: "var(--color-text-muted)" }}>
+                  Collecting data… {received.size} sections received
+                </p>
+              )
             )}
           </div>
           <div className="flex items-center gap-3">
-            {scanData && <ExportButton data={scanData} />}
+            {scanData && !isLoading && <ExportButton data={scanData} />}
             <button
               onClick={() => {
                 setScanData(null);
@@ -133,8 +155,8 @@ export default function Home() {
           </div>
         )}
 
-        {/* Loading State */}
-        {isLoading && (
+        {/* Loading State (before the stream has started) */}
+        {isLoading && !scanData && (
           <div className="space-y-6">
             {[1, 2, 3].map((i) => (
               <div key={i} className="card shimmer-loading" style={{ height: "160px" }} />
@@ -169,25 +191,49 @@ export default function Home() {
         {scanData && (
           <div className="space-y-10">
             <div ref={sectionRefs.overview}>
-              <OverviewPanel data={scanData.overview} />
+              {has("overview") ? (
+                <OverviewPanel data={scanData.overview} />
+              ) : (
+                <SectionPlaceholder />
+              )}
             </div>
             <div ref={sectionRefs.certificates}>
-              <CertificateSection
-                current={scanData.certificates}
-                historical={scanData.historical_certificates}
-              />
+              {has("certificates", "historical_certificates") ? (
+                <CertificateSection
+                  current={scanData.certificates}
+                  historical={scanData.historical_certificates}
+                />
+              ) : (
+                <SectionPlaceholder />
+              )}
             </div>
             <div ref={sectionRefs.dns}>
-              <DnsSection data={scanData.dns_records} />
+              {has("dns_records") ? (
+                <DnsSection data={scanData.dns_records} />
+              ) : (
+                <SectionPlaceholder />
+              )}
             </div>
             <div ref={sectionRefs.subdomains}>
-              <SubdomainsSection data={scanData.subdomains} />
+              {has("subdomains", "subdomain_summary") ? (
+                <SubdomainsSection
+                  domain={scanData.domain}
+                  data={scanData.subdomains}
+                  summary={scanData.subdomain_summary}
+                />
+              ) : (
+                <SectionPlaceholder />
+              )}
             </div>
             <div ref={sectionRefs.infrastructure}>
-              <InfrastructureSection
-                asn={scanData.asn_info}
-                whois={scanData.whois}
-              />
+              {has("asn_info", "whois") ? (
+                <InfrastructureSection
+                  asn={scanData.asn_info}
+                  whois={scanData.whois}
+                />
+              ) : (
+                <SectionPlaceholder />
+              )}
             </div>
           </div>
         )}
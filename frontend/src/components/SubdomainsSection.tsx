@@ -1,22 +1,44 @@
 "use client";
 
 import React, { useState, useMemo } from "react";
-import { SubdomainEntry } from "@/lib/types";
+import { SubdomainEntry, SubdomainSummary } from "@/lib/types";
+import { fetchSubdomains } from "@/lib/api";
 
 interface SubdomainsSectionProps {
+    domain: string;
     data: SubdomainEntry[];
+    summary: SubdomainSummary;
 }
 
+const PAGE_SIZE = 200;
+
 type SortField = "subdomain" | "source";
 type SortDir = "asc" | "desc";
 
-export default function SubdomainsSection({ data }: SubdomainsSectionProps) {
+export default function SubdomainsSection({ domain, data, summary }: SubdomainsSectionProps) {
     const [sortField, setSortField] = useState<SortField>("subdomain");
     const [sortDir, setSortDir] = useState<SortDir>("asc");
     const [filter, setFilter] = useState("");
+    const [more, setMore] = useState<SubdomainEntry[]>([]);
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    const rows = useMemo(() => [...data, ...more], [data, more]);
+    const total = Math.max(summary.total, data.length);
+
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const page = await fetchSubdomains(domain, { offset: rows.length, limit: PAGE_SIZE });
+            setMore((prev) => [...prev, ...page.items]);
+        } catch {
+            // keep what is already shown
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
     const filtered = useMemo(() => {
-        let results = [...data];
+        let results = [...rows];
         if (filter) {
             const q = filter.toLowerCase();
             results = results.filter((s) => s.subdomain.toLowerCase().includes(q));
@@ -28,7 +50,7 @@ export default function SubdomainsSection({ data }: SubdomainsSectionProps) {
             return sortDir === "asc" ? cmp : -cmp;
         });
         return results;
-    }, [data, sortField, sortDir, filter]);
+    }, [rows, sortField, sortDir, filter]);
 
     const toggleSort = (field: SortField) => {
         if (sortField === field) {
@@ -59,7 +81,7 @@ export default function SubdomainsSection({ data }: SubdomainsSectionProps) {
                         color: "var(--color-accent-teal)",
                     }}
                 >
-                    {data.length} found
+                    {total} found
                 </span>
             </h2>
 
@@ -129,7 +151,7 @@ export default function SubdomainsSection({ data }: SubdomainsSectionProps) {
                                                 color: "var(--color-text-muted)",
                                             }}
                                         >
-                                            {sub.source}
+                                            {(sub.sources?.length ? sub.sources : [sub.source]).join(", ")}
                                         </span>
                                     </td>
                                 </tr>
@@ -137,13 +159,33 @@ export default function SubdomainsSection({ data }: SubdomainsSectionProps) {
                             {filtered.length === 0 && (
                                 <tr>
                                     <td colSpan={2} className="text-center py-8 text-xs" style={{ color: "var(--color-text-muted)" }}>
-                                        {data.length === 0 ? "No subdomains discovered" : "No matches"}
+                                        {rows.length === 0 ? "No subdomains discovered" : "No matches"}
                                     </td>
                                 </tr>
                             )}
                         </tbody>
                     </table>
                 </div>
+
+                {rows.length < total && (
+                    <div className="flex items-center justify-between mt-3 text-xs" style={{ color: "var(--color-text-muted)" }}>
+                        <span>
+                            Showing {rows.length} of {total}
+                        </span>
+                        <button
+                            onClick={loadMore}
+                            disabled={loadingMore}
+                            className="px-3 py-1.5 rounded-lg transition-all duration-200 disabled:opacity-40"
+                            style={{
+                                background: "var(--color-bg-input)",
+                                border: "1px solid var(--color-border-default)",
+                                color: "var(--color-accent-teal)",
+                            }}
+                        >
+                            {loadingMore ? "Loading..." : "Load more"}
+                        </button>
+                    </div>
+                )}
             </div>
         </section>
     );
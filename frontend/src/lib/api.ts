@@ -1,18 +1,350 @@
-import { ScanResponse } from "./types";
+import {
+    DomainPivots,
+    JobStatus,
+    NormalizeError,
+    NormalizeSummary,
+    NormalizedDomain,
+    PivotKind,
+    PivotPage,
+    ResolvedName,
+    ScanResponse,
+    ScanSection,
+    ScanComplete,
+    SubdomainPage,
+    SubdomainResolution,
+} from "./types";
 
 const API_BASE = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
-export async function runScan(domain: string): Promise<ScanResponse> {
+export const SCAN_SECTIONS: ScanSection[] = [
+    "dns_records",
+    "whois",
+    "certificates",
+    "historical_certificates",
+    "asn_info",
+    "subdomains",
+    "subdomain_summary",
+    "subdomain_resolution",
+    "overview",
+];
+
+async function errorFrom(res: Response): Promise<Error> {
+    const error = await res.json().catch(() => ({ detail: "Scan failed" }));
+    return new Error(error.detail || `HTTP ${res.status}`);
+}
+
+export interface ScanOptions {
+    /** Modules or sections to run, e.g. ["dns"]; all when omitted. */
+    modules?: string[];
+    /** Response fields to return, e.g. ["certificates.not_after"]. */
+    fields?: string[];
+}
+
+const JOB_POLL_MS = 1000;
+// Longer than a job can live through the server's lease retries
+const JOB_DEADLINE_MS = 10 * 60 * 1000;
+
+/** Poll a queued scan until its result is ready or the deadline passes. */
+async function awaitJob(job: JobStatus): Promise<Partial<ScanResponse>> {
+    const deadline = Date.now() + JOB_DEADLINE_MS;
+    while (Date.now() < deadline) {
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_MS));
+        const res = await fetch(`${API_BASE}/jobs/${job.job_id}/result`);
+        if (res.status === 409) continue; // still queued or running
+        if (!res.ok) {
+            throw await errorFrom(res);
+        }
+        return res.json();
+    }
+    throw new Error(`Scan job ${job.job_id} did not finish in time`);
+}
+
+/**
+ * Run a scan in one request. With ``options`` only the selected modules
+ * run and the response contains only the selected sections/fields.
+ * When the server queues scans and the job outlasts the request, the
+ * result is polled for.
+ */
+export async function runScan(domain: string, options: ScanOptions = {}): Promise<Partial<ScanResponse>> {
     const res = await fetch(`${API_BASE}/scan`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ domain }),
+        body: JSON.stringify({ domain, ...options }),
     });
 
     if (!res.ok) {
-        const error = await res.json().catch(() => ({ detail: "Scan failed" }));
-        throw new Error(error.detail || `HTTP ${res.status}`);
+        throw await errorFrom(res);
+    }
+    if (res.status === 202) {
+        return awaitJob(await res.json());
+    }
+
+    return res.json();
+}
+
+export interface SubdomainQuery {
+    offset?: number;
+    limit?: number;
+    under?: string;
+    contains?: string;
+    source?: string;
+    /** live, dead, wildcard, error or unchecked */
+    status?: string;
+}
+
+/** Fetch one page of a scanned domain's subdomains. */
+export async function fetchSubdomains(domain: string, query: SubdomainQuery = {}): Promise<SubdomainPage> {
+    const params = new URLSearchParams();
+    for (const [key, value] of Object.entries(query)) {
+        if (value !== undefined && value !== "") params.set(key, String(value));
+    }
+    const res = await fetch(`${API_BASE}/scan/${encodeURIComponent(domain)}/subdomains?${params}`);
+
+    if (!res.ok) {
+        throw await errorFrom(res);
+    }
+
+    return res.json();
+}
+
+/**
+ * List the scanned domains sharing an infrastructure value. For "ip" a
+ * CIDR matches every address inside it; for "netblock" an address or CIDR
+ * matches the netblocks containing it.
+ */
+export async function fetchPivots(
+    kind: PivotKind,
+    value: string,
+    page: { offset?: number; limit?: number } = {},
+): Promise<PivotPage> {
+    const params = new URLSearchParams({ kind, value });
+    if (page.offset !== undefined) params.set("offset", String(page.offset));
+    if (page.limit !== undefined) params.set("limit", String(page.limit));
+    const res = await fetch(`${API_BASE}/pivots?${params}`);
+
+    if (!res.ok) {
+        throw await errorFrom(res);
+    }
+
+    return res.json();
+}
+
+/** A scanned domain's pivot values, each with how many domains share it. */
+export async function fetchDomainPivots(domain: string): Promise<DomainPivots> {
+    const res = await fetch(`${API_BASE}/domains/${encodeURIComponent(domain)}/pivots`);
+
+    if (!res.ok) {
+        throw await errorFrom(res);
     }
 
     return res.json();
 }
+
+/**
+ * Normalize and deduplicate ``domains`` without scanning them, calling
+ * ``onResult`` per unique domain and ``onError`` per invalid input. With
+ * ``registrable`` names are reduced to their registrable domain first.
+ */
+export async function normalizeDomains(
+    domains: string[],
+    onResult: (domain: NormalizedDomain) => void,
+    options: { registrable?: boolean; onError?: (error: NormalizeError) => void; signal?: AbortSignal } = {},
+): Promise<NormalizeSummary> {
+    const params = new URLSearchParams({ registrable: String(Boolean(options.registrable)) });
+    const res = await fetch(`${API_BASE}/normalize?${params}`, {
+        method: "POST",
+        headers: { "Content-Type": "text/plain" },
+        body: domains.join("\n"),
+        signal: options.signal,
+    });
+
+    if (!res.ok || !res.body) {
+        throw await errorFrom(res);
+    }
+
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        let sep: number;
+        while ((sep = buffer.indexOf("\n")) !== -1) {
+            const line = buffer.slice(0, sep).trim();
+            buffer = buffer.slice(sep + 1);
+            if (!line) continue;
+            const { type, ...payload } = JSON.parse(line);
+            if (type === "result") onResult(payload as NormalizedDomain);
+            else if (type === "error") options.onError?.(payload as NormalizeError);
+            else if (type === "summary") return payload as NormalizeSummary;
+        }
+    }
+    throw new Error("Normalize stream ended early");
+}
+
+/**
+ * Resolve a scanned domain's subdomains, calling ``onResult`` as each name
+ * resolves. Resolves with the summary once every name is done.
+ */
+export async function resolveSubdomains(
+    domain: string,
+    onResult: (resolved: ResolvedName) => void,
+    signal?: AbortSignal,
+): Promise<SubdomainResolution> {
+    const res = await fetch(`${API_BASE}/scan/${encodeURIComponent(domain)}/subdomains/resolve`, {
+        method: "POST",
+        signal,
+    });
+
+    if (!res.ok || !res.body) {
+        throw await errorFrom(res);
+    }
+
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        let sep: number;
+        while ((sep = buffer.indexOf("\n")) !== -1) {
+            const line = buffer.slice(0, sep).trim();
+            buffer = buffer.slice(sep + 1);
+            if (!line) continue;
+            const { type, ...payload } = JSON.parse(line);
+            if (type === "result") onResult(payload as ResolvedName);
+            else if (type === "summary") return payload as SubdomainResolution;
+            else if (type === "error") throw new Error(payload.detail || "Resolution failed");
+        }
+    }
+    throw new Error("Resolution stream ended early");
+}
+
+/* ── Progressive scan (Server-Sent Events) ────────────────────────────── */
+
+export function emptyScanResponse(domain: string): ScanResponse {
+    return {
+        domain,
+        scan_timestamp: "",
+        overview: {
+            domain,
+            ip_address: null,
+            asn: null,
+            registrar: null,
+            created_date: null,
+            expires_date: null,
+            cert_expiry: null,
+            hosting_provider: null,
+            country: null,
+        },
+        certificates: {
+            issuer: null,
+            subject: null,
+            serial_number: null,
+            not_before: null,
+            not_after: null,
+            san_entries: [],
+            tls_version: null,
+            cipher_suite: null,
+            public_key_algorithm: null,
+            key_length: null,
+            certificate_chain: [],
+        },
+        historical_certificates: [],
+        dns_records: { A: [], AAAA: [], MX: [], TXT: [], NS: [], CNAME: [], SOA: [] },
+        whois: {
+            registrar: null,
+            creation_date: null,
+            expiration_date: null,
+            updated_date: null,
+            name_servers: [],
+            status: [],
+            organization: null,
+            emails: [],
+        },
+        asn_info: {
+            asn: null,
+            asn_name: null,
+            hosting_provider: null,
+            netblock: null,
+            country: null,
+            allocation_owner: null,
+        },
+        subdomains: [],
+        subdomain_summary: { total: 0, inline: 0, truncated: false, levels: {}, branches: [] },
+        subdomain_resolution: {
+            checked: 0,
+            live: 0,
+            dead: 0,
+            wildcard: 0,
+            errors: 0,
+            unchecked: 0,
+            wildcards: [],
+            elapsed_ms: 0,
+        },
+        errors: {},
+        pending: [],
+        cache: {},
+        timeline: { total_ms: 0, critical_path: [], modules: [] },
+    };
+}
+
+export interface ScanStreamHandlers {
+    onStart?: (domain: string) => void;
+    onSection: <K extends ScanSection>(section: K, data: ScanResponse[K]) => void;
+    onComplete?: (summary: ScanComplete) => void;
+}
+
+function dispatchFrame(frame: string, handlers: ScanStreamHandlers) {
+    let event = "message";
+    const dataLines: string[] = [];
+    for (const line of frame.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) dataLines.push(line.slice(5).trimStart());
+    }
+    if (dataLines.length === 0) return;
+    const payload = JSON.parse(dataLines.join("\n"));
+
+    if (event === "start") {
+        handlers.onStart?.(payload.domain);
+    } else if (event === "complete") {
+        handlers.onComplete?.(payload);
+    } else if (event === "failed") {
+        throw new Error(payload.detail || "Scan failed");
+    } else if ((SCAN_SECTIONS as string[]).includes(event)) {
+        handlers.onSection(event as ScanSection, payload.data);
+    }
+}
+
+/**
+ * Run a scan over the /scan/stream endpoint, invoking handlers as each
+ * section arrives. Resolves once the server sends the completion event.
+ */
+export async function streamScan(
+    domain: string,
+    handlers: ScanStreamHandlers,
+    signal?: AbortSignal,
+): Promise<void> {
+    const res = await fetch(`${API_BASE}/scan/stream?domain=${encodeURIComponent(domain)}`, {
+        headers: { Accept: "text/event-stream" },
+        signal,
+    });
+
+    if (!res.ok || !res.body) {
+        throw await errorFrom(res);
+    }
+
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        let sep: number;
+        while ((sep = buffer.indexOf("\n\n")) !== -1) {
+            const frame = buffer.slice(0, sep);
+            buffer = buffer.slice(sep + 2);
+            dispatchFrame(frame, handlers);
+        }
+    }
+}
@@ -68,6 +68,83 @@ export interface AsnInfo {
 export interface SubdomainEntry {
     subdomain: string;
     source: string;
+    sources: string[];
+    first_seen: string | null;
+    last_seen: string | null;
+    status: ResolutionStatus | null; // null until resolved
+    addresses: string[]; // A and AAAA
+    cname: string | null;
+}
+
+export type ResolutionStatus = "live" | "dead" | "wildcard" | "error";
+
+export interface ResolvedName {
+    subdomain: string;
+    status: ResolutionStatus;
+    addresses: string[];
+    cname: string | null;
+    error: string | null;
+}
+
+export interface WildcardZone {
+    zone: string;
+    addresses: string[];
+}
+
+export interface SubdomainResolution {
+    checked: number;
+    live: number;
+    dead: number;
+    wildcard: number;
+    errors: number;
+    unchecked: number;
+    wildcards: WildcardZone[];
+    elapsed_ms: number;
+}
+
+export interface SubdomainBranch {
+    name: string;
+    count: number;
+}
+
+export interface SubdomainSummary {
+    total: number;
+    inline: number;
+    truncated: boolean;
+    levels: Record<string, number>;
+    branches: SubdomainBranch[];
+}
+
+export interface SubdomainPage {
+    domain: string;
+    total: number;
+    offset: number;
+    limit: number;
+    items: SubdomainEntry[];
+    levels: Record<string, number>;
+    branches: SubdomainBranch[];
+}
+
+export interface CacheStatus {
+    layer: "l1" | "l2";
+    age_seconds: number;
+    stale: boolean;
+}
+
+export interface ModuleTiming {
+    module: string;
+    start_ms: number;
+    end_ms: number;
+    duration_ms: number;
+    queued_ms: number; // waiting for a free upstream slot, part of duration_ms
+    blocked_by: string | null;
+    status: "ok" | "cached" | "error" | "timeout" | "pending";
+}
+
+export interface ScanTimeline {
+    total_ms: number;
+    critical_path: string[];
+    modules: ModuleTiming[];
 }
 
 export interface ScanResponse {
@@ -80,5 +157,94 @@ export interface ScanResponse {
     whois: WhoisInfo;
     asn_info: AsnInfo;
     subdomains: SubdomainEntry[];
+    subdomain_summary: SubdomainSummary;
+    subdomain_resolution: SubdomainResolution;
     errors: Record<string, string>;
+    pending: ScanSection[]; // sections cut off by the scan deadline
+    cache: Record<string, CacheStatus>;
+    timeline: ScanTimeline;
+}
+
+export type ScanSection =
+    | "overview"
+    | "certificates"
+    | "historical_certificates"
+    | "dns_records"
+    | "whois"
+    | "asn_info"
+    | "subdomains"
+    | "subdomain_summary"
+    | "subdomain_resolution";
+
+export interface ScanComplete {
+    domain: string;
+    scan_timestamp: string;
+    errors: Record<string, string>;
+    pending: ScanSection[]; // sections cut off by the scan deadline
+    cache: Record<string, CacheStatus>;
+    timeline: ScanTimeline;
+}
+
+export type PivotKind = "ip" | "netblock" | "asn" | "ns" | "cert_serial" | "san" | "registrar";
+
+export interface PivotMatch {
+    domain: string;
+    value: string;
+    first_seen: string;
+    last_seen: string;
+}
+
+export interface PivotPage {
+    kind: PivotKind;
+    value: string;
+    total: number;
+    offset: number;
+    limit: number;
+    items: PivotMatch[];
+}
+
+export interface PivotValue {
+    kind: PivotKind;
+    value: string;
+    domains: number; // indexed domains with this value, this one included
+    first_seen: string;
+    last_seen: string;
+}
+
+export interface DomainPivots {
+    domain: string;
+    pivots: PivotValue[];
+}
+
+export interface NormalizedDomain {
+    index: number; // line number in the input, from 0
+    input: string;
+    domain: string; // ASCII (punycode) form
+    registrable: string | null; // null when the name is itself a public suffix
+    public_suffix: string;
+}
+
+export interface NormalizeError {
+    index: number;
+    input: string;
+    detail: string;
+}
+
+export interface NormalizeSummary {
+    lines: number;
+    valid: number;
+    invalid: number;
+    duplicates: number;
+    elapsed_ms: number;
+}
+
+export interface JobStatus {
+    job_id: string;
+    status: "queued" | "running" | "done" | "failed";
+    domain: string;
+    created_at: string;
+    started_at: string | null;
+    finished_at: string | null;
+    attempts: number;
+    error: string | null;
 }